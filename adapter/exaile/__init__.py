@@ -484,7 +484,8 @@ class ExaileAdapter(remuco.PlayerAdapter):
                     with open(img, "w") as fp:
                         fp.write(idata)
             if not img and track.local_file_name(): # loc_for_io may be != UTF-8
-                img = self.find_image(track.local_file_name())
+                self.find_image_async(track.local_file_name(), id, info)
+                return
             
         self.update_item(id, info, img)
         
@@ -300,9 +300,7 @@ class TotemAdapter(remuco.PlayerAdapter):
         
         info[remuco.INFO_LENGTH] = int(len / 1000)
         
-        img = self.find_image(mrl)
-        
-        self.update_item(mrl, info, img)
+        self.find_image_async(mrl, mrl, info)
         
     def __poll_state(self):
         
@@ -32,6 +32,9 @@ Class PlayerAdapter:
 Class MPRISAdapter:
     Base class for player adapters for MPRIS players.
 
+Class MPRIS2Adapter:
+    Base class for player adapters for MPRIS 2 players.
+
 Classes ItemAction and ListAction:
     Classes to define actions clients may execute in their media browser. 
 
@@ -77,12 +80,13 @@ from remuco.config import Config
 from remuco.defs import *
 from remuco.manager import Manager
 from remuco.mpris import MPRISAdapter
+from remuco.mpris2 import MPRIS2Adapter
 
 #==============================================================================
 # exports
 #==============================================================================
 
-__all__ = ["PlayerAdapter", "ListReply", "MPRISAdapter",
+__all__ = ["PlayerAdapter", "ListReply", "MPRISAdapter", "MPRIS2Adapter",
            "ItemAction", "ListAction", "Manager", "Config",
            
            "INFO_ALBUM", "INFO_ARTIST", "INFO_GENRE", "INFO_LENGTH",
@@ -25,6 +25,7 @@ import inspect
 import math # for ceiling
 import os
 import os.path
+import time
 import urllib
 import urlparse
 
@@ -33,19 +34,29 @@ import gobject
 from remuco import art
 from remuco import config
 from remuco import files
+from remuco import index
 from remuco import log
 from remuco import message
+from remuco import metrics
 from remuco import net
 from remuco import serial
+from remuco import volume
 
 from remuco.defs import *
 from remuco.features import *
 
 from remuco.data import PlayerInfo, PlayerState, Progress, ItemList, Item
+from remuco.data import ProgressAnchor
 from remuco.data import Control, Action, Tagging, Request
 
 from remuco.manager import NoManager
 
+# =============================================================================
+# constants
+# =============================================================================
+
+_POLL_IVAL_BOOST = 500 # poll interval (ms) shortly after control commands
+
 # =============================================================================
 # reply class for requests
 # =============================================================================
@@ -80,6 +91,7 @@ class ListReply(object):
         self.__reply_msg_id = reply_msg_id
         self.__page = page
         self.__path = path
+        self.__time = time.time() # to measure request latency
         
         self.__nested = []
         self.__ids = []
@@ -87,13 +99,21 @@ class ListReply(object):
         self.__list_actions = []
         self.__item_actions = []
         
-    def send(self):
-        """Send the requested item list to the requesting client."""
+    def send(self, length=None):
+        """Send the requested item list to the requesting client.
+        
+        @keyword length:
+            number of all nested lists and items, if 'nested' and 'ids' only
+            contain the beginning of the requested list (used internally)
+        
+        """
         
         ### paging ###
         
         page_size = self.__client.info.page_size
         len_all = len(self.__ids or []) + len(self.__nested or [])
+        if length is not None:
+            len_all = length
         # P3K: remove float() and int()
         page_max = int(max(math.ceil(float(len_all) / page_size) - 1, 0))
         
@@ -134,6 +154,9 @@ class ListReply(object):
         
         gobject.idle_add(self.__client.send, msg)
         
+        metrics.timing("request", message.name(self.__reply_msg_id),
+                       time.time() - self.__time)
+        
 
     # === property: ids ===
     
@@ -409,6 +432,7 @@ class PlayerAdapter(object):
     ===========================================================================
     
         * find_image()
+        * find_image_async()
         
     '''
     
@@ -462,12 +486,18 @@ class PlayerAdapter(object):
         @keyword search_mask:
              list of fields to search the players library for (e.g. artist,
              genre, any, ...) - if set method request_search() should be
-             overridden
+             overridden (if not set and request_search() is not overridden,
+             search requests are served by the file browser's index, if
+             enabled by the option 'fb-index-enabled')
         
         @attention: When overriding, call super class implementation first!
         
         """
         
+        # worker threads (log file, art lookup) must not starve while the main
+        # loop waits for events, so enable threads before any main loop runs
+        gobject.threads_init()
+        
         self.__name = name
         
         # init config (config inits logging)
@@ -482,36 +512,63 @@ class PlayerAdapter(object):
         
         self.__state = PlayerState()
         self.__progress = Progress()
+        self.__anchor = ProgressAnchor()
+        self.__anchor_time = 0
+        self.__progress_known = progress_known
         self.__item_id = None
         self.__item_info = None
         self.__item_img = None
+        self.__item_img_resource = None
         
         flags = self.__util_calc_flags(playback_known, volume_known,
             repeat_known, shuffle_known, progress_known)
         
+        # players without a searchable library get searchable files
+        use_index = (self.config.fb_index_enabled and
+                     self.config.fb_root_dirs and not search_mask and
+                     self.request_search.im_func is
+                     PlayerAdapter.request_search.im_func)
+        if use_index:
+            search_mask = ["File"]
+        
         self.__info = PlayerInfo(name, flags, max_rating, file_actions,
                                  search_mask)
         
+        self.__file_actions = file_actions
+        self.__mime_types = mime_types
+        
         self.__sync_triggers = {}
         
         self.__poll_ival = max(500, int(poll * 1000))
+        self.__poll_ival_now = 0 # currently used interval, 0 if suspended
         self.__poll_sid = 0
+        self.__poll_needed = True # False once we know poll() does nothing
+        self.__poll_boost_end = 0
         
         self.stopped = True
         
         self.__server_bluetooth = None
         self.__server_wifi = None
         
-        if self.config.fb_root_dirs:
-            self.__filelib = files.FileSystemLibrary(
-                self.config.fb_root_dirs, mime_types,
-                self.config.fb_show_extensions, False)
-        else:
-            log.info("file browser is disabled")
+        self.__mixer = None
+        
+        self.__metrics_sid = 0
+        self.__metrics_dbus = None
+        
+        self.__filelib = None
+        self.__fileindex = None
+        
+        self.__util_init_files(use_index)
             
         if "REMUCO_TESTSHELL" in os.environ:
             from remuco import testshell
             testshell.setup(self)
+            
+        self.__profiler = None
+        if self.config.profile_enabled or "REMUCO_PROFILE" in os.environ:
+            from remuco import profiler
+            sample = os.environ.get("REMUCO_PROFILE") == "sample"
+            self.__profiler = profiler.setup(self, sample=sample)
 
         log.debug("init done")
     
@@ -542,12 +599,31 @@ class PlayerAdapter(object):
         else:
             self.__server_wifi = None
             
+        # set up master volume
+        
+        if self.config.master_volume_enabled:
+            self.__mixer = volume.get_mixer(self.config,
+                                            self.__update_volume_master)
+        
         # set up polling
         
-        if self.__poll_ival > 0:
-            log.debug("poll every %d milli seconds" % self.__poll_ival)
-            self.__poll_sid = gobject.timeout_add(self.__poll_ival, self.__poll)
+        log.debug("poll every %d milli seconds" % self.__poll_ival)
+        self.__poll_schedule()
+            
+        if self.__fileindex is not None:
+            self.__fileindex.start()
+            
+        # set up metrics
+        
+        if self.config.metrics_enabled:
+            self.__metrics_dbus = metrics.export(self.config.player)
+            if self.config.metrics_interval > 0:
+                self.__metrics_sid = gobject.timeout_add(
+                    self.config.metrics_interval * 1000, self.__metrics_dump)
             
+        # apply config changes without a restart
+        
+        self.config.watch(self.__config_changed)
         
         log.debug("start done")
     
@@ -589,6 +665,28 @@ class PlayerAdapter(object):
 
         if self.__poll_sid > 0:
             gobject.source_remove(self.__poll_sid)
+            self.__poll_sid = 0
+            
+        if self.__mixer is not None:
+            self.__mixer.stop()
+            self.__mixer = None
+            
+        if self.__fileindex is not None:
+            self.__fileindex.stop()
+            
+        if self.__profiler is not None:
+            self.__profiler.stop()
+            
+        if self.__metrics_sid:
+            gobject.source_remove(self.__metrics_sid)
+            self.__metrics_sid = 0
+        metrics.unexport(self.__metrics_dbus)
+        self.__metrics_dbus = None
+        if self.config.metrics_enabled:
+            self.__metrics_dump()
+            
+        self.config.unwatch()
+        self.config.flush()
             
         log.debug("stop done")
     
@@ -598,6 +696,11 @@ class PlayerAdapter(object):
         If player adapters override this method, it gets called periodically
         in the interval specified by the keyword 'poll' in __init__().
         
+        The interval adapts to the situation: polling is suspended while no
+        client is awake, slows down while playback is paused or stopped and
+        speeds up shortly after a client has sent a control command (see the
+        config options 'poll-...').
+        
         A typical use case of this method is to detect the playback progress of
         the current item and then call update_progress(). It can also be used
         to poll any other player state information when a player does not
@@ -608,17 +711,117 @@ class PlayerAdapter(object):
     
     def __poll(self):
         
-        if self.config.master_volume_enabled:
-            self.__update_volume_master()
+        t0 = time.time()
+        
+        poll_mixer = self.__mixer is not None and not self.__mixer.push
+        
+        if poll_mixer:
+            self.__mixer.poll()
         
         try:
             self.poll()
         except NotImplementedError:
-            # poll again if master volume is used, otherwise not
-            return self.config.master_volume_enabled
+            # poll again if master volume needs polling, otherwise not
+            self.__poll_needed = poll_mixer
+            
+        metrics.timing("poll", self.config.player, time.time() - t0)
+        
+        if self.__poll_interval() == self.__poll_ival_now:
+            return True
+        
+        self.__poll_sid = 0 # this source gets removed by returning False
+        self.__poll_schedule()
+        
+        return False
+    
+    def __poll_interval(self):
+        """Get the poll interval which suits the current situation.
+        
+        @return: interval in milli seconds, 0 means to suspend polling
+        
+        """
+        if self.stopped or not self.__poll_needed:
+            return 0
+        
+        if (self.config.poll_suspend and
+            not [c for c in self.__clients if not c.sleeping]):
+            return 0
+        
+        if time.time() < self.__poll_boost_end:
+            return min(self.__poll_ival, _POLL_IVAL_BOOST)
+        
+        if self.__state.playback != PLAYBACK_PLAY:
+            return int(self.__poll_ival * max(1, self.config.poll_backoff))
+        
+        return self.__poll_ival
+    
+    def __poll_schedule(self, now=False):
+        """(Re)schedule polling according to the current poll interval.
+        
+        @keyword now: poll immediately, i.e. before returning (if polling is
+            not suspended)
+        
+        """
+        ival = self.__poll_interval()
+        
+        if ival == self.__poll_ival_now and self.__poll_sid and not now:
+            return
+        
+        if self.__poll_sid:
+            gobject.source_remove(self.__poll_sid)
+            self.__poll_sid = 0
+        
+        if ival != self.__poll_ival_now:
+            log.debug("poll interval: %d ms", ival)
+        self.__poll_ival_now = ival
+        
+        if not ival:
+            return
+        
+        if now:
+            self.__poll_now()
+        else:
+            self.__poll_sid = gobject.timeout_add(ival, self.__poll)
+            
+    def __poll_now(self):
+        """Poll once now and then continue polling in the usual interval."""
+        
+        if self.__poll():
+            self.__poll_sid = gobject.timeout_add(self.__poll_ival_now,
+                                                  self.__poll)
+    
+    def __metrics_dump(self):
+        """Write metrics to the cache dir (see config option 'metrics-...')."""
+        
+        metrics.dump(os.path.join(self.config.cache,
+                                  "%s.metrics" % self.config.player))
         
         return True
     
+    def __config_changed(self, keys):
+        """Apply changed config options (see Config.watch())."""
+        
+        if "player-encoding" in keys:
+            serial.Bin.HOST_ENCODING = self.config.player_encoding
+        
+        if set(keys) & set(("fb-root-dirs", "fb-show-extensions",
+                            "fb-cache-size")):
+            use_index = self.__fileindex is not None
+            if use_index:
+                self.__fileindex.stop()
+            self.__util_init_files(use_index)
+            if use_index and self.__fileindex is not None:
+                self.__fileindex.start()
+        
+        restart = [key for key in keys if key.startswith("wifi-") or
+                   key.startswith("bluetooth-") or key in
+                   ("master-volume-enabled", "master-volume-backend",
+                    "system-shutdown-enabled", "fb-index-enabled",
+                    "metrics-enabled", "metrics-interval")]
+        if restart:
+            log.info("changes of %s take effect after a restart" %
+                     ", ".join(restart))
+    
     # =========================================================================
     # utility methods which may be useful for player adapters
     # =========================================================================
@@ -641,10 +844,58 @@ class PlayerAdapter(object):
         
         """
         
-        file = art.get_art(resource)
-        log.debug("image for '%s': %s" % (resource, file))
+        file = art.get_art(resource, img_size=self.__util_img_size(),
+                           names=self.config.art_names)
+        log.debug("image for '%s': %s", resource, file)
         return file
     
+    def find_image_async(self, resource, id, info):
+        """Set currently played item and find its art image in the background.
+        
+        Non-blocking alternative to calling find_image() and update_item() in
+        a row. The item gets synchronized with clients immediately (without an
+        image). The art image is searched in a worker thread, once found the
+        item gets synchronized again, this time including the image.
+        
+        Useful if the player's media files are located on slow storage where
+        looking for images blocks the adapter noticeably.
+        
+        @param resource:
+            resource to find an art image for (may be a file name or URI)
+        @param id:
+            item ID (str), see update_item()
+        @param info:
+            meta information (dict), see update_item()
+        
+        @see: find_image(), update_item()
+        
+        """
+        if resource is not None and resource == self.__item_img_resource:
+            # image already found or lookup in progress
+            self.update_item(id, info, self.__item_img)
+            return
+        
+        self.update_item(id, info, None)
+        self.__item_img_resource = resource
+        
+        if resource is not None:
+            art.get_art_async(resource, self.__find_image_done,
+                              img_size=self.__util_img_size(),
+                              names=self.config.art_names)
+    
+    def __find_image_done(self, resource, file):
+        """Callback for finished background image lookups."""
+        
+        log.debug("image for '%s': %s", resource, file)
+        
+        if resource != self.__item_img_resource:
+            log.debug("item changed meanwhile, ignore image")
+            return False
+        
+        self.update_item(self.__item_id, self.__item_info, file)
+        
+        return False
+    
     # =========================================================================
     # control interface 
     # =========================================================================
@@ -772,20 +1023,17 @@ class PlayerAdapter(object):
         log.error("** BUG ** in feature handling")
         
     def __ctrl_volume_master(self, direction):
-        """Adjust volume using custom volume command (instead of player)."""
+        """Adjust volume using the master volume mixer (instead of player)."""
+        
+        if self.__mixer is None:
+            return
         
         if direction < 0:
-            cmd = self.config.master_volume_down_cmd
+            self.__mixer.down()
         elif direction > 0:
-            cmd = self.config.master_volume_up_cmd
-        else:
-            cmd = self.config.master_volume_mute_cmd
-        
-        ret, out = commands.getstatusoutput("sh -c '%s'" % cmd)
-        if ret != os.EX_OK:
-            log.error("master-volume-... failed: %s" % out)
+            self.__mixer.up()
         else:
-            gobject.idle_add(self.__update_volume_master)
+            self.__mixer.mute()
         
     def __ctrl_shutdown_system(self):
         
@@ -1044,6 +1292,10 @@ class PlayerAdapter(object):
         if change:
             self.__state.playback = playback
             self.__sync_trigger(self.__sync_state)
+            self.__update_anchor(self.__anchor_position(time.time()),
+                                 self.__anchor.length)
+            if self.__poll_sid:
+                self.__poll_schedule()
     
     def update_repeat(self, repeat):
         """Set the current repeat mode. 
@@ -1103,20 +1355,10 @@ class PlayerAdapter(object):
             self.__state.volume = volume
             self.__sync_trigger(self.__sync_state)
     
-    def __update_volume_master(self):
-        """Set the current volume (use custom command instead of player)."""
-
-        cmd = "sh -c '%s'" % self.config.master_volume_get_cmd
-        ret, out = commands.getstatusoutput(cmd)
-        if ret != os.EX_OK:
-            log.error("master-volume-get failed: '%s'" % out)
-            return
-        try:
-            volume = int(out)
-            if volume < 0 or volume > 100:
-                raise ValueError
-        except ValueError:
-            log.error("output of master-volume-get malformed: '%s'" % out)
+    def __update_volume_master(self, volume):
+        """Set the current volume (reported by the master volume mixer)."""
+        
+        if self.stopped:
             return
         
         change = self.__state.volume != volume
@@ -1136,8 +1378,11 @@ class PlayerAdapter(object):
         @note: Call to synchronize player state with remote clients.
         
         """
-        # sanitize progress (to a multiple of 5)
         length = max(0, int(length))
+        
+        self.__update_anchor(max(0, int(progress * 1000)), length)
+        
+        # sanitize progress (to a multiple of 5)
         progress = max(0, int(progress))
         off = progress % 5
         if off < 3:
@@ -1155,6 +1400,44 @@ class PlayerAdapter(object):
             self.__progress.length = length
             self.__sync_trigger(self.__sync_progress)
     
+    def __update_anchor(self, progress, length):
+        """Set a new progress anchor if the current one is no longer accurate.
+        
+        @param progress: current progress in milli seconds
+        @param length: item length in seconds
+        
+        """
+        now = time.time()
+        
+        # let clients extrapolate only if there is something to extrapolate
+        if (self.__state.playback == PLAYBACK_PLAY and self.__progress_known
+            and length > 0):
+            rate = 1000
+        else:
+            rate = 0
+        
+        drift = abs(self.__anchor_position(now) - progress)
+        
+        if (length == self.__anchor.length and rate == self.__anchor.rate and
+            drift <= self.config.progress_drift * 1000):
+            return
+        
+        self.__anchor.progress = progress
+        self.__anchor.length = length
+        self.__anchor.rate = rate
+        self.__anchor_time = now
+        self.__sync_trigger(self.__sync_anchor)
+        
+    def __anchor_position(self, now):
+        """Get the progress (in milli seconds) extrapolated from the anchor."""
+        
+        anchor = self.__anchor
+        progress = anchor.progress + (now - self.__anchor_time) * anchor.rate
+        if anchor.length > 0:
+            progress = min(anchor.length * 1000, progress)
+        
+        return int(progress)
+    
     def update_item(self, id, info, img):
         """Set currently played item.
         
@@ -1174,7 +1457,10 @@ class PlayerAdapter(object):
                
         """
         
-        log.debug("new item: (%s, %s %s)" % (id, info, img))
+        log.debug("new item: (%s, %s %s)", id, info, img)
+        
+        if self.__item_id != id:
+            self.__item_img_resource = None
         
         change = self.__item_id != id
         change |= self.__item_info != info
@@ -1196,7 +1482,7 @@ class PlayerAdapter(object):
             return
         
         if sync_fn in self.__sync_triggers:
-            log.debug("trigger for %s already active" % sync_fn.func_name)
+            log.debug("trigger for %s already active", sync_fn.func_name)
             return
         
         self.__sync_triggers[sync_fn] = \
@@ -1206,7 +1492,7 @@ class PlayerAdapter(object):
         
         del self.__sync_triggers[self.__sync_state]
 
-        log.debug("broadcast new state to clients: %s" % self.__state)
+        log.debug("broadcast new state to clients: %s", self.__state)
         
         msg = net.build_message(message.SYNC_STATE, self.__state)
         
@@ -1221,22 +1507,50 @@ class PlayerAdapter(object):
         
         del self.__sync_triggers[self.__sync_progress]
         
-        log.debug("broadcast new progress to clients: %s" % self.__progress)
+        log.debug("broadcast new progress to clients: %s", self.__progress)
         
         msg = net.build_message(message.SYNC_PROGRESS, self.__progress)
         
         if msg is None:
             return
         
-        for c in self.__clients: c.send(msg)
+        for c in self.__clients:
+            if not c.info.progress_anchor:
+                c.send(msg)
+        
+        return False
+    
+    def __sync_anchor(self):
+        
+        del self.__sync_triggers[self.__sync_anchor]
+        
+        log.debug("broadcast new progress anchor to clients: %s", self.__anchor)
+        
+        msg = self.__anchor_message()
+        
+        if msg is None:
+            return
+        
+        for c in self.__clients:
+            if c.info.progress_anchor:
+                c.send(msg)
         
         return False
     
+    def __anchor_message(self):
+        """Build a progress anchor message, up to date at the time of sending."""
+        
+        now = time.time()
+        self.__anchor.progress = self.__anchor_position(now)
+        self.__anchor_time = now
+        
+        return net.build_message(message.SYNC_PROGRESS_ANCHOR, self.__anchor)
+    
     def __sync_item(self):
 
         del self.__sync_triggers[self.__sync_item]
         
-        log.debug("broadcast new item to clients: %s" % self.__item_id)
+        log.debug("broadcast new item to clients: %s", self.__item_id)
         
         for c in self.__clients:
             
@@ -1255,28 +1569,40 @@ class PlayerAdapter(object):
         
         if message.is_control(id):
 
-            log.debug("control from client %s" % client)
+            log.debug("control from client %s", client)
 
             self.__handle_message_control(id, bindata)
             
+            if self.config.poll_boost > 0:
+                self.__poll_boost_end = time.time() + self.config.poll_boost
+                self.__poll_schedule()
+            
         elif message.is_action(id):
 
-            log.debug("action from client %s" % client)
+            log.debug("action from client %s", client)
 
             self.__handle_message_action(id, bindata)
             
         elif message.is_request(id):
             
-            log.debug("request from client %s" % client)
+            log.debug("request from client %s", client)
 
             self.__handle_message_request(client, id, bindata)
             
         elif id == message.PRIV_INITIAL_SYNC:
             
+            # a client connected or woke up, polling may be suspended - if so,
+            # poll now to not send a stale state
+            if not self.__poll_sid:
+                self.__poll_schedule(now=True)
+            
             msg = net.build_message(message.SYNC_STATE, self.__state)
             client.send(msg)
             
-            msg = net.build_message(message.SYNC_PROGRESS, self.__progress)
+            if client.info.progress_anchor:
+                msg = self.__anchor_message()
+            else:
+                msg = net.build_message(message.SYNC_PROGRESS, self.__progress)
             client.send(msg)
             
             msg = net.build_message(message.SYNC_ITEM, self.__item(client))
@@ -1384,9 +1710,17 @@ class PlayerAdapter(object):
                 
         elif id == message.ACT_FILES:
         
-            uris = self.__util_files_to_uris(a.items)
+            items = self.__util_readable(a.items)
+            uris = self.__util_files_to_uris(items)
+            
+            self.action_files(a.id, items, uris)
+        
+        elif id == message.ACT_SEARCH and self.__fileindex is not None:
+            
+            items = self.__util_readable(a.items)
+            uris = self.__util_files_to_uris(items)
             
-            self.action_files(a.id, a.items, uris)
+            self.action_files(a.id, items, uris)
         
         elif id == message.ACT_SEARCH:
             
@@ -1418,8 +1752,13 @@ class PlayerAdapter(object):
             
         elif id == message.REQ_FILES:
             
-            reply.nested, reply.ids, reply.names = \
-                self.__filelib.get_level(request.path)
+            self.__reply_files(client, reply, request.path, request.page)
+            
+        elif id == message.REQ_SEARCH and self.__fileindex is not None:
+            
+            words = " ".join(request.path or []).split()
+            reply.ids, reply.names = self.__fileindex.search(words)
+            reply.item_actions = self.__file_actions
             
             reply.send()
             
@@ -1430,6 +1769,52 @@ class PlayerAdapter(object):
         else:
             log.error("** BUG ** unexpected request message: %d" % id)
             
+    def __reply_files(self, client, reply, path, page):
+        """Reply a file browser request.
+        
+        For large directories the requested page is sent as soon as it is
+        known, the complete directory content is checked afterwards and sent
+        again if it differs from what has been sent first.
+        
+        """
+        if self.__filelib is None: # disabled by a config reload
+            reply.send()
+            return
+        
+        limit = (page + 1) * client.info.page_size
+        head = self.__filelib.get_level_head(path, limit)
+        
+        if head is None:
+            reply.nested, reply.ids, reply.names = \
+                self.__filelib.get_level(path)
+            reply.send()
+            return
+        
+        reply.nested, reply.ids, reply.names, length = head[0:4]
+        reply.send(length=length)
+        
+        gobject.idle_add(self.__reply_files_complete, reply, path, head,
+                         priority=gobject.PRIORITY_LOW)
+        
+    def __reply_files_complete(self, reply, path, head):
+        """Send the complete content of a directory after its head."""
+        
+        nested_head, ids_head, names_head, length, raw = head
+        
+        if self.__filelib is None:
+            return False
+        
+        nested, ids, names = self.__filelib.get_level(path, raw)
+        
+        if (length != len(nested) + len(ids) or
+            nested[:len(nested_head)] != nested_head or
+            ids[:len(ids_head)] != ids_head):
+            log.debug("directory head differs from directory, send again")
+            reply.nested, reply.ids, reply.names = nested, ids, names
+            reply.send()
+            
+        return False
+    
     # =========================================================================
     # miscellaneous 
     # =========================================================================
@@ -1440,6 +1825,39 @@ class PlayerAdapter(object):
         return Item(self.__item_id, self.__item_info, self.__item_img,
                     client.info.img_size, client.info.img_type)
         
+    def __util_init_files(self, use_index):
+        """Set up the file browser (and index) according to the config."""
+        
+        if self.config.fb_root_dirs:
+            self.__filelib = files.FileSystemLibrary(
+                self.config.fb_root_dirs, self.__mime_types,
+                self.config.fb_show_extensions, False,
+                cache_size=self.config.fb_cache_size)
+        else:
+            self.__filelib = None
+            log.info("file browser is disabled")
+            
+        if use_index and self.__filelib is not None:
+            self.__fileindex = index.FileIndex(self.__filelib,
+                os.path.join(self.config.cache, "%s.index" % self.config.player))
+        else:
+            self.__fileindex = None
+        
+    def __util_img_size(self):
+        """Get the largest image size requested by connected clients."""
+        
+        sizes = [c.info.img_size for c in self.__clients]
+        
+        return max(sizes or [0])
+        
+    def __util_readable(self, files):
+        """Drop files from the file browser which are not readable."""
+        
+        if self.__filelib is None:
+            return files
+        
+        return self.__filelib.readable(files)
+        
     def __util_files_to_uris(self, files):
         
         def file_to_uri(file):
@@ -20,22 +20,27 @@
 #
 # =============================================================================
 
-import glob
 import hashlib
+import os
 import os.path
-import re
+import Queue
+import threading
 import urllib
 import urlparse
 
+import gobject
+import Image
+
 from remuco import log
 from remuco.remos import user_home
 
-_RE_IND = r'(?:front|album|cover|folder|art)' # words indicating art files
-_RE_EXT = r'\.(?:png|jpeg|jpg|gif)' # art file extensions
-_RE_FILE = (r'^%s%s$' % (_RE_IND,_RE_EXT), # typical name (e.g. front.jpg)
-           r'^.*%s.*%s$' % (_RE_IND,_RE_EXT), # typical name with noise
-           r'^.*%s$' % _RE_EXT) # any image file
-_RE_FILE = [re.compile(rx, re.IGNORECASE) for rx in _RE_FILE]
+NAMES = ("front", "cover", "folder", "album", "art") # names of art files
+_EXT = (".png", ".jpeg", ".jpg", ".gif") # art file extensions
+_SCORE_ANY = (1, 0) # rating of image files without a typical name
+
+# image file name -> (modification time, (width, height))
+_SIZE_CACHE = {}
+_SIZE_CACHE_MAX = 1000
 
 # =============================================================================
 # various methods to find local cover art / media images
@@ -69,9 +74,83 @@ def _try_thumbnail(resource):
     
     return None
 
-def _try_folder(resource):
-    """Try to find an image in the resource's folder."""
+def _score(file, names):
+    """Rate how likely a file is an art image file.
+    
+    @return: a comparable rating (higher is better) or None if the file is no
+        image file at all
+    
+    """
+    root, ext = os.path.splitext(file.lower())
+    
+    if ext not in _EXT:
+        return None
+    
+    if root in names: # typical name (e.g. front.jpg)
+        return (3, -names.index(root))
+    
+    for i, name in enumerate(names): # typical name with noise
+        if name in root:
+            return (2, -i)
+    
+    return _SCORE_ANY
+
+def _image_size(file):
+    """Get the dimensions of an image file (cached)."""
+    
+    try:
+        mtime = os.path.getmtime(file)
+    except OSError:
+        return None
+    
+    cached = _SIZE_CACHE.get(file)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    try:
+        size = Image.open(file).size # reads only the image header
+    except IOError, e:
+        log.debug("failed to read image size of %s (%s)" % (file, e))
+        size = None
+    
+    if len(_SIZE_CACHE) >= _SIZE_CACHE_MAX:
+        _SIZE_CACHE.clear()
+    _SIZE_CACHE[file] = (mtime, size)
+    
+    return size
+
+def _pick_by_size(files, img_size):
+    """Pick the file whose image size fits best to the requested size.
+    
+    Smallest image not smaller than 'img_size' wins, if there is none, the
+    largest image wins.
+    
+    """
+    best, best_key = None, None
+    for file in files:
+        size = _image_size(file)
+        if size is None:
+            continue
+        edge = max(size)
+        if edge >= img_size:
+            key = (1, -edge)
+        else:
+            key = (0, edge)
+        if best_key is None or key > best_key:
+            best, best_key = file, key
+    
+    return best or files[0]
+
+def _try_folder(resource, img_size=0, names=NAMES):
+    """Try to find an image in the resource's folder.
+    
+    Rates all files in the folder in a single pass. If there are multiple
+    typically named files with the best rating, the one with the most
+    appropriate size with respect to 'img_size' gets chosen. Sizes are not
+    compared among images without a typical name - these may be all images of
+    a large scan folder.
     
+    """
     # we need a local path
     elems = urlparse.urlparse(resource)
     if elems[0] and elems[0] != "file": # resource is not local
@@ -80,29 +159,98 @@ def _try_folder(resource):
     rpath = os.path.dirname(rpath)
     
     log.debug("looking for art image in %s" % rpath)
-
-    files = glob.glob(os.path.join(rpath, "*"))
-    files = [os.path.basename(f) for f in files if os.path.isfile(f)]
     
-    for rx in _RE_FILE:
-        for file in files:
-            if rx.match(file):
-                return os.path.join(rpath, file)
-            
-    return None
+    try:
+        files = os.listdir(rpath or os.curdir)
+    except OSError, e:
+        log.debug("failed to list %s (%s)" % (rpath, e))
+        return None
+    
+    best, best_score = [], None
+    for file in files:
+        if file.startswith("."): # hidden, e.g. '._front.jpg' (AppleDouble)
+            continue
+        score = _score(file, names)
+        if score is None or (best_score is not None and score < best_score):
+            continue
+        file = os.path.join(rpath, file)
+        if not os.path.isfile(file):
+            continue
+        if score == best_score:
+            best.append(file)
+        else:
+            best, best_score = [file], score
+    
+    if not best:
+        return None
+    
+    best.sort()
+    
+    if len(best) > 1 and img_size > 0 and best_score > _SCORE_ANY:
+        return _pick_by_size(best, img_size)
+    
+    return best[0]
 
 # =============================================================================
 
-def get_art(resource, prefer_thumbnail=False):
+def get_art(resource, prefer_thumbnail=False, img_size=0, names=NAMES):
+    """Find a local art image for a resource.
+    
+    @param resource:
+        resource to find an art image for (may be a file name or URI)
+    @keyword img_size:
+        preferred image size (used to choose among multiple equally named
+        images in a resource's folder, 0 means no preference)
+    @keyword names:
+        names (lower case, without extension) of typical art image files, in
+        order of preference
+    
+    @return: an image file name or None if no image has been found
     
+    """
     if resource is None:
         return None
     
-    fname = None
-    methods = (_try_thumbnail, _try_folder)
-    for meth in methods:
-        fname = meth(resource)
-        if fname:
-            break
+    fname = _try_thumbnail(resource)
+    if not fname:
+        fname = _try_folder(resource, img_size=img_size, names=names)
     
     return fname
+
+# =============================================================================
+# asynchronous art lookup
+# =============================================================================
+
+_jobs = None
+
+def _worker():
+    """Process art lookup jobs (runs in a separate thread)."""
+    
+    while True:
+        resource, callback, kwargs = _jobs.get()
+        try:
+            fname = get_art(resource, **kwargs)
+        except Exception, e:
+            log.exception("** BUG ** %s", e)
+            fname = None
+        gobject.idle_add(callback, resource, fname)
+
+def get_art_async(resource, callback, img_size=0, names=NAMES):
+    """Like get_art() but look for an image in a worker thread.
+    
+    @param resource:
+        resource to find an art image for (may be a file name or URI)
+    @param callback:
+        function to call in the main loop when the lookup is done, parameters
+        are the resource and the found image file name (or None)
+    
+    """
+    global _jobs
+    
+    if _jobs is None:
+        _jobs = Queue.Queue()
+        thread = threading.Thread(target=_worker, name="remuco-art")
+        thread.setDaemon(True)
+        thread.start()
+    
+    _jobs.put((resource, callback, {"img_size": img_size, "names": names}))
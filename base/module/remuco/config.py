@@ -29,9 +29,14 @@ import os
 from os.path import join, isdir, exists, pathsep, basename
 import re
 import shutil
+import stat
+from StringIO import StringIO
 import sys
+import tempfile
 import textwrap
 
+import gobject
+
 from remuco import log
 from remuco import defs
 from remuco.remos import user_config_dir
@@ -93,8 +98,53 @@ _OPTIONS = {
         "Encoding of text coming from the player (i.e. artist, title, ...)."),
     "log-level": ("INFO", lambda v: getattr(log, v),
         "Log verbosity. Possible values: ERROR, WARNING, INFO, DEBUG."),
+    "art-names": ("front,cover,folder,album,art",
+        lambda v: [n.strip().lower() for n in v.split(",") if n.strip()],
+        "Comma separated list of typical names (without extension) of art "
+        "image files in a media file's folder, in order of preference. Images "
+        "with one of these names are preferred over images which only "
+        "contain one of these names, which again are preferred over any other "
+        "image."),
+    "poll-suspend": ("1", int,
+        "If to stop polling the player while no client is connected or all "
+        "clients are in sleep mode. Set to `0` for players which need to be "
+        "polled all the time."),
+    "poll-backoff": ("4", float,
+        "Factor to stretch the poll interval by while playback is paused or "
+        "stopped. Set to `1` to poll at the same rate all the time."),
+    "poll-boost": ("5", float,
+        "Number of seconds to poll faster after a client has sent a control "
+        "command (e.g. next or play), so that clients quickly show its "
+        "effect. Set to `0` to disable."),
+    "progress-drift": ("2", float,
+        "Clients which extrapolate the playback progress on their own get a "
+        "correction when their progress is off by more than this number of "
+        "seconds."),
+    "metrics-enabled": ("0", int,
+        "If to make metrics (message counters, timings, ...) of the adapter "
+        "available via D-Bus and the file `PLAYER.metrics` in the cache "
+        "directory."),
+    "metrics-interval": ("300", int,
+        "Interval in seconds to write metrics to the file `PLAYER.metrics`. "
+        "Set to `0` to write the file only when the adapter stops."),
+    "profile-enabled": ("0", int,
+        "Enable or disable profiling. If enabled, durations of message "
+        "handling, polling and requests get recorded as metrics and sending "
+        "the signal `USR1` to the adapter process toggles a sampling "
+        "profiler which writes its results to the cache directory. Can also "
+        "be enabled by setting the environment variable `REMUCO_PROFILE` "
+        "(to `sample` to start sampling immediately)."),
     "fb-show-extensions": ("0", int,
         "If to show file name extensions in a client's file browser."),
+    "fb-cache-size": ("20", int,
+        "Number of directory listings the file browser keeps in memory. "
+        "Makes paging through large directories faster. Set to `0` to "
+        "disable caching."),
+    "fb-index-enabled": ("0", int,
+        "Enable or disable an index of the files shown in the file browser. "
+        "If enabled, clients can search these files (only for players which "
+        "do not provide their own search). The index is stored in the cache "
+        "directory and gets updated in the background."),
     "fb-root-dirs": ("auto", lambda v: v.split(pathsep),
         "List of directories (separated by `%s`) to show in a client's file "
         "browser. `auto` expands to all directories which typically contain "
@@ -105,6 +155,12 @@ _OPTIONS = {
         "is controlled by and displayed on clients. By setting this to `1` "
         "the system's master volume is used instead - in that case the "
         "following options *may* need to get adusted."),
+    "master-volume-backend": ("auto", None,
+        "How to access the master volume. `shell` runs the following "
+        "commands. `amixer` keeps one `amixer` process running which is "
+        "faster and notices volume changes immediately. `alsa` uses the "
+        "Python module `alsaaudio`. `auto` uses `alsa` or `amixer` if the "
+        "following commands are unchanged, otherwise `shell`."),
     "master-volume-get-cmd": (r'amixer get Master | grep -E "\[[0-9]+%\]" | '
         'sed -re "s/^.*\[([0-9]+)%\].*$/\\1/"', None,
         "Command to get the master volume level in percent."),
@@ -147,6 +203,8 @@ class Config(object):
     currently used Config instance.
     
     """
+    WATCH_IVAL = 5 # seconds between 2 checks if the config file has changed
+    
     def __init__(self, player_name):
         """Create a new instance for the given player (adapter)."""
 
@@ -159,6 +217,16 @@ class Config(object):
         self.dir = join(user_config_dir, "remuco")
         self.cache = join(user_cache_dir, "remuco")
         self.file = join(self.dir, "remuco.cfg")
+        
+        # saving is deferred to idle time (see __save_later())
+        self.__saved = None # file content as last read or written
+        self.__sid_save = 0
+        self.__pending = {} # options set by getx() but not yet saved
+        
+        # config file watching (see watch())
+        self.__mtime = None
+        self.__sid_watch = 0
+        self.__watch_cb = None
 
         # remove old stuff
         self.__cleanup()
@@ -174,13 +242,50 @@ class Config(object):
             log.set_file(join(self.cache, "%s.log" % self.player))
 
         # load
+        self.__cp = self.__load()
+        
+        # parse once, standard options are plain attributes afterwards
+        self.__parse()
+        
+        # save to always have a clean file (only written if it changes)
+        self.__save_later()
+
+        log.set_level(self.log_level)
+        
+        log.info("remuco version: %s" % defs.REMUCO_VERSION)
+        
+    def __getattr__(self, attr):
+        """Attribute-style access to standard options by their original name.
+        
+        Standard options are set as attributes (with '-' replaced by '_') when
+        the config gets loaded, so this method only gets called for accesses
+        like getattr(config, 'log-level').
+        
+        """
+        if attr in _OPTIONS:
+            return getattr(self, attr.replace("-", "_"))
+        raise AttributeError(attr)
+    
+    def __load(self):
+        """Read the config file.
+        
+        @return: a sanitized config parser
+        
+        """
+        try:
+            self.__mtime = os.path.getmtime(self.file)
+        except OSError:
+            self.__mtime = None
+        
         cp = ConfigParser.RawConfigParser(_DEFAULTS, _odict)
         if not cp.has_section(self.player):
             cp.add_section(self.player)
         if exists(self.file):
             try:
-                cp.read(self.file)
-            except ConfigParser.Error, e:
+                with open(self.file) as fp:
+                    self.__saved = fp.read()
+                cp.readfp(StringIO(self.__saved), self.file)
+            except (IOError, ConfigParser.Error), e:
                 log.warning("failed to read config %s (%s)" % (self.file, e))
 
         # reset on version change
@@ -208,33 +313,84 @@ class Config(object):
         # update version
         cp.set(ConfigParser.DEFAULTSECT, "config-version", _CONFIG_VERSION)
 
-        self.__cp = cp
-        
-        # save to always have a clean file
-        self.__save()
-
-        log.set_level(self.log_level)
+        return cp
+    
+    def __parse(self):
+        """Parse all standard options and set them as attributes.
         
-        log.info("remuco version: %s" % defs.REMUCO_VERSION)
+        @return: list of names of the options whose values have changed
         
-    def __getattribute__(self, attr):
-        """Attribute-style access to standard options."""
+        """
+        changed = []
         
-        try:
-            return super(Config, self).__getattribute__(attr)
-        except AttributeError, e:
-            _attr = attr.replace("_", "-")
-            if _attr in _OPTIONS:
-                attr = _attr
-            elif attr not in _OPTIONS:
-                raise e
-            value = self.__cp.get(self.player, attr)
-            converter = _OPTIONS[attr][1] or (lambda v: v)
+        for key, (default, converter, doc) in _OPTIONS.items():
+            value = self.__cp.get(self.player, key)
+            converter = converter or (lambda v: v)
             try:
-                return converter(value)
+                value = converter(value)
             except Exception, e:
-                log.error("malformed option '%s: %s' (%s)" % (attr, e))
-                return converter(_DEFAULTS[attr])
+                log.error("malformed option '%s: %s' (%s)" % (key, value, e))
+                value = converter(default)
+            attr = key.replace("-", "_")
+            if attr not in self.__dict__ or self.__dict__[attr] != value:
+                changed.append(key)
+            setattr(self, attr, value)
+            
+        return changed
+    
+    def watch(self, callback):
+        """Reload the config automatically when its file changes.
+        
+        @param callback:
+            function to call after a reload, parameter is a list of names of
+            the standard options which have changed (e.g. 'fb-root-dirs')
+        
+        """
+        self.unwatch()
+        self.__watch_cb = callback
+        self.__sid_watch = gobject.timeout_add(Config.WATCH_IVAL * 1000,
+                                               self.__check_file)
+        
+    def unwatch(self):
+        """Stop watching the config file (see watch())."""
+        
+        if self.__sid_watch:
+            gobject.source_remove(self.__sid_watch)
+            self.__sid_watch = 0
+        self.__watch_cb = None
+    
+    def reload(self):
+        """Reload the config file.
+        
+        @return: list of names of the standard options which have changed
+        
+        """
+        self.flush() # do not lose options set by getx() but not yet saved
+        
+        self.__cp = self.__load()
+        changed = self.__parse()
+        
+        log.info("reloaded config, changed options: %s" % changed)
+        
+        if "log-level" in changed:
+            log.set_level(self.log_level)
+            
+        return changed
+        
+    def __check_file(self):
+        """Reload the config if its file has been modified by someone else."""
+        
+        try:
+            mtime = os.path.getmtime(self.file)
+        except OSError:
+            return True
+        
+        if mtime != self.__mtime:
+            changed = self.reload()
+            if changed and self.__watch_cb is not None:
+                self.__watch_cb(changed)
+                
+        return True
     
     def getx(self, key, default, converter=None, save=True):
         """Get the value of a non-standard, player specific option.
@@ -254,7 +410,8 @@ class Config(object):
         key = "x-%s" % key
         if not self.__cp.has_option(self.player, key) and save:
             self.__cp.set(self.player, key, default)
-            self.__save()
+            self.__pending[key] = default
+            self.__save_later()
         try:
             value = self.__cp.get(self.player, key)
         except ConfigParser.NoOptionError:
@@ -266,8 +423,56 @@ class Config(object):
             log.error("malformed option '%s: %s' (%s)" % (key, value, e))
             return converter(default) # if this fails then, it's a bug
 
+    def is_default(self, key):
+        """Check if a standard option has its default value.
+        
+        @param key:
+            config option name (e.g. 'master-volume-get-cmd')
+        
+        """
+        return self.__cp.get(self.player, key) == _OPTIONS[key][0]
+    
+    def flush(self):
+        """Save pending config changes now.
+        
+        Changes get saved automatically when the main loop is idle, so there
+        is usually no need to call this method. It is called by
+        PlayerAdapter.stop() to not lose changes on shutdown.
+        
+        """
+        if self.__sid_save:
+            gobject.source_remove(self.__sid_save)
+            self.__sid_save = 0
+            self.__save()
+    
+    def __save_later(self):
+        """Save config when the main loop is idle (coalesces multiple saves)."""
+        
+        if not self.__sid_save:
+            self.__sid_save = gobject.idle_add(self.__save_idle)
+    
+    def __save_idle(self):
+        
+        self.__sid_save = 0
+        self.__save()
+        
+        return False
+    
     def __save(self):
-        """Save config to it's file."""
+        """Save config to it's file (if it has changed).
+        
+        Other adapters may have saved their options meanwhile. To not drop
+        them, the file gets read again and only this instance's own changes
+        (options set by getx()) get merged in before writing.
+        
+        """
+        mtime = self.__mtime
+        cp = self.__load()
+        for key, value in self.__pending.items():
+            if not cp.has_option(self.player, key):
+                cp.set(self.player, key, value)
+        # changes made by others get applied by reload() (see watch())
+        outdated = self.__mtime != mtime
         
         doc = [_DOC_HEADER]
         for key in _DEFAULTS.keys():
@@ -277,13 +482,44 @@ class Config(object):
             doc.append(idoc)
         doc = "\n".join(doc)
         
+        buf = StringIO()
+        buf.write(doc)
+        buf.write("\n\n")
+        cp.write(buf)
+        content = buf.getvalue()
+        
+        if content == self.__saved:
+            self.__pending = {}
+            return
+        
+        # write to a temporary file and rename, so that other adapters never
+        # read a partially written file
+        tmp = None
         try:
-            with open(self.file, 'w') as fp:
-                fp.write(doc)
-                fp.write("\n\n")
-                self.__cp.write(fp)
-        except IOError, e:
+            fd, tmp = tempfile.mkstemp(dir=self.dir, prefix=".remuco.cfg.")
+            with os.fdopen(fd, 'w') as fp:
+                fp.write(content)
+            # keep the mode of the file (mkstemp() creates files with 0600)
+            try:
+                mode = stat.S_IMODE(os.stat(self.file).st_mode)
+            except OSError:
+                mode = 0644
+            os.chmod(tmp, mode)
+            try:
+                os.rename(tmp, self.file)
+            except OSError: # Windows does not replace existing files
+                os.remove(self.file)
+                os.rename(tmp, self.file)
+        except (IOError, OSError), e:
             log.warning("failed to save config to %s (%s)" % (self.file, e))
+            if tmp and exists(tmp):
+                os.remove(tmp)
+            return
+        
+        self.__saved = content
+        self.__pending = {}
+        if not outdated:
+            self.__mtime = os.path.getmtime(self.file)
 
     def __cleanup(self):
         """Trash obsolete config and cache data from older versions."""
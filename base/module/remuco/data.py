@@ -23,11 +23,13 @@
 """Data containers to send to and receive from clients."""
 
 import tempfile
+import time
 import Image
 import urlparse
 import urllib
 
 from remuco import log
+from remuco import metrics
 from remuco import serial
 
 # =============================================================================
@@ -112,6 +114,33 @@ class Progress(serial.Serializable):
     def get_data(self):
         return (self.progress, self.length)
 
+class ProgressAnchor(serial.Serializable):
+    """ Parameter of the progress anchor sync message sent to clients.
+    
+    Clients which support progress anchors (see ClientInfo) extrapolate the
+    playback progress on their own, starting at 'progress' (milli seconds)
+    when they receive an anchor and advancing at 'rate' (per mille of real
+    time, 0 if not playing). An anchor is sent only on seeks, playback and
+    item changes and if the extrapolated progress drifts too much.
+    
+    """
+    def __init__(self):
+        
+        self.progress = 0
+        self.length = 0
+        self.rate = 0
+        
+    def __str__(self):
+        return "(%dms/%d, %d)" % (self.progress, self.length, self.rate)
+        
+    # === serial interface ===
+        
+    def get_fmt(self):
+        return (serial.TYPE_I, serial.TYPE_I, serial.TYPE_I)
+        
+    def get_data(self):
+        return (self.progress, self.length, self.rate)
+
 class Item(serial.Serializable):
     """ Parameter of the item sync message sent to clients."""
     
@@ -164,6 +193,7 @@ class Item(serial.Serializable):
         if not img:
             return []
     
+        t0 = time.time()
         try:
             if not isinstance(img, Image.Image):
                 img = Image.open(img)
@@ -175,6 +205,7 @@ class Item(serial.Serializable):
             file_tmp.seek(0)
             thumb = file_tmp.read()
             file_tmp.close()
+            metrics.timing("thumbnail", img_type, time.time() - t0)
             return thumb
         except IOError, e:
             log.warning("failed to thumbnail %s (%s)" % (img, e))
@@ -248,6 +279,7 @@ class ClientInfo(serial.Serializable):
         self.img_type = None
         self.page_size = 0
         self.device = {}
+        self.progress_anchor = False # if client extrapolates progress
 
     # === serial interface ===
         
@@ -259,6 +291,7 @@ class ClientInfo(serial.Serializable):
         self.img_size, self.img_type, self.page_size, dev_keys, dev_vals = data
         for key, value in zip(dev_keys, dev_vals):
             self.device[key] = value
+        self.progress_anchor = self.device.get("progress-anchor") == "1"
 
 class Control(serial.Serializable):
     """ Parameter of control messages from clients with integer arguments."""
@@ -20,6 +20,7 @@
 #
 # =============================================================================
 
+import heapq
 import os
 import os.path
 import mimetypes
@@ -28,19 +29,164 @@ import sys
 from remuco import log
 from remuco.remos import media_dirs, user_home
 
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+        log.debug("scandir not available - file browser may be slow on large "
+                  "directories")
+
+def _ext_types(mime_types):
+    """Map file name extensions to mime types.
+    
+    @param mime_types:
+        list of mime types to consider (general types like 'audio' or specific
+        types like 'audio/mp3')
+    
+    @return: a dictionary mapping lower case file name extensions (including
+        the leading dot) to the mime types in 'mime_types'
+    
+    """
+    if not mimetypes.inited:
+        mimetypes.init()
+        
+    all = list(mimetypes.common_types.items()) + list(mimetypes.types_map.items())
+    
+    ext_types = {}
+    for ext, type in all:
+        if type in mime_types or type.split("/")[0] in mime_types:
+            ext_types[ext.lower()] = type
+            
+    return ext_types
+
+def _list_dir(dir, accept):
+    """List a directory.
+    
+    @param dir:
+        the directory to list
+    @param accept:
+        function to check by name if a file is of interest (files rejected by
+        this function do not require a stat call)
+    
+    @return: two lists, names of sub directories and names of accepted regular
+        files (symbolic links are resolved)
+    
+    """
+    dirs, files = [], []
+    
+    if scandir is not None:
+        # entry types come from the directory listing, no stat calls needed
+        # except for symbolic links
+        for entry in scandir(dir):
+            try:
+                if entry.is_dir():
+                    dirs.append(entry.name)
+                elif accept(entry.name) and entry.is_file():
+                    files.append(entry.name)
+            except OSError:
+                pass # broken link or similar
+    else:
+        for name in os.listdir(dir):
+            entry_abs = os.path.join(dir, name)
+            if accept(name) and os.path.isfile(entry_abs):
+                files.append(name)
+            elif os.path.isdir(entry_abs):
+                dirs.append(name)
+                
+    return dirs, files
+
+class _ListingCache(object):
+    """Bounded LRU cache for directory listings.
+    
+    Listings are validated against the modification time of the listed
+    directory, i.e. a cached listing gets dropped as soon as entries have been
+    added to, removed from or renamed within the directory.
+    
+    """
+    def __init__(self, size):
+        
+        self.__size = size
+        self.__listings = {} # dir -> (mtime, listing, time of last use)
+        self.__clock = 0 # counts uses, to tell the least recently used dir
+        
+        self.hits = 0
+        self.misses = 0
+        
+    def get(self, dir, mtime):
+        """Get a cached listing or None if there is no valid one."""
+        
+        cached = self.__listings.get(dir)
+        
+        if cached is None or cached[0] != mtime:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self.__clock += 1
+        self.__listings[dir] = (cached[0], cached[1], self.__clock)
+        
+        return cached[1]
+    
+    def has(self, dir, mtime):
+        """Check if there is a valid listing (does not count as a hit)."""
+        
+        cached = self.__listings.get(dir)
+        
+        return cached is not None and cached[0] == mtime
+    
+    def put(self, dir, mtime, listing):
+        
+        if self.__size <= 0:
+            return
+        
+        if dir not in self.__listings and len(self.__listings) >= self.__size:
+            # O(size), but only needed after listing a directory which is
+            # much more expensive anyway (cache hits are O(1))
+            listings = self.__listings
+            lru = min(listings, key=lambda d: listings[d][2])
+            del listings[lru]
+        
+        self.__clock += 1
+        self.__listings[dir] = (mtime, listing, self.__clock)
+
 class FileSystemLibrary(object):
     
-    def __init__(self, root_dirs, mime_types, show_extensions, show_hidden):
+    HEAD_MIN = 1000 # minimum number of entries for listing a directory's head
+    
+    def __init__(self, root_dirs, mime_types, show_extensions, show_hidden,
+                 cache_size=0):
+        """Create a new file system library.
+        
+        @param root_dirs:
+            list of directories to show as top level entries
+        @param mime_types:
+            list of mime types of files to show (None means show all files)
+        @param show_extensions:
+            if to show file name extensions
+        @param show_hidden:
+            if to show hidden files and directories
+        @keyword cache_size:
+            number of directory listings to cache (0 disables the cache)
+        
+        """
+        # accepted file name extensions (None means accept all files)
+        if mime_types:
+            self.__ext_types = _ext_types(mime_types)
+        else:
+            self.__ext_types = None
         
-        self.__mime_types = mime_types
         self.__show_extensions = show_extensions
         self.__show_hidden = show_hidden
+        self.__cache = _ListingCache(cache_size)
         
         if not sys.getfilesystemencoding() in ("UTF8", "UTF-8", "UTF_8"):
             log.warning("file system encoding is not UTF-8, this may cause " + 
                         "problems with file browser features")
         
-        root_dirs = root_dirs or []
+        root_dirs = list(root_dirs or []) # copy, will be modified
         
         # mimetype dependent root dirs
         if "auto" in root_dirs:
@@ -71,9 +217,6 @@ class FileSystemLibrary(object):
             self.__roots[name_x] = dir
             
         log.info("file browser root dirs: %s " % self.__roots)
-
-        if not mimetypes.inited:
-            mimetypes.init()
             
     def __trim_root_dirs(self, dirs):
         """Trim a directory list.
@@ -102,25 +245,166 @@ class FileSystemLibrary(object):
                 
         return trimmed
     
-    def get_level(self, path):
+    # === property: cache_hits ===
+    
+    def __pget_cache_hits(self):
+        """Number of directory listings served from the cache (read only)"""
+        return self.__cache.hits
+    
+    cache_hits = property(__pget_cache_hits, None, None,
+                          __pget_cache_hits.__doc__)
+    
+    # === property: cache_misses ===
+    
+    def __pget_cache_misses(self):
+        """Number of directory listings read from disk (read only)"""
+        return self.__cache.misses
+    
+    cache_misses = property(__pget_cache_misses, None, None,
+                            __pget_cache_misses.__doc__)
+    
+    # === property: root_dirs ===
+    
+    def __pget_root_dirs(self):
+        """List of the absolute paths of all root dirs (read only)"""
+        dirs = list(self.__roots.values())
+        dirs.sort()
+        return dirs
+    
+    root_dirs = property(__pget_root_dirs, None, None, __pget_root_dirs.__doc__)
+    
+    def get_mimetype(self, name):
+        """Get the mime type of a file by its name (None if unknown)."""
         
-        def is_hidden(name):
-            return name.startswith(".") or name.endswith("~")
+        if self.__ext_types is None:
+            return mimetypes.guess_type(name)[0]
         
-        def mimetype_is_supported(name):
-            type = mimetypes.guess_type(name)[0] or ""
-            type_main = type.split("/")[0]
-            return (not self.__mime_types or type_main in self.__mime_types or
-                    type in self.__mime_types)
+        return self.__ext_types.get(os.path.splitext(name)[1].lower())
+    
+    def get_level(self, path, raw=None):
+        """Get the content of a directory.
         
-        nested = []
-        ids = []
-        names = []
-
+        @param path:
+            path of the directory as a list, starting with a root dir label
+            (None or an empty list means the list of root dirs)
+        @keyword raw:
+            the raw listing returned by get_level_head() for the same path
+            (saves listing the directory again)
+        
+        @return: a tuple of sub directory names, absolute file names and
+            displayable file names
+        
+        @note: Access rights of the listed entries are not checked (that would
+            cost a system call per entry), use readable() on files before
+            using them.
+        
+        """
         if not path:
             nested = list(self.__roots.keys()) # Py3K
             nested.sort()
-            return (nested, ids, names)
+            return (nested, [], [])
+        
+        return self.list_dir(self.__path_to_dir(path), raw=raw)
+    
+    def get_level_head(self, path, limit):
+        """Get the beginning of a large directory's content.
+        
+        Only the first 'limit' entries (in the order used by get_level()) are
+        sorted and converted, which is much faster than doing so with all
+        entries of a large directory. The complete content can be retrieved
+        afterwards with get_level() (without listing the directory again if
+        the returned raw listing gets passed to get_level()).
+        
+        @param path:
+            see get_level()
+        @param limit:
+            number of entries to return
+        
+        @return: a tuple of sub directory names, absolute file names,
+            displayable file names, the number of all entries in the
+            directory and the raw listing of the directory (to pass to
+            get_level()) - or None if the directory
+            is small or already cached (get_level() is fast then)
+        
+        """
+        if not path:
+            return None
+        
+        dir = self.__path_to_dir(path)
+        
+        try:
+            mtime = os.stat(dir).st_mtime
+        except OSError:
+            return None
+        
+        if self.__cache.has(dir, mtime):
+            return None
+        
+        try:
+            dirs, files = self.__list_names(dir)
+        except OSError:
+            return None
+        
+        num = len(dirs) + len(files)
+        
+        if num < FileSystemLibrary.HEAD_MIN:
+            return None
+        
+        head_dirs = heapq.nsmallest(limit, dirs)
+        head_files = heapq.nsmallest(limit - len(head_dirs), files)
+        
+        nested, ids, names = self.__entries(dir, head_dirs, head_files)
+        
+        return (nested, ids, names, num, (dir, mtime, dirs, files))
+    
+    def list_dir(self, dir, cache=True, raw=None):
+        """Get the content of a directory given by its absolute path.
+        
+        @param dir:
+            absolute path of the directory
+        @keyword cache:
+            if to use (and fill) the listing cache
+        @keyword raw:
+            see get_level()
+        
+        @return: see get_level()
+        
+        """
+        if cache or raw:
+            try:
+                mtime = os.stat(dir).st_mtime
+            except OSError, e:
+                log.debug("failed to stat %s (%s)" % (dir, e))
+                return ([], [], [])
+            
+        if cache:
+            listing = self.__cache.get(dir, mtime)
+            if listing is not None:
+                return listing
+        
+        if raw and raw[0:2] == (dir, mtime):
+            dirs, files = raw[2:]
+        else:
+            try:
+                dirs, files = self.__list_names(dir)
+            except OSError, e:
+                log.debug("failed to list %s (%s)" % (dir, e))
+                return ([], [], [])
+        
+        dirs.sort()
+        files.sort()
+        
+        listing = self.__entries(dir, dirs, files)
+        
+        if cache:
+            self.__cache.put(dir, mtime, listing)
+            log.debug("file browser cache: %d hits, %d misses" %
+                      (self.__cache.hits, self.__cache.misses))
+
+        return listing
+    
+    def __path_to_dir(self, path):
+        """Convert a path as used by get_level() to an absolute path."""
         
         label = path[0] # root dir label
         dir = self.__roots[label] # root dir
@@ -128,54 +412,63 @@ class FileSystemLibrary(object):
         for elem in path:
             dir = os.path.join(dir, elem)
             
-        try:
-            x, dirs, files = os.walk(dir).next()
-        except StopIteration:
-            return (nested, ids, names)
+        return dir
+    
+    def __list_names(self, dir):
+        """List names of sub directories and files, filtered by name only."""
         
-        dirs.sort()
-        files.sort()
-              
-        for entry in dirs:
-            
-            entry_abs = os.path.join(dir, entry)
-            
-            if not self.__show_hidden and is_hidden(entry):
-                log.debug("ignore %s (hidden)" % entry_abs)
-                continue
-            
-            if not os.access(entry_abs, os.X_OK | os.R_OK):
-                log.debug("ignore %s (no access)" % entry_abs)
-                continue
-            
-            nested.append(entry)
-            
-        for entry in files:
+        def is_hidden(name):
+            return name.startswith(".") or name.endswith("~")
+        
+        ext_types = self.__ext_types
+        splitext = os.path.splitext
+        
+        def accept(name):
+            if not self.__show_hidden and is_hidden(name):
+                return False
+            return ext_types is None or splitext(name)[1].lower() in ext_types
+        
+        dirs, files = _list_dir(dir, accept)
+        
+        if not self.__show_hidden:
+            dirs = [d for d in dirs if not is_hidden(d)]
             
-            entry_abs = os.path.join(dir, entry)
+        return dirs, files
+    
+    def readable(self, files):
+        """Filter files by read access.
+        
+        @param files:
+            list of absolute file names (as returned by get_level())
+        
+        @return: the files in 'files' which are readable
+        
+        """
+        checked = []
+        
+        for file in files or []:
             
-            if not self.__show_hidden and is_hidden(entry):
-                log.debug("ignore %s (hidden)" % entry_abs)
-                continue
-
-            if not os.access(entry_abs, os.R_OK):
-                log.debug("ignore %s (no access)" % entry_abs)
+            if not os.access(file, os.R_OK):
+                log.debug("ignore %s (no access)" % file)
                 continue
             
-            if not os.path.isfile(entry_abs):
-                log.debug("ignore %s (no regular file)" % entry_abs)
-                continue
+            checked.append(file)
             
-            if not mimetype_is_supported(entry):
-                log.debug("ignore %s (wrong mime type)" % entry_abs)
-                continue
-                
-            ids.append(entry_abs)
-            if not self.__show_extensions:
-                entry = os.path.splitext(entry)[0]
-            names.append(entry)
-
-        return (nested, ids, names)
-    
-  
+        return checked
     
+    def __entries(self, dir, dirs, files):
+        """Convert sub directory and file names to a listing.
+        
+        @return: see get_level()
+        
+        """
+        join = os.path.join
+        ids = [join(dir, entry) for entry in files]
+        
+        if self.__show_extensions:
+            names = list(files)
+        else:
+            splitext = os.path.splitext
+            names = [splitext(entry)[0] for entry in files]
+        
+        return (list(dirs), ids, names)
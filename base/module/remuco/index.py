@@ -0,0 +1,267 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+
+"""Persistent index of the files shown in a client's file browser."""
+
+import os
+import os.path
+
+import gobject
+
+from remuco import log
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+    log.warning("sqlite3 not available - file index will be disabled")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, "
+    "mtime REAL)",
+    "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, dir TEXT, "
+    "key TEXT, name TEXT COLLATE NOCASE, mimetype TEXT)",
+    "CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent)",
+    "CREATE INDEX IF NOT EXISTS files_dir ON files (dir)",
+    "CREATE INDEX IF NOT EXISTS files_name ON files (name)",
+)
+
+def _like_escape(s):
+    """Escape wildcards in a LIKE pattern (escape character is '\\')."""
+    
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class FileIndex(object):
+    """Searchable index of the files in a FileSystemLibrary.
+    
+    The index is stored in an SQLite database. It gets updated incrementally
+    in the background (within the main loop, one directory at a time), i.e.
+    only directories which have changed since the last crawl get read again.
+    
+    """
+    
+    CRAWL_IVAL = 1800 # seconds between 2 crawls
+    COMMIT_EVERY = 50 # number of crawled dirs between 2 commits
+    RESULTS_MAX = 1000 # maximum number of search results
+    
+    def __init__(self, filelib, file):
+        """Create a new file index.
+        
+        @param filelib:
+            the FileSystemLibrary whose files to index
+        @param file:
+            file name of the index database
+        
+        """
+        self.__filelib = filelib
+        self.__file = file
+        self.__db = None
+        self.__todo = []
+        self.__seen = set() # real paths of dirs crawled so far
+        self.__crawled = 0
+        self.__sid_crawl = 0
+        self.__sid_ival = 0
+        
+        if sqlite3 is None:
+            return
+        
+        try:
+            self.__db = sqlite3.connect(file)
+            self.__db.text_factory = str # paths are byte strings
+            for stmt in _SCHEMA:
+                self.__db.execute(stmt)
+            self.__db.commit()
+        except sqlite3.Error, e:
+            log.error("failed to open file index %s (%s)" % (file, e))
+            self.__db = None
+            
+    def start(self):
+        """Start crawling periodically."""
+        
+        if self.__db is None or self.__sid_ival:
+            return
+        
+        self.__crawl()
+        self.__sid_ival = gobject.timeout_add(FileIndex.CRAWL_IVAL * 1000,
+                                              self.__crawl)
+        
+    def stop(self):
+        """Stop crawling (can be started again with start())."""
+        
+        for sid in (self.__sid_crawl, self.__sid_ival):
+            if sid:
+                gobject.source_remove(sid)
+        self.__sid_crawl = self.__sid_ival = 0
+        self.__todo = []
+        self.__seen = set()
+        
+        if self.__db is not None:
+            self.__db.commit()
+    
+    def search(self, words, prefix=False):
+        """Search the index for files.
+        
+        @param words:
+            list of search words - a file matches if all words are contained
+            (case insensitive) in its path relative to its root dir
+        @keyword prefix:
+            if True, a file matches if its name starts with the first word
+            (ignores the other words)
+        
+        @return: a tuple of absolute file names and displayable file names
+        
+        """
+        words = [w for w in words or [] if w]
+        
+        if self.__db is None or not words:
+            return ([], [])
+        
+        if prefix:
+            where = "name LIKE ? ESCAPE '\\'"
+            args = ["%s%%" % _like_escape(words[0])]
+        else:
+            where = " AND ".join(["key LIKE ? ESCAPE '\\'"] * len(words))
+            args = ["%%%s%%" % _like_escape(w) for w in words]
+        
+        sql = "SELECT path, name FROM files WHERE %s ORDER BY key LIMIT %d" % (
+                where, FileIndex.RESULTS_MAX)
+        
+        try:
+            rows = self.__db.execute(sql, args).fetchall()
+        except sqlite3.Error, e:
+            log.warning("file index search failed (%s)" % e)
+            return ([], [])
+        
+        return ([r[0] for r in rows], [r[1] for r in rows])
+        
+    def __crawl(self):
+        """Start a new crawl (if there is none in progress)."""
+        
+        if self.__sid_crawl:
+            return True
+        
+        roots = self.__filelib.root_dirs
+        
+        # forget dirs which are no longer root dirs
+        try:
+            for (path,) in self.__db.execute("SELECT path FROM dirs WHERE "
+                                             "parent IS NULL").fetchall():
+                if path not in roots:
+                    self.__remove(path)
+        except sqlite3.Error, e:
+            log.error("failed to update file index (%s)" % e)
+            return True
+        
+        log.debug("start crawling %s" % roots)
+        
+        self.__todo = [(dir, None, dir) for dir in roots]
+        self.__seen = set()
+        self.__crawled = 0
+        self.__sid_crawl = gobject.idle_add(self.__crawl_step,
+                                            priority=gobject.PRIORITY_LOW)
+        
+        return True
+    
+    def __crawl_step(self):
+        """Crawl the next directory."""
+        
+        if not self.__todo:
+            self.__db.commit()
+            log.debug("crawling done (%d dirs)" % self.__crawled)
+            self.__sid_crawl = 0
+            return False
+        
+        dir, parent, root = self.__todo.pop()
+        
+        try:
+            self.__update(dir, parent, root)
+        except sqlite3.Error, e:
+            log.error("failed to update file index (%s)" % e)
+            self.__todo = []
+        
+        self.__crawled += 1
+        if self.__crawled % FileIndex.COMMIT_EVERY == 0:
+            self.__db.commit()
+            
+        return True
+    
+    def __update(self, dir, parent, root):
+        """Update the index for a single directory."""
+        
+        db = self.__db
+        
+        try:
+            mtime = os.stat(dir).st_mtime
+        except OSError:
+            self.__remove(dir)
+            return
+        
+        # symbolic links may point to dirs already crawled or even form loops
+        real = os.path.realpath(dir)
+        if real in self.__seen:
+            log.debug("ignore %s (already crawled as %s)" % (dir, real))
+            self.__remove(dir)
+            return
+        self.__seen.add(real)
+        
+        known = [r[0] for r in db.execute("SELECT path FROM dirs "
+                                          "WHERE parent = ?", (dir,))]
+        
+        row = db.execute("SELECT mtime FROM dirs WHERE path = ?",
+                         (dir,)).fetchone()
+        
+        if row is not None and row[0] == mtime:
+            # unchanged, but sub dirs may have changed
+            self.__todo.extend([(sub, dir, root) for sub in known])
+            return
+        
+        nested, ids, names = self.__filelib.list_dir(dir, cache=False)
+        
+        db.execute("DELETE FROM files WHERE dir = ?", (dir,))
+        rows = []
+        for path, name in zip(ids, names):
+            key = path[len(root):].lstrip(os.sep)
+            rows.append((path, dir, key, name,
+                         self.__filelib.get_mimetype(path)))
+        db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                       rows)
+        db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)",
+                   (dir, parent, mtime))
+        
+        subs = [os.path.join(dir, name) for name in nested]
+        for sub in known:
+            if sub not in subs:
+                self.__remove(sub)
+        
+        self.__todo.extend([(sub, dir, root) for sub in subs])
+        
+    def __remove(self, dir):
+        """Remove a directory and everything below from the index."""
+        
+        below = "%s%s" % (dir, os.sep)
+        n = len(below)
+        
+        self.__db.execute("DELETE FROM files WHERE dir = ? OR "
+                          "substr(dir, 1, ?) = ?", (dir, n, below))
+        self.__db.execute("DELETE FROM dirs WHERE path = ? OR "
+                          "substr(path, 1, ?) = ?", (dir, n, below))
@@ -21,12 +21,100 @@
 # =============================================================================
 
 import logging
+import logging.handlers
+import os.path
+import Queue
+import threading
 
 DEBUG = logging.DEBUG
 INFO = logging.INFO
 WARNING = logging.WARNING
 ERROR = logging.ERROR
 
+#===============================================================================
+# queued file handler
+#===============================================================================
+
+class _QueueHandler(logging.Handler):
+    """Log handler which writes to a size limited file in a separate thread.
+    
+    Records are put into a bounded queue and written by a background thread,
+    so logging never blocks the main loop on file I/O. If the queue is full
+    (e.g. because of very slow storage), records get dropped and the number
+    of dropped records is logged later.
+    
+    The log file rotates when it exceeds a given size. An existing log file
+    from a previous run gets rotated initially.
+    
+    The writer thread only runs while the main loop waits for events if
+    gobject.threads_init() has been called before (PlayerAdapter does this).
+    
+    """
+    def __init__(self, file, max_bytes, backup_count, queue_size):
+        
+        logging.Handler.__init__(self)
+        
+        self.__target = logging.handlers.RotatingFileHandler(file, 'a',
+            max_bytes, backup_count)
+        if os.path.getsize(file) > 0:
+            self.__target.doRollover()
+        
+        self.__queue = Queue.Queue(queue_size)
+        self.__dropped = 0
+        self.__dropped_lock = threading.Lock()
+        
+        self.__thread = threading.Thread(target=self.__write)
+        self.__thread.setDaemon(True)
+        self.__thread.start()
+        
+    def setFormatter(self, fmt):
+        
+        logging.Handler.setFormatter(self, fmt)
+        self.__target.setFormatter(fmt)
+    
+    def emit(self, record):
+        
+        # format arguments now, they may change until the record gets written
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        
+        try:
+            self.__queue.put_nowait(record)
+        except Queue.Full:
+            self.__dropped_lock.acquire()
+            self.__dropped += 1
+            self.__dropped_lock.release()
+            
+    def close(self):
+        """Write pending records and stop the writer thread."""
+        
+        if self.__thread.isAlive():
+            self.__queue.put(None)
+            self.__thread.join(5)
+        self.__target.close()
+        logging.Handler.close(self)
+        
+    def __write(self):
+        
+        while True:
+            record = self.__queue.get()
+            if record is None:
+                break
+            self.__dropped_lock.acquire()
+            dropped, self.__dropped = self.__dropped, 0
+            self.__dropped_lock.release()
+            if dropped:
+                self.__target.emit(logging.makeLogRecord({
+                    "name": record.name, "levelno": WARNING,
+                    "levelname": "WARNING", "created": record.created,
+                    "filename": "log.py", "lineno": 0,
+                    "msg": "log queue full, dropped %d records" % dropped}))
+            self.__target.emit(record)
+        
 #===============================================================================
 # set up default logger
 #===============================================================================
@@ -39,6 +127,10 @@ class _config:
     FMTX = logging.Formatter("%(levelname)s: %(message)s (check the log for "
                              "details)")
     
+    FILE_MAX_BYTES = 1024 * 1024 # rotate log file if it gets bigger
+    FILE_BACKUPS = 2 # number of rotated log files to keep
+    QUEUE_SIZE = 10000 # maximum number of log records not yet written
+    
     handler_stdout = logging.StreamHandler()
     handler_stdout.setFormatter(FMT)
     handler = handler_stdout
@@ -46,17 +138,31 @@ class _config:
     logga = logging.getLogger("remuco")
     logga.addHandler(handler)
     logga.setLevel(INFO)
+    
+    debug = False # shortcut for is_debug()
 
 #===============================================================================
 # log functions
 #===============================================================================
 
+# Log functions accept format arguments like the functions of the module
+# 'logging', e.g. debug("got %s", x). On hot paths, prefer this over
+# debug("got %s" % x) - the message then only gets formatted if it is logged.
+
 debug = _config.logga.debug
 info = _config.logga.info
 warning = _config.logga.warning
 error = _config.logga.error
 exception = _config.logga.exception
 
+def is_debug():
+    """Check if debug messages get logged.
+    
+    Use this to skip preparing the arguments of expensive debug messages.
+    
+    """
+    return _config.debug
+
 #===============================================================================
 # configuration functions
 #===============================================================================
@@ -67,8 +173,9 @@ def set_file(file):
     new_handler = None
     if file is not None:
         try:
-            new_handler = logging.FileHandler(file, 'w')
-        except IOError, e:
+            new_handler = _QueueHandler(file, _config.FILE_MAX_BYTES,
+                _config.FILE_BACKUPS, _config.QUEUE_SIZE)
+        except (IOError, OSError), e:
             print("failed to set up log handler (%s)" % e)
             return
         new_handler.setFormatter(_config.FMT)
@@ -78,6 +185,7 @@ def set_file(file):
     
     if _config.handler != _config.handler_stdout:
         _config.logga.removeHandler(_config.handler)
+        _config.handler.close()
     if new_handler:
         _config.handler_stdout.setLevel(ERROR)
         _config.handler_stdout.setFormatter(_config.FMTX)
@@ -92,6 +200,7 @@ def set_level(level):
     """ Set log level (one of log.DEBUG, log.INFO, log.WARNING, log.ERROR)."""
     
     _config.logga.setLevel(level)
+    _config.debug = level <= DEBUG
     
     if _config.handler is not None:
         _config.handler.setLevel(level) 
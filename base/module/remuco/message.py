@@ -42,6 +42,7 @@ _SYNC = 200
 SYNC_STATE = _SYNC
 SYNC_PROGRESS = _SYNC  + 1
 SYNC_ITEM = _SYNC  + 2
+SYNC_PROGRESS_ANCHOR = _SYNC  + 3
 
 # =============================================================================
 # control messages
@@ -111,3 +112,10 @@ def is_request(id):
 def is_private(id):
     return _is_in_range(_PRIV, id)
 
+def name(id):
+    """Get the name of a message ID (e.g. 'SYNC_ITEM')."""
+    return _NAMES.get(id) or str(id)
+
+_NAMES = dict([(v, k) for k, v in globals().items()
+               if k.isupper() and not k.startswith("_")])
+
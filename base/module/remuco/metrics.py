@@ -0,0 +1,240 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+
+"""Counters, gauges and timings of a running player adapter.
+
+Metrics get collected all the time, recording a value is a cheap dictionary
+update. Each metric has a name (e.g. 'msg-in') and is broken down by a key
+(e.g. a message name or a client address).
+
+Collected metrics can be dumped to a JSON file periodically (see the config
+options 'metrics-...') and, if D-Bus is available, queried with the D-Bus
+method GetMetrics() of the object DBUS_PATH at the bus name DBUS_NAME.PLAYER:
+
+    dbus-send --session --print-reply --dest=net.sourceforge.remuco.mpd \\
+        /net/sourceforge/remuco/Metrics \\
+        net.sourceforge.remuco.Metrics.GetMetrics
+
+"""
+
+import os
+import tempfile
+import time
+
+try:
+    import json
+except ImportError:
+    try:
+        import simplejson as json
+    except ImportError:
+        json = None
+
+from remuco import log
+
+try:
+    import dbus
+    import dbus.service
+    from dbus.mainloop.glib import DBusGMainLoop
+except ImportError:
+    dbus = None
+
+# =============================================================================
+# constants
+# =============================================================================
+
+DBUS_NAME = "net.sourceforge.remuco"
+DBUS_PATH = "/net/sourceforge/remuco/Metrics"
+DBUS_IFACE = "net.sourceforge.remuco.Metrics"
+
+# =============================================================================
+# recording metrics
+# =============================================================================
+
+_counters = {} # name -> key -> count
+_gauges = {} # name -> key -> [current value, maximum value]
+_timings = {} # name -> key -> [count, total seconds, maximum seconds]
+_since = time.time()
+
+def count(name, key, n=1):
+    """Increase a counter.
+    
+    @param name: metric name (e.g. 'msg-in')
+    @param key: what is counted (e.g. a message name)
+    @keyword n: number to add to the counter
+    
+    """
+    try:
+        table = _counters[name]
+    except KeyError:
+        table = _counters[name] = {}
+    table[key] = table.get(key, 0) + n
+    
+def gauge(name, key, value):
+    """Set the current value of a gauge (its maximum is kept too)."""
+    
+    try:
+        table = _gauges[name]
+    except KeyError:
+        table = _gauges[name] = {}
+    entry = table.get(key)
+    if entry is None:
+        table[key] = [value, value]
+    else:
+        entry[0] = value
+        if value > entry[1]:
+            entry[1] = value
+        
+def timing(name, key, seconds):
+    """Record the duration of an operation.
+    
+    @param name: metric name (e.g. 'serialize')
+    @param key: what has been timed (e.g. a class name)
+    @param seconds: duration of the operation
+    
+    """
+    try:
+        table = _timings[name]
+    except KeyError:
+        table = _timings[name] = {}
+    entry = table.get(key)
+    if entry is None:
+        table[key] = [1, seconds, seconds]
+    else:
+        entry[0] += 1
+        entry[1] += seconds
+        if seconds > entry[2]:
+            entry[2] = seconds
+
+def reset():
+    """Forget all recorded metrics."""
+    
+    global _since
+    
+    _counters.clear()
+    _gauges.clear()
+    _timings.clear()
+    _since = time.time()
+
+# =============================================================================
+# reporting metrics
+# =============================================================================
+
+def snapshot():
+    """Get all recorded metrics.
+    
+    @return: a dictionary with the keys 'since' (time when recording started),
+        'counters', 'gauges' (values are dictionaries with keys 'now' and
+        'max') and 'timings' (values are dictionaries with keys 'count' and
+        'avg', 'max', 'total' in milli seconds), each mapping metric names to
+        dictionaries mapping keys (as strings) to values
+    
+    """
+    counters, gauges, timings = {}, {}, {}
+    
+    for name, table in _counters.items():
+        counters[name] = dict([(str(k), v) for k, v in table.items()])
+    
+    for name, table in _gauges.items():
+        gauges[name] = dict([(str(k), {"now": v[0], "max": v[1]})
+                             for k, v in table.items()])
+        
+    for name, table in _timings.items():
+        timings[name] = dict([(str(k), {"count": v[0],
+                                        "avg": v[1] * 1000 / v[0],
+                                        "max": v[2] * 1000,
+                                        "total": v[1] * 1000})
+                              for k, v in table.items()])
+        
+    return {"since": _since, "counters": counters, "gauges": gauges,
+            "timings": timings}
+    
+def dumps():
+    """Get all recorded metrics as a string (JSON if possible)."""
+    
+    if json is not None:
+        return json.dumps(snapshot(), indent=1, sort_keys=True)
+    else:
+        return repr(snapshot())
+
+def dump(file):
+    """Write all recorded metrics to a file (see dumps())."""
+    
+    dir = os.path.dirname(file)
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(dir=dir, prefix=".metrics.")
+        fp = os.fdopen(fd, 'w')
+        try:
+            fp.write(dumps())
+        finally:
+            fp.close()
+        try:
+            os.rename(tmp, file)
+        except OSError: # Windows does not replace existing files
+            os.remove(file)
+            os.rename(tmp, file)
+    except (IOError, OSError), e:
+        log.warning("failed to write metrics to %s (%s)" % (file, e))
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+
+# =============================================================================
+# D-Bus access
+# =============================================================================
+
+if dbus is not None:
+    
+    class _DBusMetrics(dbus.service.Object):
+        
+        @dbus.service.method(DBUS_IFACE, in_signature="", out_signature="s")
+        def GetMetrics(self):
+            return dumps()
+
+def export(player):
+    """Make metrics available via D-Bus.
+    
+    @param player: canonical player name, used in the bus name
+    
+    @return: an object to pass to unexport() or None if D-Bus is not available
+    
+    """
+    if dbus is None:
+        return None
+    
+    try:
+        bus = dbus.SessionBus(mainloop=DBusGMainLoop())
+        name = dbus.service.BusName("%s.%s" % (DBUS_NAME,
+                                               player.replace("-", "_")), bus)
+        return (name, _DBusMetrics(name, DBUS_PATH))
+    except dbus.DBusException, e:
+        log.warning("failed to export metrics on D-Bus (%s)" % e)
+        return None
+    
+def unexport(exported):
+    """Remove metrics from D-Bus (see export())."""
+    
+    if exported is None:
+        return
+    
+    name, obj = exported
+    obj.remove_from_connection()
@@ -21,12 +21,14 @@
 # =============================================================================
 
 import os.path
+import time
 
 import gobject
 
 from remuco.adapter import PlayerAdapter, ItemAction
 from remuco.defs import *
 from remuco import log
+from remuco import metrics
 
 try:
     import dbus
@@ -52,6 +54,9 @@ STATUS_STOPPED = 2
 
 MINFO_KEY_RATING = "rating"
 
+# max number of GetMetadata() calls in flight when filling the tracklist cache
+TRACKLIST_CALLS = 8
+
 # =============================================================================
 # actions
 # =============================================================================
@@ -118,6 +123,9 @@ class MPRISAdapter(PlayerAdapter):
         self.__can_prev = False
         self.__can_tracklist = False
         
+        self.__tl_generation = 0 # to detect replies for an outdated cache
+        self.__tl_reset()
+        
         log.debug("init done")
 
     def start(self):
@@ -172,6 +180,8 @@ class MPRISAdapter(PlayerAdapter):
         self._mp_p = None
         self._mp_t = None
         
+        self.__tl_reset()
+        
     def poll(self):
         
         self._poll_volume()
@@ -296,6 +306,8 @@ class MPRISAdapter(PlayerAdapter):
         
         if action_id == IA_REMOVE.id:
             
+            self.__tl_invalidate(None)
+            
             positions.sort()
             positions.reverse()
             try:
@@ -322,9 +334,10 @@ class MPRISAdapter(PlayerAdapter):
             reply.send()
             return
         
-        # TODO: very slow for SongBird, should be async
-        tracks = self.__get_tracklist()
-
+        self.__tl_get(lambda tracks: self.__reply_playlist(reply, tracks))
+        
+    def __reply_playlist(self, reply, tracks):
+        
         for track in tracks:
             id, info = self.__track2info(track)
             artist = info.get(INFO_ARTIST, "???")
@@ -380,9 +393,9 @@ class MPRISAdapter(PlayerAdapter):
     
         img = track.get("arturl")
         if not img or not img.startswith("file:"):
-            img = self.find_image(id)
-    
-        self.update_item(id, info, img)
+            self.find_image_async(id, id, info)
+        else:
+            self.update_item(id, info, img)
         
         try:
             self._mp_t.GetCurrentTrack(reply_handler=self._notify_position,
@@ -414,7 +427,14 @@ class MPRISAdapter(PlayerAdapter):
         
     def _notify_tracklist_change(self, new_len):
         
-        log.debug("tracklist change")
+        log.debug("tracklist change (%d tracks)", new_len)
+        
+        if self.__tl_tracks is not None and new_len > len(self.__tl_tracks):
+            # tracks have been appended, keep the known ones
+            self.__tl_append(new_len)
+        else:
+            self.__tl_invalidate(new_len)
+        
         try:
             self._mp_t.GetCurrentTrack(reply_handler=self._notify_position,
                                        error_handler=self._dbus_error)
@@ -450,28 +470,136 @@ class MPRISAdapter(PlayerAdapter):
     # internal methods (private) 
     # =========================================================================
     
-    def __get_tracklist(self):
-        """Get a list of track dicts of all tracks in the tracklist."""
+    def __tl_reset(self):
+        """Clear the tracklist cache.
+        
+        Replies to calls still in flight get ignored.
+        
+        """
+        self.__tl_tracks = None # track dicts, None for tracks not yet known
+        self.__tl_length = None # tracklist length, None if unknown
+        self.__tl_next = 0 # index of the next track to get
+        self.__tl_calls = 0 # number of calls in flight
+        self.__tl_generation += 1
+        self.__tl_waiting = [] # functions waiting for the complete tracklist
+        self.__tl_t0 = 0
+        
+    def __tl_invalidate(self, length):
+        """Drop cached tracks (replies of pending calls get ignored).
+        
+        @param length:
+            the new tracklist length, if known (otherwise None)
+        
+        """
+        self.__tl_tracks = None
+        self.__tl_length = length
+        self.__tl_next = 0
+        self.__tl_calls = 0
+        self.__tl_generation += 1
+        
+        if self.__tl_waiting:
+            self.__tl_fill()
+        
+    def __tl_append(self, length):
+        """Extend the cache with unknown tracks at the end."""
+        
+        self.__tl_tracks.extend([None] * (length - len(self.__tl_tracks)))
+        self.__tl_length = length
+        
+        if self.__tl_waiting:
+            self.__tl_fill()
+    
+    def __tl_get(self, fn):
+        """Pass the list of all tracks to 'fn', once it is available.
+        
+        The tracklist gets cached. If it is not (completely) cached yet, it
+        gets filled asynchronously and 'fn' gets called later.
+        
+        """
+        self.__tl_waiting.append(fn)
         
+        self.__tl_fill()
+        
+    def __tl_fill(self):
+        """Continue filling the tracklist cache."""
+        
+        if self._mp_t is None:
+            return
+        
+        if self.__tl_length is None:
+            if self.__tl_calls == 0:
+                self.__tl_call(self._mp_t.GetLength, self.__tl_length_reply)
+            return
+        
+        if self.__tl_tracks is None:
+            self.__tl_tracks = [None] * self.__tl_length
+            self.__tl_t0 = time.time()
+        
+        while (self.__tl_next < len(self.__tl_tracks) and
+               self.__tl_calls < TRACKLIST_CALLS):
+            index = self.__tl_next
+            self.__tl_next += 1
+            if self.__tl_tracks[index] is None:
+                self.__tl_call(self._mp_t.GetMetadata, self.__tl_track_reply,
+                               index)
+            
+        if self.__tl_calls == 0 and self.__tl_next >= len(self.__tl_tracks):
+            self.__tl_complete()
+            
+    def __tl_call(self, method, reply_fn, *args):
+        """Call a tracklist method asynchronously."""
+        
+        generation = self.__tl_generation
+        
+        def reply(result):
+            if generation == self.__tl_generation:
+                self.__tl_calls -= 1
+                reply_fn(result, *args)
+                
+        def error(e):
+            log.warning("dbus error: %s" % e)
+            if generation == self.__tl_generation:
+                self.__tl_calls -= 1
+                reply_fn(None, *args)
+        
+        handlers = {"reply_handler": reply, "error_handler": error}
+        
+        self.__tl_calls += 1
         try:
-            length = self._mp_t.GetLength()
+            method(*args, **handlers)
         except DBusException, e:
-            log.warning("dbus error: %s" % e)
-            length = 0
+            gobject.idle_add(error, e) # no recursion if all calls fail
         
-        if length == 0:
-            return []
+    def __tl_length_reply(self, length):
         
-        tracks = []
-        for i in range(0, length):
-            try:
-                tracks.append(self._mp_t.GetMetadata(i))
-            except DBusException, e:
-                log.warning("dbus error: %s" % e)
-                return []
+        self.__tl_length = length or 0
+        self.__tl_fill()
+        
+    def __tl_track_reply(self, track, index):
+        
+        if track is not None: # on errors leave the track unknown
+            self.__tl_tracks[index] = track
+        self.__tl_fill()
+        
+    def __tl_complete(self):
+        """Pass the complete tracklist to waiting functions."""
+        
+        if self.__tl_t0:
+            metrics.timing("mpris", "tracklist", time.time() - self.__tl_t0)
+            self.__tl_t0 = 0
+        
+        tracks = self.__tl_tracks
+        if None in tracks:
+            # some calls failed, retry them on the next request
+            self.__tl_next = 0
+            tracks = [track or {} for track in tracks]
+        
+        waiting = self.__tl_waiting
+        self.__tl_waiting = []
+        
+        for fn in waiting:
+            fn(tracks)
             
-        return tracks
-
     def __track2info(self, track):
         """Convert an MPRIS meta data dict to a Remuco info dict."""
         
@@ -497,7 +625,9 @@ class MPRISAdapter(PlayerAdapter):
         behaves not as expected on dynamic playlists.
         
         """
-        tracks = self.__get_tracklist()
+        self.__tl_get(lambda tracks: self.__jump_to_tracks(position, tracks))
+        
+    def __jump_to_tracks(self, position, tracks):
         
         if position >= len(tracks):
             return
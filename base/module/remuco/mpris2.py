@@ -0,0 +1,695 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+"""Base class for player adapters of players supporting MPRIS 2.
+
+MPRIS 2 players push state changes with the D-Bus signal PropertiesChanged,
+so in contrast to MPRISAdapter (MPRIS 1) there is nothing to poll. The
+playback progress is extrapolated locally, based on the signal Seeked and on
+occasional position queries (on item and playback changes). Tracklist meta
+data is fetched in one call for all tracks and cached.
+
+"""
+
+import os.path
+import time
+import urllib
+import urlparse
+
+import gobject
+
+from remuco.adapter import PlayerAdapter, ItemAction
+from remuco.defs import *
+from remuco import log
+from remuco import metrics
+
+try:
+    import dbus
+    from dbus.exceptions import DBusException
+except ImportError:
+    log.warning("dbus not available - MPRIS based player adapters will crash")
+    
+# =============================================================================
+# MPRIS 2 constants
+# =============================================================================
+
+PATH = "/org/mpris/MediaPlayer2"
+PATH_NO_TRACK = "/org/mpris/MediaPlayer2/TrackList/NoTrack"
+
+IFACE_ROOT = "org.mpris.MediaPlayer2"
+IFACE_PLAYER = "org.mpris.MediaPlayer2.Player"
+IFACE_TRACKLIST = "org.mpris.MediaPlayer2.TrackList"
+IFACE_PROPERTIES = "org.freedesktop.DBus.Properties"
+
+STATUS_PLAYING = "Playing"
+STATUS_PAUSED = "Paused"
+STATUS_STOPPED = "Stopped"
+
+LOOP_NONE = "None"
+LOOP_PLAYLIST = "Playlist"
+
+SEEK = 5000000 # micro seconds
+
+# =============================================================================
+# actions
+# =============================================================================
+
+IA_APPEND = ItemAction("Append", multiple=True)
+IA_APPEND_PLAY = ItemAction("Append and play", multiple=True)
+FILE_ACTIONS = (IA_APPEND, IA_APPEND_PLAY)
+
+IA_JUMP = ItemAction("Jump to")
+IA_REMOVE = ItemAction("Remove", multiple=True)
+PLAYLIST_ACTIONS = (IA_JUMP, IA_REMOVE)
+
+# =============================================================================
+# player adapter
+# =============================================================================
+
+class MPRIS2Adapter(PlayerAdapter):
+    """Base class for player adapters of MPRIS 2 players.
+    
+    For players which implement MPRIS 2 properly, a complete player adapter
+    is not more than this:
+    
+        class FooAdapter(remuco.MPRIS2Adapter):
+            def __init__(self):
+                remuco.MPRIS2Adapter.__init__(self, "foo", "Foo",
+                    mime_types=remuco.MIMETYPES_AUDIO)
+        
+        pa = FooAdapter()
+        mg = remuco.Manager(pa, dbus_name="org.mpris.MediaPlayer2.foo")
+        mg.run()
+    
+    The first argument is the player's MPRIS 2 name, i.e. the last element
+    of its D-Bus bus name. Player quirks can be fixed by overriding the
+    methods starting with '_notify' or '_poll'.
+    
+    """
+    def __init__(self, name, display_name=None, poll=2.5, mime_types=None,
+                 rating=False, extra_file_actions=None,
+                 extra_playlist_actions=None):
+        
+        display_name = display_name or name
+            
+        if rating:
+            max_rating = 5
+        else:
+            max_rating = 0
+        
+        all_file_actions = FILE_ACTIONS + tuple(extra_file_actions or ())
+            
+        PlayerAdapter.__init__(self, display_name,
+                               max_rating=max_rating,
+                               playback_known=True,
+                               volume_known=True,
+                               repeat_known=True,
+                               shuffle_known=True,
+                               progress_known=True,
+                               poll=poll,
+                               file_actions=all_file_actions,
+                               mime_types=mime_types)
+        
+        self.__playlist_actions = PLAYLIST_ACTIONS + \
+                                  tuple(extra_playlist_actions or ())
+         
+        self.__name = name
+        
+        self.__dbus_signal_handler = ()
+        self._mp_p = None
+        self._mp_t = None
+        self._mp_props = None
+        
+        self._repeat = False
+        self._shuffle = False
+        self._playing = PLAYBACK_STOP
+        self.__volume = 0
+        self.__can = {} # capabilities (property name -> bool)
+        self.__has_tracklist = False
+        
+        self.__track_id = None
+        self.__length = 0 # micro seconds
+        
+        # progress extrapolation: progress is '__position' (micro seconds)
+        # at '__position_time' plus the time since then (if playing)
+        self.__position = 0
+        self.__position_time = 0
+        self.__rate = 1.0
+        
+        self.__tracks = [] # track ids of the tracklist
+        self.__metadata = {} # track id -> meta data
+        self.__tl_waiting = [] # functions waiting for tracklist meta data
+        self.__tl_fetching = False
+        self.__tl_queries = 0 # queries of 'Tracks' in flight
+        
+        log.debug("init done")
+
+    def start(self):
+        
+        PlayerAdapter.start(self)
+        
+        try:
+            bus = dbus.SessionBus()
+            proxy = bus.get_object("org.mpris.MediaPlayer2.%s" % self.__name,
+                                   PATH)
+            self._mp_p = dbus.Interface(proxy, IFACE_PLAYER)
+            self._mp_t = dbus.Interface(proxy, IFACE_TRACKLIST)
+            self._mp_props = dbus.Interface(proxy, IFACE_PROPERTIES)
+        except DBusException, e:
+            raise StandardError("dbus error: %s" % e)
+
+        try:
+            self.__dbus_signal_handler = (
+                self._mp_props.connect_to_signal("PropertiesChanged",
+                                                 self._notify_properties),
+                self._mp_p.connect_to_signal("Seeked", self._notify_seeked),
+                self._mp_t.connect_to_signal("TrackListReplaced",
+                                             self._notify_tracklist_replaced),
+                self._mp_t.connect_to_signal("TrackAdded",
+                                             self._notify_track_added),
+                self._mp_t.connect_to_signal("TrackRemoved",
+                                             self._notify_track_removed),
+                self._mp_t.connect_to_signal("TrackMetadataChanged",
+                                             self._notify_track_changed),
+            )
+        except DBusException, e:
+            raise StandardError("dbus error: %s" % e)
+
+        try:
+            self._mp_props.GetAll(IFACE_PLAYER,
+                reply_handler=lambda props: self._notify_properties(
+                    IFACE_PLAYER, props, []),
+                error_handler=self._dbus_error)
+            self._mp_props.Get(IFACE_ROOT, "HasTrackList",
+                               reply_handler=self.__notify_has_tracklist,
+                               error_handler=self._dbus_error)
+        except DBusException, e:
+            # this is not necessarily a fatal error
+            log.warning("dbus error: %s" % e)
+        
+    def stop(self):
+        
+        PlayerAdapter.stop(self)
+        
+        for handler in self.__dbus_signal_handler:
+            handler.remove()
+            
+        self.__dbus_signal_handler = ()
+        
+        self._mp_p = None
+        self._mp_t = None
+        self._mp_props = None
+        
+        self.__tracks = []
+        self.__metadata = {}
+        self.__tl_waiting = []
+        self.__tl_fetching = False
+        self.__tl_queries = 0
+        
+    def poll(self):
+        
+        if self.__dbus_signal_handler:
+            # changes get signaled and clients extrapolate the progress on
+            # their own, so there is nothing to poll (stops polling)
+            raise NotImplementedError
+        
+        # no D-Bus calls, just the extrapolated progress
+        self.update_progress(self.__progress() // 1000000,
+                             self.__length // 1000000)
+        
+    # =========================================================================
+    # control interface 
+    # =========================================================================
+    
+    def ctrl_toggle_playing(self):
+        
+        self.__call(self._mp_p, "PlayPause")
+    
+    def ctrl_toggle_repeat(self):
+        
+        loop = self._repeat and LOOP_NONE or LOOP_PLAYLIST
+        self.__set(IFACE_PLAYER, "LoopStatus", loop)
+    
+    def ctrl_toggle_shuffle(self):
+        
+        self.__set(IFACE_PLAYER, "Shuffle", dbus.Boolean(not self._shuffle))
+        
+    def ctrl_next(self):
+        
+        if not self.__can.get("CanGoNext", True):
+            log.debug("go to next item is currently not possible")
+            return
+        
+        self.__call(self._mp_p, "Next")
+    
+    def ctrl_previous(self):
+
+        if not self.__can.get("CanGoPrevious", True):
+            log.debug("go to previous is currently not possible")
+            return
+        
+        self.__call(self._mp_p, "Previous")
+        
+    def ctrl_volume(self, direction):
+        
+        if direction == 0:
+            volume = 0
+        else:
+            volume = self.__volume + 5 * direction
+            volume = min(volume, 100)
+            volume = max(volume, 0)
+            
+        self.__set(IFACE_PLAYER, "Volume", dbus.Double(volume / 100.0))
+        
+    def ctrl_seek(self, direction):
+        
+        if not self.__can.get("CanSeek", True):
+            log.debug("seeking is currently not possible")
+            return
+        
+        # the player confirms with the signal Seeked
+        self.__call(self._mp_p, "Seek", dbus.Int64(SEEK * direction))
+
+    # =========================================================================
+    # actions interface
+    # =========================================================================
+    
+    def action_files(self, action_id, files, uris):
+        
+        if action_id == IA_APPEND.id or action_id == IA_APPEND_PLAY.id:
+            
+            play = action_id == IA_APPEND_PLAY.id
+            
+            if not uris:
+                return
+            
+            if not self.__has_tracklist:
+                if not play:
+                    log.warning("player has no tracklist, cannot append")
+                    return
+                if len(uris) > 1:
+                    log.info("player has no tracklist, play only %s" % uris[0])
+                self.__call(self._mp_p, "OpenUri", uris[0])
+                return
+            
+            after = self.__tracks and self.__tracks[-1] or PATH_NO_TRACK
+            
+            # tracks get added in reverse order after the current last track
+            for i in reversed(range(len(uris))):
+                self.__call(self._mp_t, "AddTrack", uris[i],
+                            dbus.ObjectPath(after), play and i == 0)
+        
+        else:
+            log.error("** BUG ** unexpected action: %d" % action_id)
+
+    def action_playlist_item(self, action_id, positions, ids):
+        
+        if action_id == IA_REMOVE.id:
+            
+            for id in ids:
+                self.__call(self._mp_t, "RemoveTrack", dbus.ObjectPath(id))
+        
+        elif action_id == IA_JUMP.id:
+            
+            self.__call(self._mp_t, "GoTo", dbus.ObjectPath(ids[0]))
+        
+        else:
+            log.error("** BUG ** unexpected action: %d" % action_id)
+    
+    # =========================================================================
+    # request interface 
+    # =========================================================================
+    
+    def request_playlist(self, reply):
+        
+        if not self.__has_tracklist:
+            reply.send()
+            return
+        
+        self.__tl_get(lambda: self.__reply_playlist(reply))
+        
+    def __reply_playlist(self, reply):
+        
+        for id in self.__tracks:
+            info = self.__meta2info(self.__metadata.get(id, {}))[1]
+            artist = info.get(INFO_ARTIST) or "???"
+            title = info.get(INFO_TITLE) or "???"
+            reply.ids.append(id)
+            reply.names.append("%s - %s" % (artist, title))
+        
+        reply.item_actions = self.__playlist_actions
+        
+        reply.send()
+
+    # =========================================================================
+    # internal methods (may be overridden by subclasses to fix MPRIS issues) 
+    # =========================================================================
+    
+    def _poll_position(self):
+        """Get the playback position from the player.
+        
+        The position is not signaled by PropertiesChanged, so it must be
+        asked for to correct the extrapolated progress. This is done when
+        items or the playback status change and not periodically.
+        
+        """
+        if self._mp_props is None:
+            return
+        
+        try:
+            self._mp_props.Get(IFACE_PLAYER, "Position",
+                               reply_handler=self._notify_seeked,
+                               error_handler=self._dbus_error)
+        except DBusException, e:
+            log.warning("dbus error: %s" % e)
+            
+    def _notify_properties(self, iface, changed, invalidated):
+        
+        log.debug("properties of %s changed: %s", iface, changed)
+        
+        if iface == IFACE_TRACKLIST:
+            if "Tracks" in changed:
+                self._notify_tracklist_replaced(changed["Tracks"], None)
+            elif "Tracks" in invalidated: # the usual case for 'Tracks'
+                self.__tl_query()
+            return
+        
+        if iface != IFACE_PLAYER:
+            return
+        
+        for key, value in changed.items():
+            if key.startswith("Can"):
+                self.__can[key] = bool(value)
+        
+        if "Rate" in changed:
+            self.__set_position(self.__progress())
+            self.__rate = float(changed["Rate"]) or 1.0
+        
+        if "PlaybackStatus" in changed:
+            self._notify_status(changed["PlaybackStatus"])
+        
+        if "LoopStatus" in changed:
+            self._repeat = changed["LoopStatus"] != LOOP_NONE
+            self.update_repeat(self._repeat)
+            
+        if "Shuffle" in changed:
+            self._shuffle = bool(changed["Shuffle"])
+            self.update_shuffle(self._shuffle)
+        
+        if "Volume" in changed:
+            self.__volume = int(round(float(changed["Volume"]) * 100))
+            self.update_volume(self.__volume)
+            
+        if "Metadata" in changed:
+            self._notify_track(changed["Metadata"])
+            
+        if "Position" in changed: # only on GetAll()
+            self._notify_seeked(changed["Position"])
+    
+    def _notify_status(self, status):
+        
+        log.debug("status: %s", status)
+        
+        # freeze or continue progress extrapolation
+        self.__set_position(self.__progress())
+        
+        if status == STATUS_PLAYING:
+            self._playing = PLAYBACK_PLAY
+        elif status == STATUS_PAUSED:
+            self._playing = PLAYBACK_PAUSE
+        elif status == STATUS_STOPPED:
+            self._playing = PLAYBACK_STOP
+            self.__set_position(0)
+        else:
+            log.warning("unknown play state (%s), assume playing)" % status)
+            self._playing = PLAYBACK_PLAY
+            
+        self.update_playback(self._playing)
+        
+        self._poll_position()
+        
+    def _notify_track(self, meta):
+        
+        log.debug("track: %s", meta)
+        
+        track_id = meta.get("mpris:trackid")
+        
+        id, info = self.__meta2info(meta)
+        
+        self.__length = int(meta.get("mpris:length", 0))
+        
+        if track_id != self.__track_id:
+            self.__track_id = track_id
+            self.__set_position(0)
+            self._poll_position()
+    
+        img = meta.get("mpris:artUrl")
+        if not img or not img.startswith("file:"):
+            self.find_image_async(id, id, info)
+        else:
+            self.update_item(id, info, img)
+            
+        self.__update_position()
+        
+    def _notify_seeked(self, position):
+        
+        log.debug("position: %d", position)
+        
+        self.__set_position(int(position))
+        
+        self.update_progress(self.__progress() // 1000000,
+                             self.__length // 1000000)
+            
+    def _notify_tracklist_replaced(self, tracks, current):
+        
+        self.__tracks = [str(id) for id in tracks]
+        
+        # keep meta data of tracks still in the list
+        self.__metadata = dict([(id, self.__metadata[id])
+                                for id in self.__tracks
+                                if id in self.__metadata])
+        
+        self.__update_position()
+        
+    def _notify_track_added(self, meta, after):
+        
+        id = str(meta.get("mpris:trackid", ""))
+        if not id:
+            return
+        
+        after = str(after)
+        if after in self.__tracks:
+            self.__tracks.insert(self.__tracks.index(after) + 1, id)
+        else:
+            self.__tracks.insert(0, id)
+            
+        self.__metadata[id] = meta
+        
+        self.__update_position()
+        
+    def _notify_track_removed(self, id):
+        
+        id = str(id)
+        if id in self.__tracks:
+            self.__tracks.remove(id)
+        self.__metadata.pop(id, None)
+        
+        self.__update_position()
+        
+    def _notify_track_changed(self, id, meta):
+        
+        id = str(id)
+        if id in self.__tracks:
+            self.__metadata[id] = meta
+            
+    def __notify_has_tracklist(self, has_tracklist):
+        
+        self.__has_tracklist = bool(has_tracklist)
+        
+        if self.__has_tracklist:
+            self.__tl_query()
+    
+    # =========================================================================
+    # internal methods (private) 
+    # =========================================================================
+    
+    def __tl_query(self):
+        """Get the track IDs of the tracklist.
+        
+        Meta data of tracks which are still listed is kept. Functions waiting
+        for the tracklist get called once the query is done.
+        
+        """
+        def reply(tracks):
+            self.__tl_queries = max(0, self.__tl_queries - 1)
+            self._notify_tracklist_replaced(tracks, None)
+            self.__tl_fetch()
+            
+        def error(e):
+            self.__tl_queries = max(0, self.__tl_queries - 1)
+            self._dbus_error(e)
+            self.__tl_fetch()
+        
+        self.__tl_queries += 1
+        try:
+            self._mp_props.Get(IFACE_TRACKLIST, "Tracks",
+                               reply_handler=reply, error_handler=error)
+        except DBusException, e:
+            gobject.idle_add(error, e)
+    
+    def __progress(self):
+        """Get the (extrapolated) playback progress in micro seconds."""
+        
+        progress = self.__position
+        
+        if self._playing == PLAYBACK_PLAY:
+            progress += (time.time() - self.__position_time) * self.__rate * \
+                        1000000
+            
+        if self.__length > 0:
+            progress = min(progress, self.__length)
+        
+        return max(0, int(progress))
+    
+    def __set_position(self, position):
+        
+        self.__position = position
+        self.__position_time = time.time()
+    
+    def __update_position(self):
+        
+        if self.__track_id is not None and self.__track_id in self.__tracks:
+            self.update_position(self.__tracks.index(self.__track_id))
+    
+    def __tl_get(self, fn):
+        """Call 'fn' once meta data of all tracks in the tracklist is known.
+        
+        Missing meta data is fetched with one call of GetTracksMetadata().
+        
+        """
+        self.__tl_waiting.append(fn)
+        
+        self.__tl_fetch()
+        
+    def __tl_fetch(self):
+        """Fetch missing meta data for functions waiting for the tracklist."""
+        
+        if self.__tl_fetching or self.__tl_queries or not self.__tl_waiting:
+            return
+        
+        missing = [id for id in self.__tracks if id not in self.__metadata]
+        
+        if not missing or self._mp_t is None:
+            self.__tl_complete()
+            return
+        
+        self.__tl_fetching = True
+        t0 = time.time()
+        
+        def reply(metas):
+            metrics.timing("mpris", "tracklist", time.time() - t0)
+            for meta in metas:
+                id = str(meta.get("mpris:trackid", ""))
+                self.__metadata[id] = meta
+            self.__tl_complete()
+            
+        def error(e):
+            self._dbus_error(e)
+            self.__tl_complete()
+        
+        try:
+            self._mp_t.GetTracksMetadata(
+                [dbus.ObjectPath(id) for id in missing],
+                reply_handler=reply, error_handler=error)
+        except DBusException, e:
+            gobject.idle_add(error, e)
+            
+    def __tl_complete(self):
+        
+        self.__tl_fetching = False
+        
+        waiting = self.__tl_waiting
+        self.__tl_waiting = []
+        
+        for fn in waiting:
+            fn()
+    
+    def __meta2info(self, meta):
+        """Convert an MPRIS 2 meta data dict to a Remuco ID and info dict."""
+        
+        def text(key):
+            value = meta.get(key, "")
+            if isinstance(value, (list, tuple)): # e.g. artists
+                value = ", ".join(value)
+            return value
+        
+        id = meta.get("xesam:url") or str(meta.get("mpris:trackid", "None"))
+        
+        info = {}
+        title_alt = urlparse.urlparse(id)[2]
+        title_alt = urllib.unquote(os.path.basename(title_alt))
+        title_alt = os.path.splitext(title_alt)[0]
+        info[INFO_TITLE] = text("xesam:title") or title_alt
+        info[INFO_ARTIST] = text("xesam:artist")
+        info[INFO_ALBUM] = text("xesam:album")
+        info[INFO_GENRE] = text("xesam:genre")
+        info[INFO_YEAR] = text("xesam:contentCreated")[:4]
+        info[INFO_LENGTH] = int(meta.get("mpris:length", 0)) // 1000000
+        info[INFO_RATING] = int(round(meta.get("xesam:userRating", 0) * 5))
+        
+        return (id, info)
+    
+    def __call(self, iface, method, *args):
+        """Call a method asynchronously, ignore the result."""
+        
+        if iface is None:
+            return
+        
+        handlers = {"reply_handler": self._dbus_ignore,
+                    "error_handler": self._dbus_error}
+        
+        try:
+            getattr(iface, method)(*args, **handlers)
+        except DBusException, e:
+            log.warning("dbus error: %s" % e)
+    
+    def __set(self, iface, property, value):
+        """Set a property asynchronously."""
+        
+        self.__call(self._mp_props, "Set", iface, property, value)
+        
+    # =========================================================================
+    # dbus reply handler (may be reused by subclasses) 
+    # =========================================================================
+    
+    def _dbus_error(self, error):
+        """ DBus error handler."""
+        
+        if self._mp_p is None:
+            return # do not log errors when not stopped already
+        
+        log.warning("DBus error: %s" % error)
+        
+    def _dbus_ignore(self, *args):
+        """ DBus reply handler for methods without reply."""
+        
+        pass
@@ -29,6 +29,7 @@ import gobject
 
 from remuco import log
 from remuco import message
+from remuco import metrics
 from remuco import report
 from remuco import serial
 from remuco.data import ClientInfo
@@ -91,6 +92,8 @@ class ClientConnection(object):
         self.__pinfo_msg = pinfo_msg
         self.__msg_handler_fn = msg_handler_fn
         self.__conn_type = c_type
+        # key by host, not by the (changing) port of reconnecting clients
+        self.__metrics_key = str(addr[0])
         
         # client info
         self.info = ClientInfo()
@@ -113,7 +116,7 @@ class ClientConnection(object):
             ]
         self.__sid_out = 0
         
-        log.debug("send 'hello' to %s" % self)
+        log.debug("send 'hello' to %s", self)
         
         self.send(ClientConnection.IO_HELLO)
     
@@ -121,6 +124,14 @@ class ClientConnection(object):
         
         return str(self.__addr)
     
+    # === property: sleeping ===
+    
+    def __pget_sleeping(self):
+        """True if the client is in power save mode (read-only)."""
+        return self.__psave
+    
+    sleeping = property(__pget_sleeping, None, None, __pget_sleeping.__doc__)
+    
     #==========================================================================
     # io
     #==========================================================================
@@ -134,7 +145,7 @@ class ClientConnection(object):
         """
        
         try:
-            log.debug("try to receive %d bytes" % rcv_buff.rest)
+            log.debug("try to receive %d bytes", rcv_buff.rest)
             data = self.__sock.recv(rcv_buff.rest)
         except socket.timeout, e: # TODO: needed?
             log.warning("connection to %s broken (%s)" % (self, e))
@@ -147,7 +158,9 @@ class ClientConnection(object):
         
         received = len(data)
         
-        log.debug("received %d bytes" % received)
+        log.debug("received %d bytes", received)
+        
+        metrics.count("bytes-in", self.__metrics_key, received)
         
         if received == 0:
             log.warning("connection to %s broken (no data)" % self)
@@ -163,7 +176,7 @@ class ClientConnection(object):
     def __io_recv(self, fd, cond):
         """ GObject callback function (when there is data to receive). """
         
-        log.debug("data from client %s available" % self)
+        log.debug("data from client %s available", self)
 
         # --- init buffers on new message -------------------------------------
 
@@ -191,7 +204,7 @@ class ClientConnection(object):
                 log.warning("msg from %s too big (%d bytes)" % (self, size))
                 self.disconnect()
                 return False
-            log.debug("incoming msg: %d, %dB" % (id, size))
+            log.debug("incoming msg: %d, %dB", id, size)
             self.__rcv_buff_data.rest = size
             self.__rcv_msg_id, self.__rcv_msg_size = id, size
             if size > 0:
@@ -211,6 +224,8 @@ class ClientConnection(object):
             
         msg_id = self.__rcv_msg_id
         msg_data = self.__rcv_buff_data.data
+        
+        metrics.count("msg-in", message.name(msg_id))
 
         log.debug("incoming msg ")
         
@@ -230,7 +245,7 @@ class ClientConnection(object):
             
         elif msg_id == message.CONN_CINFO:
             
-            log.debug("received client info from %s" % self)
+            log.debug("received client info from %s", self)
             
             serial.unpack(self.info, msg_data)
             
@@ -242,7 +257,7 @@ class ClientConnection(object):
                 
                 self.__clients.append(self)
                 
-                log.debug("sending player info to %s" % self)
+                log.debug("sending player info to %s", self)
                 
                 self.send(self.__pinfo_msg)
                 
@@ -273,7 +288,7 @@ class ClientConnection(object):
             self.__sid_out = 0
             return False
 
-        log.debug("try to send %d bytes to %s" % (len(self.__snd_buff), self))
+        log.debug("try to send %d bytes to %s", len(self.__snd_buff), self)
 
         try:
             sent = self.__sock.send(self.__snd_buff)
@@ -282,7 +297,9 @@ class ClientConnection(object):
             self.disconnect()
             return False
 
-        log.debug("sent %d bytes" % sent)
+        log.debug("sent %d bytes", sent)
+        
+        metrics.count("bytes-out", self.__metrics_key, sent)
         
         if sent == 0:
             log.warning("failed to send data to %s" % self)
@@ -313,15 +330,20 @@ class ClientConnection(object):
             return
         
         if self.__sock is None:
-            log.debug("cannot send message to %s, already disconnected" % self)
+            log.debug("cannot send message to %s, already disconnected", self)
             return
 
         if self.__psave:
-            log.debug("%s is in sleep mode, send nothing" % self)
+            log.debug("%s is in sleep mode, send nothing", self)
             return
 
         self.__snd_buff = "%s%s" % (self.__snd_buff, msg)
         
+        if msg != ClientConnection.IO_HELLO:
+            id, = struct.unpack("!h", msg[:2])
+            metrics.count("msg-out", message.name(id))
+        metrics.gauge("send-buffer", self.__metrics_key, len(self.__snd_buff))
+        
         # if not already trying to send data ..
         if self.__sid_out == 0:
             # .. do it when it is possible:
@@ -360,7 +382,7 @@ class ClientConnection(object):
         
         # disconnect
         
-        log.debug("disconnect %s" % self)
+        log.debug("disconnect %s", self)
         
         if remove_from_list and self in self.__clients:
             self.__clients.remove(self)
@@ -0,0 +1,194 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+
+"""Opt-in profiling of a player adapter.
+
+Profiling is enabled by the config option 'profile-enabled' or by the
+environment variable REMUCO_PROFILE. When enabled, hot methods of the
+adapter (message handling, client synchronization, polling and requests)
+get wrapped with timing hooks which record their durations as metrics with
+the name 'profile' (see remuco.metrics).
+
+Additionally a sampling profiler can be toggled by sending SIGUSR1 to the
+adapter process. It periodically samples the stack of the main thread and,
+when toggled off (or when the adapter stops), writes the samples to the
+file PLAYER-TIMESTAMP.stacks in the cache dir. The file contains one line
+per distinct stack ('outer;...;inner COUNT'), which is the input format of
+flame graph tools like 'flamegraph.pl'. If REMUCO_PROFILE is set to
+'sample', sampling starts immediately.
+
+"""
+
+import functools
+import os.path
+import signal
+import sys
+import thread
+import threading
+import time
+
+from remuco import log
+from remuco import metrics
+
+# =============================================================================
+# constants
+# =============================================================================
+
+SAMPLE_IVAL = 0.01 # seconds between 2 samples
+
+# adapter methods to wrap with timing hooks (private ones without prefix)
+_HOOKS = ("__handle_message", "__sync_state", "__sync_progress",
+          "__sync_anchor", "__sync_item", "poll", "request_playlist",
+          "request_queue", "request_mlib", "request_search")
+
+# =============================================================================
+# timing hooks
+# =============================================================================
+
+def _hook(name, fn):
+    """Wrap a function to record its duration as a metric."""
+    
+    @functools.wraps(fn)
+    def hook(*args, **kwargs):
+        t0 = time.time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            metrics.timing("profile", name, time.time() - t0)
+            
+    return hook
+
+# =============================================================================
+# sampling profiler
+# =============================================================================
+
+class _Sampler(threading.Thread):
+    """Thread which samples the stack of another thread."""
+    
+    def __init__(self, thread_id, file):
+        
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        
+        self.__thread_id = thread_id
+        self.__file = file
+        self.__stacks = {}
+        self.__stopped = False
+        
+    def run(self):
+        
+        while not self.__stopped:
+            frame = sys._current_frames().get(self.__thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append("%s:%s" % (os.path.basename(code.co_filename),
+                                        code.co_name))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                stack = ";".join(stack)
+                self.__stacks[stack] = self.__stacks.get(stack, 0) + 1
+            del frame
+            time.sleep(SAMPLE_IVAL)
+            
+    def finish(self):
+        """Stop sampling and write the samples to the file."""
+        
+        self.__stopped = True
+        self.join()
+        
+        try:
+            fp = open(self.__file, "w")
+            try:
+                for stack, count in sorted(self.__stacks.items()):
+                    fp.write("%s %d\n" % (stack, count))
+            finally:
+                fp.close()
+        except IOError, e:
+            log.warning("failed to write profile (%s)" % e)
+        else:
+            log.info("wrote profile to %s" % self.__file)
+
+class _Profiler(object):
+    
+    def __init__(self, adapter):
+        
+        self.__dir = adapter.config.cache
+        self.__player = adapter.config.player
+        self.__thread_id = thread.get_ident()
+        self.__sampler = None
+        
+        for name in _HOOKS:
+            attr = name
+            if name.startswith("__"):
+                attr = "_PlayerAdapter%s" % name
+            fn = getattr(adapter, attr, None)
+            if fn is not None:
+                setattr(adapter, attr, _hook(name.lstrip("_"), fn))
+        
+        signal.signal(signal.SIGUSR1, self.__sighandler)
+        
+    def __sighandler(self, signum, frame):
+        
+        self.toggle()
+        
+    def toggle(self):
+        """Start or stop the sampling profiler."""
+        
+        if self.__sampler is None:
+            log.info("start sampling profiler")
+            file = os.path.join(self.__dir, "%s-%s.stacks" %
+                                (self.__player, time.strftime("%Y%m%d-%H%M%S")))
+            self.__sampler = _Sampler(self.__thread_id, file)
+            self.__sampler.start()
+        else:
+            log.info("stop sampling profiler")
+            self.__sampler.finish()
+            self.__sampler = None
+            
+    def stop(self):
+        """Stop the sampling profiler, if it is running."""
+        
+        if self.__sampler is not None:
+            self.toggle()
+        
+def setup(adapter, sample=False):
+    """Enable profiling of a player adapter.
+    
+    Must be called from within the main thread.
+    
+    @param adapter: the PlayerAdapter to profile
+    @keyword sample: start the sampling profiler immediately
+    
+    @return: a profiler object, call its stop() method when the adapter stops
+    
+    """
+    log.info("profiling enabled, send SIGUSR1 to toggle the sampling profiler")
+    
+    profiler = _Profiler(adapter)
+    
+    if sample:
+        profiler.toggle()
+    
+    return profiler
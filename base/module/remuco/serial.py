@@ -23,8 +23,10 @@
 import inspect
 import struct
 import array
+import time
 
 from remuco import log
+from remuco import metrics
 
 TYPE_Y = 1
 TYPE_I = 2
@@ -124,27 +126,29 @@ class Bin:
         
     def read_array_boolean(self):
         
-        return self.__read_array(self.read_boolean)
+        return [y != 0 for y in self.__read_array_fixed('b', 1)]
 
     def read_array_byte(self):
         
-        return self.__read_array(self.read_byte)
+        return self.__read_array_fixed('b', 1)
 
     def read_array_short(self):
         
-        return self.__read_array(self.read_short)
+        return self.__read_array_fixed('h', 2)
     
     def read_array_int(self):
         
-        return self.__read_array(self.read_int)
+        return self.__read_array_fixed('i', 4)
     
     def read_array_long(self):
         
-        return self.__read_array(self.read_long)
+        return self.__read_array_fixed('q', 8)
     
     def read_array_string(self):
         
-        return self.__read_array(self.read_string)
+        num = self.__read_array_len(2) # empty strings have 2 bytes
+        
+        return [self.read_string() for i in xrange(num)]
             
     def __read_string(self):
         """ Read a string as it is, i.e. without any codec conversion. """
@@ -154,17 +158,35 @@ class Bin:
         self.__off += l
         return s
         
-    def __read_array(self, fn_read_element):
+    def __read_array_len(self, min_size):
+        """ Read and validate the number of elements of an array.
+        
+        The number of elements is read from the data and may be a lie, so it
+        must not exceed what the remaining data can hold (with elements of at
+        least 'min_size' bytes). Otherwise a small malformed message could
+        trigger a huge allocation or loop.
+        
+        @raise struct.error: if the number of elements is invalid
         
+        """
         num = self.read_int()
         
-        a = []
+        if num < 0 or num * min_size > len(self.__data) - self.__off:
+            raise struct.error("invalid array length %d (%d bytes left)" %
+                               (num, len(self.__data) - self.__off))
         
-        for i in range(num):
-            
-            a.append(fn_read_element())
-            
-        return a
+        return num
+    
+    def __read_array_fixed(self, code, size):
+        """ Read an array of elements with a fixed size at once. """
+        
+        num = self.__read_array_len(size)
+        
+        a = struct.unpack_from('!%d%s' % (num, code), self.__data,
+                               offset=self.__off)
+        self.__off += num * size
+        
+        return list(a)
     
     def get_unused_data(self):
         
@@ -231,8 +253,9 @@ class Bin:
                 s = str(s)
         
         elif Bin.HOST_ENCODING not in Bin.NET_ENCODING_ALT:
-            log.debug("convert '%s' from %s to %s" %
-                      (s, Bin.HOST_ENCODING, Bin.NET_ENCODING))
+            if log.is_debug():
+                log.debug("convert '%s' from %s to %s", s, Bin.HOST_ENCODING,
+                          Bin.NET_ENCODING)
             try:
                 s = unicode(s, Bin.HOST_ENCODING).encode(Bin.NET_ENCODING)
             except UnicodeDecodeError, e:
@@ -323,6 +346,8 @@ class Serializable(object):
     
 def pack(serializable):
 
+    t0 = time.time()
+    
     fmt = serializable.get_fmt()
     
     data = serializable.get_data()
@@ -401,6 +426,9 @@ def pack(serializable):
         
         return None
     
+    metrics.timing("serialize", serializable.__class__.__name__,
+                   time.time() - t0)
+    
     return bin.get_buff()
 
 def unpack(serializable, bytes):
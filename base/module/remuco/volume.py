@@ -0,0 +1,485 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+
+"""Master volume backends.
+
+By default a player adapter controls and displays the volume of a player. If
+the config option 'master-volume-enabled' is set, the system's master volume
+is used instead. This module provides the mixers to access the master volume.
+
+All mixers report the volume (in percent) by calling a callback function.
+Mixers which can observe volume changes (see Mixer.push) report changes on
+their own, all other mixers need to get polled with Mixer.poll().
+
+"""
+
+import commands
+import os
+import re
+import subprocess
+import time
+
+import gobject
+
+from remuco import log
+
+try:
+    import alsaaudio
+except ImportError:
+    alsaaudio = None
+
+# =============================================================================
+# constants
+# =============================================================================
+
+BACKENDS = ("auto", "shell", "amixer", "alsa")
+
+CONTROL = "Master" # mixer control used by session based mixers
+
+STEP = 5 # volume step in percent used by session based mixers
+
+# commands used by the shell mixer
+_CMD_OPTIONS = ("master-volume-get-cmd", "master-volume-up-cmd",
+                "master-volume-down-cmd", "master-volume-mute-cmd")
+
+# =============================================================================
+# mixers
+# =============================================================================
+
+class Mixer(object):
+    """Base class for master volume mixers."""
+    
+    push = False # if the mixer reports volume changes without being polled
+    
+    def __init__(self, callback):
+        """Create a new mixer.
+        
+        @param callback:
+            function to call with the current volume (in percent) as parameter
+        
+        """
+        self._callback = callback
+        
+    def start(self):
+        """Start the mixer.
+        
+        @raise OSError: if the mixer is not usable
+        
+        """
+        pass
+    
+    def stop(self):
+        """Stop the mixer."""
+        pass
+    
+    def poll(self):
+        """Get the current volume and report it to the callback."""
+        pass
+    
+    def up(self):
+        raise NotImplementedError
+    
+    def down(self):
+        raise NotImplementedError
+    
+    def mute(self):
+        raise NotImplementedError
+    
+class ShellMixer(Mixer):
+    """Mixer which runs the master-volume-... commands from the config.
+    
+    Each poll and each volume change spawns a shell. This is the fallback if
+    no other mixer is usable or if the commands have been customized.
+    
+    """
+    def __init__(self, callback, config):
+        
+        super(ShellMixer, self).__init__(callback)
+        
+        self.__config = config
+        
+    def poll(self):
+        
+        cmd = "sh -c '%s'" % self.__config.master_volume_get_cmd
+        ret, out = commands.getstatusoutput(cmd)
+        if ret != os.EX_OK:
+            log.error("master-volume-get failed: '%s'" % out)
+            return
+        try:
+            volume = int(out)
+            if volume < 0 or volume > 100:
+                raise ValueError
+        except ValueError:
+            log.error("output of master-volume-get malformed: '%s'" % out)
+            return
+        
+        self._callback(volume)
+        
+    def up(self):
+        self.__run(self.__config.master_volume_up_cmd)
+        
+    def down(self):
+        self.__run(self.__config.master_volume_down_cmd)
+        
+    def mute(self):
+        self.__run(self.__config.master_volume_mute_cmd)
+    
+    def __run(self, cmd):
+        
+        ret, out = commands.getstatusoutput("sh -c '%s'" % cmd)
+        if ret != os.EX_OK:
+            log.error("master-volume-... failed: %s" % out)
+        else:
+            gobject.idle_add(self.__poll_idle)
+            
+    def __poll_idle(self):
+        
+        self.poll()
+        
+        return False
+    
+class AmixerMixer(Mixer):
+    """Mixer which talks to one long-lived 'amixer -s' process.
+    
+    Volume changes are observed with an 'amixer events' process, so there is
+    no need to poll.
+    
+    If one of the amixer processes dies, both get restarted after a delay,
+    which doubles on each failure until the processes have been running for a
+    while again.
+    
+    """
+    push = True
+    
+    _RESTART_DELAY_MIN = 1000 # ms
+    _RESTART_DELAY_MAX = 60000 # ms
+    _STABLE = 60 # seconds processes must run to reset the restart delay
+    
+    # first channel of a control, e.g. '  Mono: Playback 57 [89%] [on]'
+    _RX_VOLUME = re.compile(r'^\s*(?:Mono|Front Left): Playback .*?\[(\d+)%\]')
+    
+    def __init__(self, callback, control=CONTROL):
+        
+        super(AmixerMixer, self).__init__(callback)
+        
+        self.__control = control
+        self.__session = None
+        self.__events = None
+        self.__sids = []
+        self.__buf = ""
+        self.__sid_get = 0
+        self.__sid_restart = 0
+        self.__restart_delay = self._RESTART_DELAY_MIN
+        self.__started = 0
+        
+    def start(self):
+        
+        self.__started = time.time()
+        
+        try:
+            self.__session = subprocess.Popen(["amixer", "-s"], bufsize=0,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT, close_fds=True)
+            self.__events = subprocess.Popen(["amixer", "events"], bufsize=0,
+                stdout=subprocess.PIPE, stderr=open(os.devnull, "w"),
+                close_fds=True)
+        except OSError:
+            self.__shutdown() # do not leak a process started already
+            raise
+        
+        cond = gobject.IO_IN | gobject.IO_HUP | gobject.IO_ERR
+        self.__sids = [
+            gobject.io_add_watch(self.__session.stdout, cond, self.__on_output),
+            gobject.io_add_watch(self.__events.stdout, cond, self.__on_event)]
+        
+        self.poll()
+        
+    def stop(self):
+        
+        if self.__sid_restart:
+            gobject.source_remove(self.__sid_restart)
+            self.__sid_restart = 0
+        
+        self.__shutdown()
+        
+    def __shutdown(self):
+        """Stop the amixer processes."""
+        
+        for sid in self.__sids:
+            gobject.source_remove(sid)
+        self.__sids = []
+        
+        if self.__sid_get:
+            gobject.source_remove(self.__sid_get)
+            self.__sid_get = 0
+        
+        for proc in (self.__session, self.__events):
+            if proc is None or proc.poll() is not None:
+                continue
+            try:
+                os.kill(proc.pid, 15)
+                proc.wait()
+            except OSError, e:
+                log.debug("failed to stop amixer (%s)" % e)
+            
+        self.__session = None
+        self.__events = None
+        self.__buf = ""
+        
+    def __fail(self, msg):
+        """Stop the amixer processes and restart them later."""
+        
+        if time.time() - self.__started > self._STABLE:
+            self.__restart_delay = self._RESTART_DELAY_MIN
+        
+        log.error("%s, restart in %d seconds" %
+                  (msg, self.__restart_delay / 1000))
+        
+        self.__shutdown()
+        
+        if not self.__sid_restart:
+            self.__sid_restart = gobject.timeout_add(self.__restart_delay,
+                                                     self.__restart)
+            self.__restart_delay = min(self.__restart_delay * 2,
+                                       self._RESTART_DELAY_MAX)
+        
+    def __restart(self):
+        
+        self.__sid_restart = 0
+        
+        try:
+            self.start()
+        except OSError, e:
+            self.__fail("failed to restart amixer (%s)" % e)
+        
+        return False
+    
+    def poll(self):
+        self.__send("sget %s" % self.__control)
+    
+    def up(self):
+        self.__send("sset %s %d%%+" % (self.__control, STEP))
+        
+    def down(self):
+        self.__send("sset %s %d%%-" % (self.__control, STEP))
+        
+    def mute(self):
+        self.__send("sset %s 0%%" % self.__control)
+        
+    def __send(self, cmd):
+        
+        if self.__session is None:
+            return
+        
+        try:
+            self.__session.stdin.write("%s\n" % cmd)
+            self.__session.stdin.flush()
+        except IOError, e:
+            self.__fail("amixer session failed (%s)" % e)
+            
+    def __on_output(self, fd, cond):
+        """Parse the output of the amixer session for volume levels."""
+        
+        data = cond & gobject.IO_IN and os.read(fd.fileno(), 4096)
+        if not data:
+            self.__fail("amixer session terminated")
+            return False
+        
+        lines = (self.__buf + data).split("\n")
+        self.__buf = lines.pop()
+        for line in lines:
+            match = self._RX_VOLUME.match(line)
+            if match:
+                self._callback(min(100, int(match.group(1))))
+        
+        return True
+    
+    def __on_event(self, fd, cond):
+        """Get the volume when amixer reports a mixer event."""
+        
+        data = cond & gobject.IO_IN and os.read(fd.fileno(), 4096)
+        if not data:
+            self.__fail("amixer events terminated")
+            return False
+        
+        # events often come in bursts, get the volume only once per burst
+        if not self.__sid_get:
+            self.__sid_get = gobject.idle_add(self.__get_idle)
+        
+        return True
+    
+    def __get_idle(self):
+        
+        self.__sid_get = 0
+        self.poll()
+        
+        return False
+        
+class AlsaMixer(Mixer):
+    """Mixer based on the ALSA Python binding (module alsaaudio).
+    
+    Volume changes are observed if the binding supports mixer events
+    (pyalsaaudio 0.8 and later), otherwise the mixer needs to get polled.
+    
+    """
+    def __init__(self, callback, control=CONTROL):
+        
+        super(AlsaMixer, self).__init__(callback)
+        
+        self.__control = control
+        self.__mixer = None
+        self.__sids = []
+        
+    def start(self):
+        
+        try:
+            self.__mixer = alsaaudio.Mixer(self.__control)
+        except alsaaudio.ALSAAudioError, e:
+            raise OSError(str(e))
+        
+        if hasattr(self.__mixer, "handleevents"):
+            for fd, mask in self.__mixer.polldescriptors():
+                self.__sids.append(gobject.io_add_watch(fd, gobject.IO_IN,
+                                                        self.__on_event))
+            self.push = True
+            
+        self.poll()
+        
+    def stop(self):
+        
+        for sid in self.__sids:
+            gobject.source_remove(sid)
+        self.__sids = []
+        
+        self.__mixer = None
+        
+    def poll(self):
+        
+        if self.__mixer is None:
+            return
+        
+        try:
+            volume = self.__mixer.getvolume()[0]
+        except alsaaudio.ALSAAudioError, e:
+            log.error("failed to get master volume (%s)" % e)
+            return
+            
+        self._callback(min(100, max(0, volume)))
+        
+    def up(self):
+        self.__change(STEP)
+        
+    def down(self):
+        self.__change(-STEP)
+        
+    def mute(self):
+        self.__set(0)
+        
+    def __change(self, delta):
+        
+        if self.__mixer is None:
+            return
+        
+        try:
+            volume = self.__mixer.getvolume()[0]
+        except alsaaudio.ALSAAudioError, e:
+            log.error("failed to get master volume (%s)" % e)
+            return
+        
+        self.__set(min(100, max(0, volume + delta)))
+        
+    def __set(self, volume):
+        
+        if self.__mixer is None:
+            return
+        
+        try:
+            self.__mixer.setvolume(volume)
+        except alsaaudio.ALSAAudioError, e:
+            log.error("failed to set master volume (%s)" % e)
+            return
+        
+        if not self.push:
+            self._callback(volume)
+        
+    def __on_event(self, fd, cond):
+        
+        self.__mixer.handleevents()
+        self.poll()
+        
+        return True
+    
+# =============================================================================
+# mixer factory
+# =============================================================================
+
+def get_mixer(config, callback):
+    """Get and start a master volume mixer.
+    
+    The mixer is chosen by the config option 'master-volume-backend'. Mixers
+    which fail to start fall back to the shell mixer.
+    
+    @param config:
+        the config of the player adapter
+    @param callback:
+        function to call with the current volume (in percent) as parameter
+    
+    @return: a started Mixer
+    
+    """
+    backend = config.master_volume_backend
+    
+    if backend not in BACKENDS:
+        log.warning("unknown master volume backend: %s" % backend)
+        backend = "shell"
+    
+    if backend == "auto":
+        # respect customized commands
+        if [key for key in _CMD_OPTIONS if not config.is_default(key)]:
+            backend = "shell"
+        elif alsaaudio is not None:
+            backend = "alsa"
+        else:
+            backend = "amixer"
+    
+    if backend == "alsa" and alsaaudio is None:
+        log.warning("python module alsaaudio is not available")
+        backend = "shell"
+    elif backend == "alsa":
+        mixer = AlsaMixer(callback)
+    elif backend == "amixer":
+        mixer = AmixerMixer(callback)
+    
+    if backend != "shell":
+        try:
+            mixer.start()
+            log.debug("master volume backend: %s" % backend)
+            return mixer
+        except OSError, e:
+            log.warning("master volume backend %s failed, use shell commands "
+                        "(%s)" % (backend, e))
+            
+    mixer = ShellMixer(callback, config)
+    mixer.start()
+    
+    return mixer
@@ -0,0 +1,526 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+"""Benchmark the server end-to-end with many synthetic clients.
+
+Starts a player adapter with a WiFi server in a child process and connects
+a configurable number of simulated clients to it. The server runs in its own
+process so that it does not compete with the clients for the interpreter
+lock, which would distort the measured latencies. Clients speak the real
+protocol: they wait for the hello message, send their client info (image
+size, page size), wait for the player info and the initial sync and then
+run a random but reproducible script of controls, list requests and
+sleep/wakeup cycles until the benchmark ends.
+
+Reported are (in milliseconds, as p50, p90, p99 and max):
+
+ - connect: from connecting the socket to receiving the player info
+ - request latencies per request type
+ - control to sync: from sending CTRL_NEXT to receiving the new item
+ - wakeup to sync: from sending CONN_WAKEUP to receiving the initial sync
+ - sync fan-out: spread between the first and the last client receiving
+   a new item (shows how broadcasts scale with the number of clients)
+
+All clients are driven from one process using non-blocking sockets, so
+hundreds of clients are cheap. The server runs the fake player (see
+fakeplayer.py) with a library of configurable size. Its config and cache
+files go to a temporary directory, not to the user's XDG directories.
+
+Usage: python benchclients.py [options] (see --help)
+
+"""
+
+import errno
+import optparse
+import os
+import random
+import select
+import shutil
+import signal
+import socket
+import struct
+import tempfile
+import time
+
+import gobject
+
+# must be set before importing remuco, which reads the XDG dirs on import
+_XDG_DIR = tempfile.mkdtemp(prefix="benchclients-")
+os.environ["XDG_CONFIG_HOME"] = os.path.join(_XDG_DIR, "config")
+os.environ["XDG_CACHE_HOME"] = os.path.join(_XDG_DIR, "cache")
+
+import remuco.log
+remuco.log.set_level(remuco.log.WARNING)
+
+from remuco import message
+from remuco import net
+from remuco import serial
+
+import fakeplayer
+
+# -----------------------------------------------------------------------------
+# server
+# -----------------------------------------------------------------------------
+
+def _serve(port, opts):
+    """Run the server (in the child process) until SIGTERM."""
+    
+    pa = fakeplayer.FakeAdapter(size=opts.library_size,
+                                cover_size=opts.cover_size,
+                                name="BenchClients")
+    pa.config.wifi_port = port
+    pa.config.bluetooth_enabled = 0
+    pa.config.master_volume_enabled = 0
+    pa.config.metrics_enabled = 0
+    pa.start()
+    
+    ml = gobject.MainLoop()
+    signal.signal(signal.SIGTERM, lambda *args: ml.quit())
+    
+    try:
+        ml.run()
+    finally:
+        pa.stop()
+        
+# -----------------------------------------------------------------------------
+# clients
+# -----------------------------------------------------------------------------
+
+class _Data(serial.Serializable):
+    """Serializable to pack or unpack data of a given format."""
+    
+    def __init__(self, fmt, data=None):
+        self.__fmt = fmt
+        self.data = data
+        
+    def get_fmt(self):
+        return self.__fmt
+        
+    def get_data(self):
+        return self.data
+        
+    def set_data(self, data):
+        self.data = data
+        
+_HEADER_LEN = 6
+_HELLO_LEN = len(net.ClientConnection.IO_HELLO)
+
+_FMT_CINFO = (serial.TYPE_I, serial.TYPE_S, serial.TYPE_I, serial.TYPE_AS,
+              serial.TYPE_AS)
+_FMT_REQUEST = (serial.TYPE_I, serial.TYPE_S, serial.TYPE_AS, serial.TYPE_I)
+_FMT_CONTROL = (serial.TYPE_I,)
+_FMT_ITEM = (serial.TYPE_S, serial.TYPE_AS, serial.TYPE_AY)
+
+# client script actions and their weights
+_ACTIONS = (("request", 5), ("control", 4), ("sleep", 1))
+
+_REQUESTS = (message.REQ_PLAYLIST, message.REQ_QUEUE, message.REQ_MLIB)
+
+class _Stats(object):
+    """Collects measured latencies (in seconds) by name."""
+    
+    def __init__(self):
+        self.values = {}
+        self.errors = {}
+        self.fanout = {} # item id -> list of receive times
+        
+    def add(self, name, value):
+        self.values.setdefault(name, []).append(value)
+        
+    def error(self, name):
+        self.errors[name] = self.errors.get(name, 0) + 1
+        
+class _Client(object):
+    """A simulated client, driven by _run()."""
+    
+    def __init__(self, num, port, opts, stats):
+        
+        self.num = num
+        self.__opts = opts
+        self.__stats = stats
+        self.__rnd = random.Random(opts.seed + num)
+        
+        self.__rbuf = ""
+        self.__wbuf = ""
+        self.__hello = False
+        self.__ready = False
+        self.__initial = True # next item sync is an initial sync
+        self.__asleep_until = None
+        self.__request = None # (msg id, send time)
+        self.__next_sent = None # send time of last CTRL_NEXT
+        self.__wakeup_sent = None
+        self.__request_id = 0
+        self.__action_time = None
+        
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(0)
+        self.__t_connect = time.time()
+        err = self.sock.connect_ex(("127.0.0.1", port))
+        if err not in (0, errno.EINPROGRESS):
+            raise socket.error(err, os.strerror(err))
+            
+    def __str__(self):
+        return "client %d" % self.num
+        
+    def wants_write(self):
+        return len(self.__wbuf) > 0
+        
+    # === I/O ===
+    
+    def on_readable(self):
+        """Read data from the socket. Returns False on disconnect."""
+        
+        try:
+            data = self.sock.recv(65536)
+        except socket.error, e:
+            if e.args[0] == errno.EAGAIN:
+                return True
+            self.__stats.error("recv")
+            return False
+            
+        if not data:
+            self.__stats.error("disconnected")
+            return False
+            
+        self.__rbuf += data
+        
+        if not self.__hello:
+            if len(self.__rbuf) < _HELLO_LEN:
+                return True
+            self.__rbuf = self.__rbuf[_HELLO_LEN:]
+            self.__hello = True
+            self.__send_cinfo()
+            
+        while len(self.__rbuf) >= _HEADER_LEN:
+            id, size = struct.unpack("!hi", self.__rbuf[:_HEADER_LEN])
+            if len(self.__rbuf) < _HEADER_LEN + size:
+                break
+            bindata = self.__rbuf[_HEADER_LEN:_HEADER_LEN + size]
+            self.__rbuf = self.__rbuf[_HEADER_LEN + size:]
+            self.__handle(id, bindata)
+            
+        return True
+        
+    def on_writable(self):
+        """Write pending data to the socket. Returns False on disconnect."""
+        
+        try:
+            sent = self.sock.send(self.__wbuf)
+        except socket.error, e:
+            if e.args[0] == errno.EAGAIN:
+                return True
+            self.__stats.error("send")
+            return False
+            
+        self.__wbuf = self.__wbuf[sent:]
+        
+        return True
+        
+    def __send(self, id, fmt=None, data=None):
+        
+        serializable = fmt and _Data(fmt, data) or None
+        self.__wbuf += net.build_message(id, serializable)
+        
+    def __send_cinfo(self):
+        
+        keys, vals = ["name"], ["benchclients-%d" % self.num]
+        if self.__opts.anchor:
+            keys.append("progress-anchor")
+            vals.append("1")
+        self.__send(message.CONN_CINFO, _FMT_CINFO,
+                    (self.__opts.img_size, "JPEG", self.__opts.page_size,
+                     keys, vals))
+        
+    # === incoming messages ===
+    
+    def __handle(self, id, bindata):
+        
+        now = time.time()
+        
+        if id == message.CONN_PINFO:
+            
+            self.__stats.add("connect", now - self.__t_connect)
+            
+        elif id == message.SYNC_ITEM:
+            
+            self.__handle_item(now, bindata)
+            
+        elif self.__request is not None and id == self.__request[0]:
+            
+            name = "request %s" % message.name(id)
+            self.__stats.add(name, now - self.__request[1])
+            self.__request = None
+            self.__schedule(now)
+            
+        elif id == message.CONN_BYE:
+            
+            self.__stats.error("bye")
+            
+    def __handle_item(self, now, bindata):
+        
+        item = serial.unpack(_Data(_FMT_ITEM), bindata)
+        if item is None:
+            self.__stats.error("item")
+            return
+            
+        if self.__initial:
+            self.__initial = False
+            if self.__wakeup_sent is not None:
+                self.__stats.add("wakeup to sync", now - self.__wakeup_sent)
+                self.__wakeup_sent = None
+            if not self.__ready:
+                self.__ready = True
+                self.__schedule(now)
+            return
+            
+        self.__stats.fanout.setdefault(item.data[0], []).append(now)
+        
+        if self.__next_sent is not None:
+            self.__stats.add("control to sync", now - self.__next_sent)
+            self.__next_sent = None
+            
+    # === script ===
+    
+    def __schedule(self, now):
+        
+        think = self.__rnd.expovariate(1000.0 / self.__opts.think)
+        self.__action_time = now + think
+        
+    def tick(self, now):
+        """Run the next script action if it is due."""
+        
+        if self.__asleep_until is not None:
+            if now >= self.__asleep_until:
+                self.__asleep_until = None
+                self.__initial = True
+                self.__wakeup_sent = now
+                self.__send(message.CONN_WAKEUP)
+            return
+            
+        if self.__action_time is None or now < self.__action_time:
+            return
+            
+        self.__action_time = None
+        
+        total = sum([w for a, w in _ACTIONS])
+        x = self.__rnd.uniform(0, total)
+        for action, weight in _ACTIONS:
+            x -= weight
+            if x <= 0:
+                break
+                
+        if action == "request":
+            id = self.__rnd.choice(_REQUESTS)
+            self.__request_id += 1
+            path = id == message.REQ_MLIB and self.__rnd.random() < 0.5 and \
+                   [fakeplayer.MLIB_ARTISTS] or []
+            self.__send(id, _FMT_REQUEST, (self.__request_id, "", path, 0))
+            self.__request = (id, now)
+            # schedule when reply arrives
+        elif action == "control":
+            id = self.__rnd.choice((message.CTRL_PLAYPAUSE, message.CTRL_NEXT,
+                                    message.CTRL_VOLUME))
+            if id == message.CTRL_NEXT:
+                self.__next_sent = now
+            if id == message.CTRL_VOLUME:
+                self.__send(id, _FMT_CONTROL, (self.__rnd.choice((-1, 1)),))
+            else:
+                self.__send(id)
+            self.__schedule(now)
+        else:
+            self.__send(message.CONN_SLEEP)
+            self.__asleep_until = now + self.__opts.sleep / 1000.0
+            self.__schedule(self.__asleep_until)
+            
+    def finish(self, now):
+        """Count overdue replies as errors and close the connection."""
+        
+        if not self.__ready:
+            self.__stats.error("not ready")
+        if self.__request is not None and now - self.__request[1] > 1:
+            self.__stats.error("no reply")
+        self.sock.close()
+        
+def _run(port, opts):
+    """Run all clients, return the collected stats."""
+    
+    stats = _Stats()
+    clients = {} # fd -> client
+    poll = select.poll()
+    
+    t_start = time.time()
+    t_end = t_start + opts.duration
+    connect_interval = 1.0 / opts.rate
+    num = 0
+    
+    while True:
+        
+        now = time.time()
+        if now >= t_end:
+            break
+            
+        # ramp up
+        while num < opts.clients and now >= t_start + num * connect_interval:
+            client = _Client(num, port, opts, stats)
+            clients[client.sock.fileno()] = client
+            num += 1
+            
+        # script actions
+        for client in clients.values():
+            client.tick(now)
+            
+        for fd, client in clients.items():
+            mask = select.POLLIN
+            if client.wants_write():
+                mask |= select.POLLOUT
+            poll.register(fd, mask)
+            
+        for fd, event in poll.poll(10):
+            client = clients[fd]
+            ok = True
+            if event & (select.POLLIN | select.POLLHUP | select.POLLERR):
+                ok = client.on_readable()
+            if ok and event & select.POLLOUT:
+                ok = client.on_writable()
+            if not ok:
+                poll.unregister(fd)
+                del clients[fd]
+                client.sock.close()
+                
+    for client in clients.values():
+        client.finish(now)
+        
+    return stats
+    
+# -----------------------------------------------------------------------------
+# main
+# -----------------------------------------------------------------------------
+
+def _percentiles(values):
+    
+    values = sorted(values)
+    n = len(values)
+    
+    return [values[min(n - 1, int(n * p))] for p in (0.5, 0.9, 0.99)] + \
+           [values[-1]]
+    
+def _report(stats):
+    
+    print("%-28s %7s %9s %9s %9s %9s" % ("metric (ms)", "count", "p50", "p90",
+                                        "p99", "max"))
+    
+    # items may be synchronized repeatedly, receive times of one broadcast
+    # are expected to be within one second
+    spread = []
+    for times in stats.fanout.values():
+        times.sort()
+        first = last = times[0]
+        for t in times[1:] + [None]:
+            if t is None or t - first > 1:
+                spread.append(last - first)
+                first = t
+            last = t
+            
+    rows = sorted(stats.values.items())
+    if spread:
+        rows.append(("sync fan-out", spread))
+        
+    for name, values in rows:
+        ps = [v * 1000 for v in _percentiles(values)]
+        print("%-28s %7d %9.2f %9.2f %9.2f %9.2f" % tuple([name, len(values)]
+                                                         + ps))
+        
+    for name, count in sorted(stats.errors.items()):
+        print("error: %s: %d" % (name, count))
+        
+def _wait_for_server(port, timeout=10):
+    
+    t_end = time.time() + timeout
+    while time.time() < t_end:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.connect(("127.0.0.1", port))
+        except socket.error:
+            time.sleep(0.1)
+        else:
+            return True
+        finally:
+            sock.close()
+    return False
+    
+def bench(opts):
+    
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _serve(opts.port, opts)
+        finally:
+            os._exit(0)
+            
+    try:
+        if not _wait_for_server(opts.port):
+            print("server did not come up")
+            return
+        time.sleep(0.5) # let the probe connection go away
+        stats = _run(opts.port, opts)
+    finally:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+        
+    _report(stats)
+    
+if __name__ == "__main__":
+    
+    op = optparse.OptionParser()
+    op.add_option("-c", "--clients", type="int", default=100,
+                  help="number of clients (default %default)")
+    op.add_option("-d", "--duration", type="float", default=20,
+                  help="benchmark duration in seconds (default %default)")
+    op.add_option("-r", "--rate", type="float", default=50,
+                  help="new connections per second (default %default)")
+    op.add_option("-t", "--think", type="float", default=500,
+                  help="mean time between client actions in ms "
+                  "(default %default)")
+    op.add_option("-s", "--sleep", type="float", default=2000,
+                  help="time clients stay asleep in ms (default %default)")
+    op.add_option("--img-size", type="int", default=0,
+                  help="image size requested by clients (default %default)")
+    op.add_option("--page-size", type="int", default=50,
+                  help="list page size of clients (default %default)")
+    op.add_option("--library-size", type="int", default=1000,
+                  help="number of items in the player's library "
+                  "(default %default)")
+    op.add_option("--cover-size", type="int", default=300,
+                  help="size of the player's cover images (default %default)")
+    op.add_option("--anchor", action="store_true", default=False,
+                  help="clients use progress anchors")
+    op.add_option("--port", type="int", default=34290,
+                  help="server port (default %default)")
+    op.add_option("--seed", type="int", default=1,
+                  help="random seed for client scripts (default %default)")
+    
+    opts, args = op.parse_args()
+    
+    try:
+        bench(opts)
+    finally:
+        shutil.rmtree(_XDG_DIR)
@@ -0,0 +1,60 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+
+"""Benchmark access to config options.
+
+Usage: python benchconfig.py [NUM_ACCESSES]
+
+"""
+
+import sys
+import time
+
+import remuco.log
+remuco.log.set_level(remuco.log.WARNING)
+
+from remuco.config import Config
+
+_OPTIONS = ("master_volume_enabled", "log_level", "fb_root_dirs")
+
+def bench(num=100000):
+    
+    config = Config("benchmark")
+    
+    for option in _OPTIONS:
+        t0 = time.time()
+        for i in xrange(num):
+            getattr(config, option)
+        t = time.time() - t0
+        print("%-22s: %7.1f ns per access" % (option, t * 1e9 / num))
+
+    t0 = time.time()
+    for i in xrange(num):
+        config.getx("benchmark-option", "0", int)
+    t = time.time() - t0
+    print("%-22s: %7.1f ns per access" % ("getx()", t * 1e9 / num))
+
+if __name__ == "__main__":
+    
+    args = [int(a) for a in sys.argv[1:2]]
+    bench(*args)
@@ -0,0 +1,87 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+
+"""Benchmark file browser listings on a synthetic directory.
+
+Usage: python benchfiles.py [NUM_FILES] [RUNS]
+
+"""
+
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+import remuco.log
+remuco.log.set_level(remuco.log.WARNING)
+
+from remuco.files import FileSystemLibrary
+
+_EXT = (".mp3", ".ogg", ".flac", ".jpg", ".txt", ".cue", ".m3u")
+
+def make_dir(num_files):
+    """Create a directory with 'num_files' files and some sub directories."""
+    
+    root = tempfile.mkdtemp()
+    music = os.path.join(root, "Music")
+    os.mkdir(music)
+    for i in range(num_files // 100):
+        os.mkdir(os.path.join(music, "Album %05d" % i))
+    for i in range(num_files):
+        name = "Track %05d%s" % (i, _EXT[i % len(_EXT)])
+        open(os.path.join(music, name), "w").close()
+    
+    return root
+
+def bench(num_files=10000, runs=10):
+    
+    root = make_dir(num_files)
+    
+    try:
+        fs = FileSystemLibrary([os.path.join(root, "Music")], ["audio"],
+                               False, False)
+        label = fs.get_level([])[0][0]
+        
+        times = []
+        for i in range(runs):
+            t0 = time.time()
+            nested, ids, names = fs.get_level([label])
+            times.append(time.time() - t0)
+        
+        times.sort()
+        print("entries : %d files, %d dirs" % (num_files, num_files // 100))
+        print("listed  : %d items, %d nested" % (len(ids), len(nested)))
+        print("runs    : %d" % runs)
+        print("min     : %.2f ms" % (times[0] * 1000))
+        print("median  : %.2f ms" % (times[len(times) // 2] * 1000))
+        print("max     : %.2f ms" % (times[-1] * 1000))
+        
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    
+    args = [int(a) for a in sys.argv[1:3]]
+    bench(*args)
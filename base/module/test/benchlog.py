@@ -0,0 +1,103 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+"""Benchmark the logging overhead of handling client messages.
+
+Sends messages through a client connection (over a socket pair) and
+measures the time per message at log level INFO, i.e. when debug
+messages are not emitted.
+
+Usage: python benchlog.py [NUM_MESSAGES]
+
+"""
+
+import socket
+import sys
+import time
+
+import remuco.log
+remuco.log.set_level(remuco.log.INFO)
+
+from remuco import message
+from remuco import net
+
+_ITEM = {"artist": "Some Artist", "title": "Some Title", "album": "Album",
+         "genre": "Genre", "year": "2010", "length": "300"}
+
+def _handle(client, id, data):
+    pass
+
+def bench(num=20000):
+    
+    sock, peer = socket.socketpair()
+    
+    conn = net.ClientConnection(sock, "benchmark", [], "", _handle, "bench")
+    recv = conn._ClientConnection__io_recv
+    send = conn._ClientConnection__io_send
+    send(sock, None) # hello
+    peer.recv(4096)
+    
+    msg = net.build_message(message.CTRL_PLAYPAUSE, None)
+    
+    t0 = time.time()
+    for i in xrange(num):
+        peer.sendall(msg)
+        recv(sock, None)
+    t = time.time() - t0
+    print("%-24s: %7.2f us per message" % ("receive", t * 1e6 / num))
+    
+    msg = "x" * 1024
+    
+    t0 = time.time()
+    for i in xrange(num):
+        conn.send(msg)
+        send(sock, None)
+        peer.recv(4096)
+    t = time.time() - t0
+    print("%-24s: %7.2f us per message" % ("send", t * 1e6 / num))
+    
+    t0 = time.time()
+    for i in xrange(num):
+        remuco.log.debug("new item: (%s, %s %s)", "id", _ITEM, None)
+    t = time.time() - t0
+    print("%-24s: %7.2f us per message" % ("debug(fmt, args)", t * 1e6 / num))
+    
+    t0 = time.time()
+    for i in xrange(num):
+        remuco.log.debug("new item: (%s, %s %s)" % ("id", _ITEM, None))
+    t = time.time() - t0
+    print("%-24s: %7.2f us per message" % ("debug(fmt % args)", t * 1e6 / num))
+    
+    t0 = time.time()
+    for i in xrange(num):
+        if remuco.log.is_debug():
+            remuco.log.debug("new item: (%s, %s %s)", "id", _ITEM, None)
+    t = time.time() - t0
+    print("%-24s: %7.2f us per message" % ("is_debug() guard", t * 1e6 / num))
+    
+    conn.disconnect()
+    peer.close()
+    
+if __name__ == "__main__":
+    
+    args = [int(a) for a in sys.argv[1:2]]
+    bench(*args)
@@ -0,0 +1,166 @@
+# -*- coding: UTF-8 -*-
+
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+"""Benchmark the serialization of messages sent to clients.
+
+Measures serial.pack(), net.build_message() and serial.unpack() on
+realistic payloads: player state, progress, an item with a 30 KB thumbnail
+and item lists with 100, 10k and 100k entries with names in various
+languages and scripts.
+
+For each payload and operation the message size, median and 95th
+percentile latency, throughput and the peak of memory allocated per
+operation are reported. Allocations are only measured if the module
+tracemalloc is available (Python 3.4 or the pytracemalloc backport).
+Payloads are generated with a fixed seed and operations are repeated for a
+fixed minimum time, so results of different runs (e.g. before and after a
+change of the codec) can be compared.
+
+Usage: python benchserial.py [MIN_SECONDS_PER_OPERATION]
+
+"""
+
+import random
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import remuco.log
+remuco.log.set_level(remuco.log.WARNING)
+
+from remuco import data
+from remuco import message
+from remuco import net
+from remuco import serial
+
+# words to build item names from (players provide UTF-8 or unicode strings)
+_WORDS = ("love", "night", "Straße", "Größe", "Liebe", "amour", "été",
+          "canción", "любовь", "ночь", "愛", "夜明け", "사랑", "حب", "ליל")
+_WORDS_UNICODE = (u"música", u"ändern", u"звезда", u"東京", u"νύχτα", u"day")
+
+class _Mirror(serial.Serializable):
+    """Serializable to unpack data of a given format."""
+    
+    def __init__(self, fmt):
+        self.__fmt = fmt
+        self.data = None
+        
+    def get_fmt(self):
+        return self.__fmt
+    
+    def set_data(self, data):
+        self.data = data
+
+def _name(rnd):
+    
+    words = rnd.random() < 0.8 and _WORDS or _WORDS_UNICODE
+    
+    return " ".join([rnd.choice(words) for i in range(rnd.randint(1, 4))])
+
+def _item_list(rnd, num):
+    
+    nested = [_name(rnd) for i in range(num // 10)]
+    ids = ["/music/%08d.ogg" % i for i in range(num - len(nested))]
+    names = [_name(rnd) for id in ids]
+    
+    return data.ItemList(1, ["Music", "Artists"], nested, ids, names, 0, 0,
+                         num // 50, None, None)
+
+def _payloads():
+    
+    rnd = random.Random(42)
+    
+    state = data.PlayerState()
+    state.playback, state.volume, state.position = 2, 70, 12
+    
+    progress = data.Progress()
+    progress.progress, progress.length = 125, 301
+    
+    info = {"artist": _name(rnd), "title": _name(rnd), "album": _name(rnd),
+            "genre": "Rock", "year": "1999", "length": "301", "rating": "4"}
+    item = data.Item("/music/00000001.ogg", info, None, 0, "JPEG")
+    # thumbnail bytes as produced by PIL would be (skip PIL here)
+    item._Item__img = "".join([chr(rnd.randint(0, 255)) for i in range(30720)])
+    
+    return [("PlayerState", message.SYNC_STATE, state),
+            ("Progress", message.SYNC_PROGRESS, progress),
+            ("Item (30 KB image)", message.SYNC_ITEM, item),
+            ("ItemList 100", message.REQ_MLIB, _item_list(rnd, 100)),
+            ("ItemList 10k", message.REQ_MLIB, _item_list(rnd, 10000)),
+            ("ItemList 100k", message.REQ_MLIB, _item_list(rnd, 100000))]
+
+def _measure(fn, min_time):
+    """Run 'fn' repeatedly, return sorted latencies and allocation peak."""
+    
+    fn() # warm up
+    
+    peak = None
+    if tracemalloc is not None:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    
+    times = []
+    t_end = time.time() + min_time
+    while len(times) < 5 or time.time() < t_end:
+        t0 = time.time()
+        fn()
+        times.append(time.time() - t0)
+        
+    times.sort()
+    
+    return times, peak
+
+def bench(min_time=1.0):
+    
+    print("%-20s %-13s %9s %10s %10s %9s %9s" % ("payload", "operation",
+          "bytes", "p50 us", "p95 us", "MB/s", "alloc KB"))
+    
+    for name, msg_id, payload in _payloads():
+        
+        bytes = serial.pack(payload)
+        mirror = _Mirror(payload.get_fmt())
+        
+        ops = (("pack", lambda: serial.pack(payload)),
+               ("build_message", lambda: net.build_message(msg_id, payload)),
+               ("unpack", lambda: serial.unpack(mirror, bytes)))
+        
+        for op, fn in ops:
+            times, peak = _measure(fn, min_time)
+            p50 = times[len(times) // 2]
+            p95 = times[int(len(times) * 0.95)]
+            peak = peak is None and "-" or "%.1f" % (peak / 1024.0)
+            print("%-20s %-13s %9d %10.1f %10.1f %9.1f %9s" % (name, op,
+                  len(bytes), p50 * 1e6, p95 * 1e6, len(bytes) / p50 / 1e6,
+                  peak))
+    
+if __name__ == "__main__":
+    
+    args = [float(a) for a in sys.argv[1:2]]
+    bench(*args)
@@ -0,0 +1,701 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+"""Fake player adapter with a synthetic media library.
+
+The fake player needs no media player, D-Bus or GUI, so tests and benchmarks
+can run it headless and reproducibly. It provides:
+
+ - a generated media library of configurable size (artists, albums, genres
+   and playlists), browsable by artist, album, genre and playlist
+ - a playlist and a play queue
+ - generated cover images (one per album)
+ - a simulated playback clock which advances progress and items
+ - all controls a music player may have, all request and all action methods
+
+The library is generated from a seed, so two fake players with the same
+size and seed have the same library.
+
+Usage: python fakeplayer.py [options] (see --help)
+
+Runs the fake player with remuco.Manager, i.e. real clients may connect.
+
+"""
+
+import random
+import time
+
+import Image
+
+import remuco
+from remuco import log
+
+# =============================================================================
+# actions
+# =============================================================================
+
+IA_JUMP = remuco.ItemAction("Jump to")
+IA_REMOVE = remuco.ItemAction("Remove", multiple=True)
+PLAYLIST_ACTIONS = (IA_JUMP, IA_REMOVE)
+
+IA_QUEUE_JUMP = remuco.ItemAction("Jump to")
+IA_QUEUE_REMOVE = remuco.ItemAction("Remove", multiple=True)
+QUEUE_ACTIONS = (IA_QUEUE_JUMP, IA_QUEUE_REMOVE)
+
+IA_ADD = remuco.ItemAction("Add to playlist", multiple=True)
+IA_ENQUEUE = remuco.ItemAction("Enqueue", multiple=True)
+IA_SET = remuco.ItemAction("Set as playlist", multiple=True)
+MLIB_ITEM_ACTIONS = (IA_ADD, IA_ENQUEUE, IA_SET)
+
+LA_PLAY = remuco.ListAction("Play")
+LA_ENQUEUE = remuco.ListAction("Enqueue")
+MLIB_LIST_ACTIONS = (LA_PLAY, LA_ENQUEUE)
+
+FA_APPEND = remuco.ItemAction("Add to playlist", multiple=True)
+FA_PLAY = remuco.ItemAction("Play")
+FILE_ACTIONS = (FA_APPEND, FA_PLAY)
+
+SEARCH_MASK = ["Artist", "Album", "Title"]
+
+# =============================================================================
+# constants
+# =============================================================================
+
+MLIB_ARTISTS = "Artists"
+MLIB_ALBUMS = "Albums"
+MLIB_GENRES = "Genres"
+MLIB_PLAYLISTS = "Playlists"
+MLIB_ROOT = [MLIB_ARTISTS, MLIB_ALBUMS, MLIB_GENRES, MLIB_PLAYLISTS]
+
+GENRES = ["Blues", "Classical", "Country", "Electronic", "Folk", "Hip-Hop",
+          "Jazz", "Metal", "Pop", "Reggae", "Rock", "Soul"]
+
+_SYLLABLES = ["la", "mo", "ri", "ka", "ne", "so", "tu", "vi", "da", "re",
+              "mi", "fa", "zo", "qu", "ba", "el"]
+
+TRACKS_PER_ALBUM = 10
+ALBUMS_PER_ARTIST = 3
+PLAYLIST_LEN = 50
+
+SEEK = 10 # seconds
+
+# =============================================================================
+# library
+# =============================================================================
+
+class Library(object):
+    """Generated media library.
+    
+    Items are identified by their index in 'ids' (and in 'infos', 'names').
+    Everything needed to answer requests is computed once on creation.
+    
+    """
+    def __init__(self, size, seed=0):
+        """Generate a library.
+        
+        @param size:
+            number of items in the library
+        @keyword seed:
+            seed for the random generator used to generate the library
+        
+        """
+        rnd = random.Random(seed)
+        
+        self.ids = []
+        self.names = []
+        self.infos = []
+        
+        self.artists = {} # artist -> list of albums
+        self.albums = {} # album -> list of item indices
+        self.genres = {} # genre -> list of item indices
+        self.album_of = [] # item index -> album
+        
+        num = 0
+        while num < size:
+            artist = self.__word(rnd, 2).capitalize()
+            while artist in self.artists:
+                artist = "%s %s" % (artist, self.__word(rnd, 1).capitalize())
+            genre = rnd.choice(GENRES)
+            self.artists[artist] = []
+            for i in range(ALBUMS_PER_ARTIST):
+                album = "%s %d" % (self.__word(rnd, 3).capitalize(), num)
+                year = str(rnd.randint(1960, 2010))
+                self.artists[artist].append(album)
+                self.albums[album] = []
+                for track in range(1, TRACKS_PER_ALBUM + 1):
+                    if num == size:
+                        break
+                    title = " ".join([self.__word(rnd, 2) for j in
+                                      range(rnd.randint(1, 3))]).capitalize()
+                    info = {remuco.INFO_ARTIST: artist,
+                            remuco.INFO_ALBUM: album,
+                            remuco.INFO_TITLE: title,
+                            remuco.INFO_GENRE: genre,
+                            remuco.INFO_YEAR: year,
+                            remuco.INFO_TRACK: str(track),
+                            remuco.INFO_LENGTH: rnd.randint(90, 420),
+                            remuco.INFO_RATING: rnd.randint(0, 5)}
+                    self.ids.append("fake:///%s/%s/%02d" % (artist, album,
+                                                            track))
+                    self.names.append("%s - %s" % (artist, title))
+                    self.infos.append(info)
+                    self.albums[album].append(num)
+                    self.genres.setdefault(genre, []).append(num)
+                    self.album_of.append(album)
+                    num += 1
+                if not self.albums[album]:
+                    del self.albums[album]
+                    self.artists[artist].remove(album)
+                    
+        self.playlists = {} # name -> list of item indices
+        for i in range(max(1, size // PLAYLIST_LEN)):
+            name = "Playlist %d" % (i + 1)
+            self.playlists[name] = rnd.sample(xrange(size),
+                                              min(size, PLAYLIST_LEN))
+            
+        self.__index = dict([(id, i) for i, id in enumerate(self.ids)])
+        
+    def __len__(self):
+        return len(self.ids)
+        
+    def __word(self, rnd, syllables):
+        return "".join([rnd.choice(_SYLLABLES) for i in range(syllables)])
+        
+    def index(self, id):
+        """Get the index of an item by its ID (or None if not found)."""
+        return self.__index.get(id)
+        
+    def add(self, id, info):
+        """Add an item (e.g. a file), returns its index."""
+        
+        index = self.__index.get(id)
+        if index is not None:
+            return index
+            
+        self.ids.append(id)
+        self.names.append(info.get(remuco.INFO_TITLE, id))
+        self.infos.append(info)
+        self.album_of.append(None)
+        self.__index[id] = len(self.ids) - 1
+        
+        return len(self.ids) - 1
+        
+    def items(self, path):
+        """Get the items (indices) of a list in the library.
+        
+        @return: list of item indices or None if 'path' is not an item list
+        
+        """
+        if len(path) == 3 and path[0] == MLIB_ARTISTS:
+            return self.albums.get(path[2])
+        if len(path) != 2:
+            return None
+        if path[0] == MLIB_ALBUMS:
+            return self.albums.get(path[1])
+        if path[0] == MLIB_GENRES:
+            return self.genres.get(path[1])
+        if path[0] == MLIB_PLAYLISTS:
+            return self.playlists.get(path[1])
+        return None
+        
+    def nested(self, path):
+        """Get the nested lists of a list in the library."""
+        
+        if not path:
+            return MLIB_ROOT
+        if len(path) == 1 and path[0] == MLIB_ARTISTS:
+            return sorted(self.artists.keys())
+        if len(path) == 1 and path[0] == MLIB_ALBUMS:
+            return sorted(self.albums.keys())
+        if len(path) == 1 and path[0] == MLIB_GENRES:
+            return sorted(self.genres.keys())
+        if len(path) == 1 and path[0] == MLIB_PLAYLISTS:
+            return sorted(self.playlists.keys())
+        if len(path) == 2 and path[0] == MLIB_ARTISTS:
+            return self.artists.get(path[1], [])
+        return []
+        
+    def search(self, query):
+        """Search items, 'query' corresponds to SEARCH_MASK."""
+        
+        keys = (remuco.INFO_ARTIST, remuco.INFO_ALBUM, remuco.INFO_TITLE)
+        query = [(key, value.lower()) for key, value in zip(keys, query)
+                 if value]
+        
+        if not query:
+            return []
+            
+        result = []
+        for i, info in enumerate(self.infos):
+            for key, value in query:
+                if value not in info.get(key, "").lower():
+                    break
+            else:
+                result.append(i)
+                
+        return result
+        
+# =============================================================================
+# fake player adapter
+# =============================================================================
+
+class FakeAdapter(remuco.PlayerAdapter):
+    """Player adapter for a player which does not exist."""
+    
+    def __init__(self, size=1000, seed=0, cover_size=300, name="Fake"):
+        """Create a fake player.
+        
+        @keyword size:
+            number of items in the library
+        @keyword seed:
+            seed for generating the library and covers
+        @keyword cover_size:
+            width and height of generated cover images (0 disables covers)
+        @keyword name:
+            player name (also names config and log files)
+        
+        """
+        remuco.PlayerAdapter.__init__(self, name,
+                                      playback_known=True,
+                                      volume_known=True,
+                                      repeat_known=True,
+                                      shuffle_known=True,
+                                      progress_known=True,
+                                      max_rating=5,
+                                      poll=1,
+                                      file_actions=FILE_ACTIONS,
+                                      mime_types=remuco.MIMETYPES_AUDIO,
+                                      search_mask=SEARCH_MASK)
+        
+        self.lib = Library(size, seed=seed)
+        
+        self.__seed = seed
+        self.__cover_size = cover_size
+        self.__covers = {} # album -> image
+        self.__rnd = random.Random(seed)
+        
+        self.__playlist = list(self.lib.playlists["Playlist 1"])
+        self.__queue = []
+        self.__position = 0
+        self.__in_queue = False
+        self.__index = self.__playlist and self.__playlist[0] or None
+        
+        self.__playback = remuco.PLAYBACK_STOP
+        self.__repeat = False
+        self.__shuffle = False
+        self.__volume = 50
+        
+        # playback clock: progress is '__offset' plus the time since
+        # '__started' while playing
+        self.__offset = 0
+        self.__started = 0
+        
+    def start(self):
+        
+        remuco.PlayerAdapter.start(self)
+        
+        self.__sync_all()
+        
+        log.debug("fake player with %d items started" % len(self.lib))
+        
+    def poll(self):
+        
+        length = self.__length()
+        progress = self.__progress()
+        
+        if length and progress >= length:
+            self.__advance(1, auto=True)
+            
+        self.update_progress(self.__progress(), self.__length())
+        
+    # =========================================================================
+    # control interface
+    # =========================================================================
+    
+    def ctrl_toggle_playing(self):
+        
+        if self.__playback == remuco.PLAYBACK_PLAY:
+            self.__offset = self.__progress()
+            self.__playback = remuco.PLAYBACK_PAUSE
+        elif self.__index is not None:
+            self.__started = time.time()
+            self.__playback = remuco.PLAYBACK_PLAY
+            
+        self.update_playback(self.__playback)
+        
+    def ctrl_toggle_repeat(self):
+        
+        self.__repeat = not self.__repeat
+        self.update_repeat(self.__repeat)
+        
+    def ctrl_toggle_shuffle(self):
+        
+        self.__shuffle = not self.__shuffle
+        self.update_shuffle(self.__shuffle)
+        
+    def ctrl_next(self):
+        
+        self.__advance(1)
+        
+    def ctrl_previous(self):
+        
+        self.__advance(-1)
+        
+    def ctrl_seek(self, direction):
+        
+        length = self.__length()
+        progress = self.__progress() + direction * SEEK
+        self.__set_progress(max(0, min(length, progress)))
+        self.update_progress(self.__progress(), length)
+        
+    def ctrl_volume(self, direction):
+        
+        if direction == 0:
+            self.__volume = 0
+        else:
+            self.__volume = max(0, min(100, self.__volume + direction * 5))
+            
+        self.update_volume(self.__volume)
+        
+    def ctrl_rate(self, rating):
+        
+        if self.__index is None:
+            return
+            
+        self.lib.infos[self.__index][remuco.INFO_RATING] = rating
+        self.__sync_item()
+        
+    def ctrl_tag(self, id, tags):
+        
+        index = self.lib.index(id)
+        if index is None:
+            return
+            
+        self.lib.infos[index][remuco.INFO_TAGS] = ",".join(tags)
+        if index == self.__index:
+            self.__sync_item()
+            
+    # =========================================================================
+    # actions interface
+    # =========================================================================
+    
+    def action_files(self, action_id, files, uris):
+        
+        indices = []
+        for file, uri in zip(files, uris):
+            title = file.rsplit("/", 1)[-1]
+            indices.append(self.lib.add(uri, {remuco.INFO_TITLE: title}))
+            
+        if action_id == FA_APPEND.id:
+            self.__playlist.extend(indices)
+            self.__sync_position()
+        elif action_id == FA_PLAY.id and indices:
+            self.__playlist.extend(indices)
+            self.__jump(len(self.__playlist) - 1, False)
+        else:
+            log.error("** BUG ** unexpected action: %d" % action_id)
+            
+    def action_playlist_item(self, action_id, positions, ids):
+        
+        if action_id == IA_JUMP.id:
+            self.__jump(positions[0], False)
+        elif action_id == IA_REMOVE.id:
+            self.__remove(self.__playlist, positions, False)
+        else:
+            log.error("** BUG ** unexpected action: %d" % action_id)
+            
+    def action_queue_item(self, action_id, positions, ids):
+        
+        if action_id == IA_QUEUE_JUMP.id:
+            self.__jump(positions[0], True)
+        elif action_id == IA_QUEUE_REMOVE.id:
+            self.__remove(self.__queue, positions, True)
+        else:
+            log.error("** BUG ** unexpected action: %d" % action_id)
+            
+    def action_mlib_item(self, action_id, path, positions, ids):
+        
+        self.__item_action(action_id, self.__indices(ids))
+        
+    def action_mlib_list(self, action_id, path):
+        
+        indices = self.lib.items(path)
+        if indices is None:
+            log.warning("no item list: %s" % path)
+            return
+            
+        if action_id == LA_PLAY.id:
+            self.__playlist = list(indices)
+            self.__jump(0, False)
+        elif action_id == LA_ENQUEUE.id:
+            self.__queue.extend(indices)
+            self.__sync_position()
+        else:
+            log.error("** BUG ** unexpected action: %d" % action_id)
+            
+    def action_search_item(self, action_id, positions, ids):
+        
+        self.__item_action(action_id, self.__indices(ids))
+        
+    # =========================================================================
+    # request interface
+    # =========================================================================
+    
+    def request_playlist(self, reply):
+        
+        reply.ids = [self.lib.ids[i] for i in self.__playlist]
+        reply.names = [self.lib.names[i] for i in self.__playlist]
+        reply.item_actions = PLAYLIST_ACTIONS
+        reply.send()
+        
+    def request_queue(self, reply):
+        
+        reply.ids = [self.lib.ids[i] for i in self.__queue]
+        reply.names = [self.lib.names[i] for i in self.__queue]
+        reply.item_actions = QUEUE_ACTIONS
+        reply.send()
+        
+    def request_mlib(self, reply, path):
+        
+        indices = self.lib.items(path)
+        
+        if indices is None:
+            reply.nested = self.lib.nested(path)
+            if path and path[0] in (MLIB_ARTISTS, MLIB_ALBUMS, MLIB_GENRES,
+                                    MLIB_PLAYLISTS):
+                reply.list_actions = MLIB_LIST_ACTIONS
+        else:
+            reply.ids = [self.lib.ids[i] for i in indices]
+            reply.names = [self.lib.names[i] for i in indices]
+            reply.item_actions = MLIB_ITEM_ACTIONS
+            
+        reply.send()
+        
+    def request_search(self, reply, query):
+        
+        indices = self.lib.search(query)
+        
+        reply.ids = [self.lib.ids[i] for i in indices]
+        reply.names = [self.lib.names[i] for i in indices]
+        reply.item_actions = MLIB_ITEM_ACTIONS
+        reply.send()
+        
+    # =========================================================================
+    # internal methods
+    # =========================================================================
+    
+    def __progress(self):
+        
+        if self.__playback == remuco.PLAYBACK_PLAY:
+            return int(self.__offset + time.time() - self.__started)
+        return int(self.__offset)
+        
+    def __set_progress(self, progress):
+        
+        self.__offset = progress
+        self.__started = time.time()
+        
+    def __length(self):
+        
+        if self.__index is None:
+            return 0
+        return self.lib.infos[self.__index].get(remuco.INFO_LENGTH, 0)
+        
+    def __advance(self, step, auto=False):
+        """Go to the next or previous item.
+        
+        The queue has precedence over the playlist when going forward.
+        
+        @keyword auto:
+            True if the current item has finished (i.e. no manual change)
+        
+        """
+        if step > 0 and self.__queue:
+            if self.__in_queue:
+                del self.__queue[0]
+            if self.__queue:
+                self.__jump(0, True)
+                return
+                
+        if not self.__playlist:
+            self.__stop()
+            return
+            
+        if self.__shuffle:
+            position = self.__rnd.randrange(len(self.__playlist))
+        elif self.__in_queue and step < 0:
+            position = self.__position # back to where the queue interrupted
+        else:
+            position = self.__position + step
+            
+        if position >= len(self.__playlist) or position < 0:
+            if auto and not self.__repeat:
+                self.__stop()
+                return
+            position %= len(self.__playlist)
+            
+        self.__jump(position, False)
+        
+    def __jump(self, position, queue):
+        
+        items = queue and self.__queue or self.__playlist
+        if position < 0 or position >= len(items):
+            return
+            
+        if queue:
+            # played queue items get removed from the queue
+            del self.__queue[:position]
+            position = 0
+        else:
+            self.__position = position
+            
+        self.__in_queue = queue
+        self.__index = items[position]
+        self.__set_progress(0)
+        if self.__playback != remuco.PLAYBACK_PLAY:
+            self.__playback = remuco.PLAYBACK_PLAY
+            self.update_playback(self.__playback)
+            
+        self.__sync_item()
+        self.__sync_position()
+        self.update_progress(0, self.__length())
+        
+    def __stop(self):
+        
+        self.__in_queue = False
+        self.__position = 0
+        self.__index = self.__playlist and self.__playlist[0] or None
+        self.__playback = remuco.PLAYBACK_STOP
+        self.__set_progress(0)
+        self.__sync_all()
+        
+    def __remove(self, items, positions, queue):
+        
+        for position in sorted(positions, reverse=True):
+            if position >= len(items):
+                continue
+            del items[position]
+            if queue and position == 0:
+                self.__in_queue = False # current item is not queued anymore
+            if not queue and position < self.__position:
+                self.__position -= 1
+                
+        self.__position = max(0, min(self.__position,
+                                     len(self.__playlist) - 1))
+        
+        self.__sync_position()
+        
+    def __item_action(self, action_id, indices):
+        
+        if action_id == IA_ADD.id:
+            self.__playlist.extend(indices)
+            self.__sync_position()
+        elif action_id == IA_ENQUEUE.id:
+            self.__queue.extend(indices)
+            self.__sync_position()
+        elif action_id == IA_SET.id:
+            self.__playlist = indices
+            self.__jump(0, False)
+        else:
+            log.error("** BUG ** unexpected action: %d" % action_id)
+            
+    def __indices(self, ids):
+        
+        indices = [self.lib.index(id) for id in ids]
+        
+        return [i for i in indices if i is not None]
+        
+    def __cover(self, index):
+        """Get the cover of an item (generated once per album)."""
+        
+        if not self.__cover_size:
+            return None
+            
+        album = self.lib.album_of[index]
+        if album is None:
+            return None
+            
+        img = self.__covers.get(album)
+        if img is None:
+            rnd = random.Random("%s%s" % (self.__seed, album))
+            color = tuple([rnd.randint(0, 255) for i in range(3)])
+            size = (self.__cover_size, self.__cover_size)
+            img = Image.new("RGB", size, color)
+            # some structure, otherwise the image compresses unrealistically
+            for i in range(self.__cover_size // 4):
+                x = rnd.randrange(self.__cover_size)
+                y = rnd.randrange(self.__cover_size)
+                color = tuple([rnd.randint(0, 255) for j in range(3)])
+                img.paste(color, (x, y, min(x + 16, size[0]),
+                                  min(y + 16, size[1])))
+            self.__covers[album] = img
+            
+        return img
+        
+    def __sync_item(self):
+        
+        if self.__index is None:
+            self.update_item(None, None, None)
+            return
+            
+        info = self.lib.infos[self.__index].copy()
+        self.update_item(self.lib.ids[self.__index], info,
+                         self.__cover(self.__index))
+        
+    def __sync_position(self):
+        
+        if self.__in_queue:
+            self.update_position(0, queue=True)
+        else:
+            self.update_position(self.__position)
+            
+    def __sync_all(self):
+        
+        self.update_playback(self.__playback)
+        self.update_repeat(self.__repeat)
+        self.update_shuffle(self.__shuffle)
+        self.update_volume(self.__volume)
+        self.__sync_item()
+        self.__sync_position()
+        self.update_progress(self.__progress(), self.__length())
+        
+# =============================================================================
+# main
+# =============================================================================
+
+if __name__ == "__main__":
+    
+    import optparse
+    
+    op = optparse.OptionParser()
+    op.add_option("--size", type="int", default=1000,
+                  help="number of items in the library (default %default)")
+    op.add_option("--seed", type="int", default=0,
+                  help="seed to generate the library (default %default)")
+    op.add_option("--cover-size", type="int", default=300,
+                  help="size of generated covers (default %default)")
+    opts, args = op.parse_args()
+    
+    pa = FakeAdapter(size=opts.size, seed=opts.seed,
+                     cover_size=opts.cover_size)
+    mg = remuco.Manager(pa)
+    mg.run()
@@ -28,8 +28,44 @@ import sys
 
 import remuco.log
 from remuco import PlayerAdapter
+from remuco import message
+from remuco.data import ClientInfo
 
 
+class _Client(object):
+    
+    def __init__(self):
+        
+        self.info = ClientInfo()
+        self.sleeping = False
+        self.sent = []
+        
+    def send(self, msg):
+        
+        self.sent.append(msg)
+        
+    def disconnect(self, remove_from_list=True, send_bye_msg=False):
+        
+        pass
+    
+class _PollAdapter(PlayerAdapter):
+    
+    def __init__(self, client):
+        
+        PlayerAdapter.__init__(self, "unittest", playback_known=True, poll=1)
+        
+        self.client = client
+        self.polls = [] # number of messages sent to client at each poll
+        
+    def poll(self):
+        
+        self.polls.append(len(self.client.sent))
+        
+    def ctrl_toggle_playing(self):
+        
+        self.update_playback(remuco.PLAYBACK_PLAY)
+        
+
 class AdapterTest(unittest.TestCase):
 
     def setUp(self):
@@ -59,6 +95,89 @@ class AdapterTest(unittest.TestCase):
         
         self.__ml.run()
 
+    def test_anchor(self):
+        
+        pa = self.__pa
+        anchor = pa._PlayerAdapter__anchor
+        drift = pa.config.progress_drift
+        
+        pa.update_playback(remuco.PLAYBACK_PLAY)
+        pa.update_progress(10, 100)
+        assert (anchor.progress, anchor.length, anchor.rate) == (10000, 100,
+                                                                 1000)
+        
+        # pretend the anchor is 1 second old
+        pa._PlayerAdapter__anchor_time -= 1
+        
+        pa.update_progress(11 + drift - 0.5, 100)
+        assert anchor.progress == 10000 # drift below threshold, keep anchor
+        
+        pa.update_progress(11 + drift + 0.5, 100)
+        assert anchor.progress == (11 + drift + 0.5) * 1000
+        assert anchor.rate == 1000
+        
+        pa.update_progress(20, 0) # length unknown
+        assert (anchor.progress, anchor.length, anchor.rate) == (20000, 0, 0)
+        
+        pa.update_progress(20, 100)
+        assert anchor.rate == 1000
+        
+        pa.update_playback(remuco.PLAYBACK_PAUSE)
+        assert anchor.rate == 0
+        
+    def test_anchor_progress_unknown(self):
+        
+        pa = PlayerAdapter("unittest", progress_known=False)
+        anchor = pa._PlayerAdapter__anchor
+        
+        pa.update_playback(remuco.PLAYBACK_PLAY)
+        pa.update_progress(10, 100)
+        assert (anchor.progress, anchor.length, anchor.rate) == (10000, 100, 0)
+        
+    def test_poll(self):
+        
+        client = _Client()
+        pa = _PollAdapter(client)
+        pa.config.poll_suspend = 1
+        pa.config.poll_backoff = 4
+        pa.config.poll_boost = 5
+        pa.config.log_level = remuco.log.WARNING
+        
+        ival = pa._PlayerAdapter__poll_interval
+        
+        pa.start()
+        
+        try:
+            # no clients
+            assert ival() == 0
+            assert not pa._PlayerAdapter__poll_sid
+            
+            pa._PlayerAdapter__clients.append(client)
+            client.sleeping = True
+            assert ival() == 0
+            
+            # a client wakes up: poll before sending the initial state
+            client.sleeping = False
+            pa._PlayerAdapter__handle_message(client,
+                                              message.PRIV_INITIAL_SYNC, None)
+            assert pa.polls == [0]
+            assert len(client.sent) == 3
+            assert pa._PlayerAdapter__poll_sid
+            
+            # not playing
+            assert ival() == 4000
+            
+            # control command
+            pa._PlayerAdapter__handle_message(client, message.CTRL_PLAYPAUSE,
+                                              None)
+            assert ival() == 500
+            
+            pa._PlayerAdapter__poll_boost_end = 0
+            assert ival() == 1000
+            
+        finally:
+            pa.stop()
+        
     def __stop(self):
         
         self.__pa.stop()
@@ -32,6 +32,15 @@ from testserial import SerializationTest
 from testnet import ServerTest
 from testfiles import FilesTest
 from testadapter import AdapterTest
+from testart import ArtTest
+from testindex import IndexTest
+from testconfig import ConfigTest, ConcurrentSaveTest
+from testvolume import VolumeTest
+from testmetrics import MetricsTest
+from testfakeplayer import FakePlayerTest
+from testfuzz import FuzzTest
+from testmpris import MPRISTest
+from testmpris2 import MPRIS2Test
 
 if __name__ == "__main__":
     
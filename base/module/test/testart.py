@@ -0,0 +1,140 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+
+import os
+import os.path
+import shutil
+import tempfile
+import threading
+import unittest
+
+import gobject
+import Image
+
+from remuco import art
+
+
+class ArtTest(unittest.TestCase):
+
+
+    def setUp(self):
+        
+        self.__dir = tempfile.mkdtemp()
+        
+    def tearDown(self):
+        
+        shutil.rmtree(self.__dir)
+        
+    def __touch(self, *names):
+        
+        for name in names:
+            open(os.path.join(self.__dir, name), "w").close()
+            
+    def __find(self, **kwargs):
+        
+        fname = art._try_folder(os.path.join(self.__dir, "song.mp3"), **kwargs)
+        
+        return fname and os.path.basename(fname)
+        
+    def test_folder(self):
+        
+        self.__touch("song.mp3", "notes.txt")
+        assert self.__find() is None
+        
+        self.__touch("scan-03.png")
+        assert self.__find() == "scan-03.png"
+        
+        self.__touch("Booklet-Cover-Scan.jpg")
+        assert self.__find() == "Booklet-Cover-Scan.jpg"
+        
+        self.__touch("Folder.JPG")
+        assert self.__find() == "Folder.JPG"
+        
+        self.__touch("front.png")
+        assert self.__find() == "front.png"
+        assert self.__find(names=["folder", "front"]) == "Folder.JPG"
+        assert self.__find(names=["booklet"]) == "Booklet-Cover-Scan.jpg"
+        
+        os.mkdir(os.path.join(self.__dir, "cover.jpg"))
+        assert self.__find() == "front.png"
+        
+    def test_folder_hidden(self):
+        
+        self.__touch("._front.jpg", "Front Cover.jpg")
+        assert self.__find() == "Front Cover.jpg"
+        assert self.__find(img_size=300) == "Front Cover.jpg"
+        
+    def test_folder_size(self):
+        
+        for name, size in (("cover.png", 100), ("cover.jpg", 400),
+                           ("scan-1.png", 100), ("scan-2.png", 400)):
+            Image.new("RGB", (size, size)).save(os.path.join(self.__dir, name))
+        
+        assert self.__find() == "cover.jpg" # sorted by name
+        assert self.__find(img_size=50) == "cover.png"
+        assert self.__find(img_size=300) == "cover.jpg"
+        assert self.__find(img_size=1000) == "cover.jpg"
+        
+        # no size probing among images without a typical name
+        probed = []
+        image_size = art._image_size
+        art._image_size = lambda file: probed.append(file) or image_size(file)
+        try:
+            assert self.__find(img_size=50, names=["front"]) == "cover.jpg"
+            assert self.__find(img_size=1000, names=["front"]) == "cover.jpg"
+        finally:
+            art._image_size = image_size
+        assert probed == []
+        
+    def test_async(self):
+        
+        gobject.threads_init()
+        
+        self.__touch("song.mp3", "front.png")
+        os.mkdir(os.path.join(self.__dir, "empty"))
+        found = os.path.join(self.__dir, "song.mp3")
+        missing = os.path.join(self.__dir, "empty", "song.mp3")
+        
+        ml = gobject.MainLoop()
+        main = threading.currentThread()
+        results = {}
+        
+        def done(resource, fname):
+            # called in the main loop, not in the worker thread
+            results[resource] = (fname, threading.currentThread() is main)
+            if len(results) == 2:
+                ml.quit()
+            return False
+        
+        art.get_art_async(found, done)
+        art.get_art_async(missing, done)
+        gobject.timeout_add(5000, ml.quit)
+        ml.run()
+        
+        assert results == {
+            found: (os.path.join(self.__dir, "front.png"), True),
+            missing: (None, True)}
+        
+if __name__ == "__main__":
+    
+    unittest.main()
@@ -0,0 +1,125 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+
+
+from ConfigParser import SafeConfigParser
+import shutil
+import tempfile
+import unittest
+
+from remuco import config
+
+
+class ConfigTest(unittest.TestCase):
+
+
+    def setUp(self):
+        
+        # do not touch the real config file
+        self.__dir = tempfile.mkdtemp()
+        self.__dir_orig = config.user_config_dir
+        config.user_config_dir = self.__dir
+        
+        self.__config = config.Config("TestConfig")
+        self.__config.flush()
+        
+    def tearDown(self):
+        
+        config.user_config_dir = self.__dir_orig
+        shutil.rmtree(self.__dir)
+        
+    def __edit(self, key, value):
+        
+        cp = SafeConfigParser()
+        cp.read(self.__config.file)
+        cp.set(self.__config.player, key, value)
+        fp = open(self.__config.file, "w")
+        cp.write(fp)
+        fp.close()
+        
+    def test_reload(self):
+        
+        cfg = self.__config
+        size = cfg.fb_cache_size
+        
+        assert cfg.reload() == []
+        
+        self.__edit("fb-cache-size", str(size + 1))
+        
+        assert cfg.reload() == ["fb-cache-size"]
+        assert cfg.fb_cache_size == size + 1
+        
+        self.__edit("fb-cache-size", str(size))
+        
+        assert cfg.reload() == ["fb-cache-size"]
+        assert cfg.fb_cache_size == size
+        
+    def test_reload_pending(self):
+        
+        cfg = self.__config
+        
+        cfg.getx("pending", "1")
+        self.__edit("fb-cache-size", str(cfg.fb_cache_size + 1))
+        
+        assert cfg.reload() == ["fb-cache-size"]
+        assert cfg.getx("pending", "2") == "1"
+        
+        cp = SafeConfigParser()
+        cp.read(cfg.file)
+        assert cp.get(cfg.player, "x-pending") == "1"
+        
+class ConcurrentSaveTest(unittest.TestCase):
+    
+    
+    def setUp(self):
+        
+        self.__dir = tempfile.mkdtemp()
+        self.__dir_orig = config.user_config_dir
+        config.user_config_dir = self.__dir
+        
+    def tearDown(self):
+        
+        config.user_config_dir = self.__dir_orig
+        shutil.rmtree(self.__dir)
+        
+    def test_save(self):
+        
+        c1 = config.Config("TestConfig1")
+        c2 = config.Config("TestConfig2")
+        c1.flush()
+        c2.flush()
+        
+        # each one saves its option on top of the other's
+        c1.getx("a", "1")
+        c2.getx("b", "2")
+        c1.flush()
+        c2.flush()
+        
+        cp = SafeConfigParser()
+        cp.read(c1.file)
+        self.assertEqual(cp.get("testconfig1", "x-a"), "1")
+        self.assertEqual(cp.get("testconfig2", "x-b"), "2")
+        
+if __name__ == '__main__':
+    
+    unittest.main()
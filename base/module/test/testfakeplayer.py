@@ -0,0 +1,116 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+import unittest
+
+import fakeplayer
+
+
+class _Reply(object):
+    
+    def __init__(self):
+        
+        self.ids = []
+        self.names = []
+        self.nested = []
+        self.item_actions = []
+        self.list_actions = []
+        self.sent = False
+        
+    def send(self):
+        
+        self.sent = True
+        
+class FakePlayerTest(unittest.TestCase):
+
+
+    def setUp(self):
+        
+        self.__pa = fakeplayer.FakeAdapter(size=1000, cover_size=0,
+                                           name="TestFakePlayer")
+        
+    def __request(self, fn, *args):
+        
+        reply = _Reply()
+        fn(reply, *args)
+        assert reply.sent
+        return reply
+        
+    def test_library(self):
+        
+        lib = self.__pa.lib
+        
+        assert len(lib) == 1000
+        assert len(set(lib.ids)) == 1000
+        assert fakeplayer.Library(1000).names == lib.names
+        assert fakeplayer.Library(1000, seed=1).names != lib.names
+        
+    def test_mlib(self):
+        
+        pa = self.__pa
+        
+        reply = self.__request(pa.request_mlib, [])
+        assert reply.nested == fakeplayer.MLIB_ROOT
+        
+        reply = self.__request(pa.request_mlib, ["Artists"])
+        artist = reply.nested[0]
+        
+        reply = self.__request(pa.request_mlib, ["Artists", artist])
+        album = reply.nested[0]
+        
+        reply = self.__request(pa.request_mlib, ["Artists", artist, album])
+        assert len(reply.ids) == fakeplayer.TRACKS_PER_ALBUM
+        assert reply.item_actions == fakeplayer.MLIB_ITEM_ACTIONS
+        
+        reply = self.__request(pa.request_search, [artist, "", ""])
+        assert len(reply.ids) >= fakeplayer.TRACKS_PER_ALBUM
+        
+    def test_actions(self):
+        
+        pa = self.__pa
+        
+        ids = pa.lib.ids[:3]
+        pa.action_mlib_item(fakeplayer.IA_SET.id, [], [0, 1, 2], ids)
+        
+        reply = self.__request(pa.request_playlist)
+        assert reply.ids == ids
+        
+        pa.action_playlist_item(fakeplayer.IA_REMOVE.id, [1], ids[1:2])
+        
+        reply = self.__request(pa.request_playlist)
+        assert reply.ids == [ids[0], ids[2]]
+        
+        pa.action_search_item(fakeplayer.IA_ENQUEUE.id, [0], ids[1:2])
+        
+        reply = self.__request(pa.request_queue)
+        assert reply.ids == ids[1:2]
+        
+        pa.ctrl_next() # plays the queued item
+        
+        pa.ctrl_next() # back to the playlist
+        
+        reply = self.__request(pa.request_queue)
+        assert reply.ids == []
+        
+if __name__ == '__main__':
+    
+    unittest.main()
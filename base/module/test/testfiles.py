@@ -20,8 +20,13 @@
 #
 # =============================================================================
 
+import os
+import os.path
+import shutil
+import tempfile
 import unittest
 
+from remuco import files
 from remuco.files import FileSystemLibrary
 
 
@@ -72,6 +77,103 @@ class FilesTest(unittest.TestCase):
         
         self.__test_path(fs, [], "", limit=3)
         
+    def test_cache(self):
+        
+        dir = tempfile.mkdtemp()
+        
+        try:
+            for name in ("a.mp3", "c.txt", ".d.ogg", "e.MP3~"):
+                open(os.path.join(dir, name), "w").close()
+            
+            fs = FileSystemLibrary([dir], ["audio"], False, False, cache_size=1)
+            root = fs.get_level([])[0]
+            
+            nested, ids, names = fs.get_level(root)
+            assert names == ["a"]
+            assert (fs.cache_hits, fs.cache_misses) == (0, 1)
+            
+            nested, ids, names = fs.get_level(root)
+            assert names == ["a"]
+            assert (fs.cache_hits, fs.cache_misses) == (1, 1)
+            
+            open(os.path.join(dir, "b.mp3"), "w").close()
+            os.utime(dir, (0, 0)) # make sure mtime changes
+            
+            nested, ids, names = fs.get_level(root)
+            assert names == ["a", "b"]
+            assert (fs.cache_hits, fs.cache_misses) == (1, 2)
+            
+        finally:
+            shutil.rmtree(dir)
+        
+    def test_lru(self):
+        
+        cache = files._ListingCache(2)
+        cache.put("a", 1, "A")
+        cache.put("b", 1, "B")
+        assert cache.get("a", 1) == "A"
+        
+        cache.put("c", 1, "C") # drops 'b', least recently used
+        assert cache.has("a", 1) and cache.has("c", 1)
+        assert not cache.has("b", 1)
+        
+        cache.put("a", 2, "A2") # update, nothing dropped
+        assert cache.get("a", 2) == "A2" and cache.has("c", 1)
+        
+    def test_head(self):
+        
+        dir = tempfile.mkdtemp()
+        head_min = FileSystemLibrary.HEAD_MIN
+        
+        try:
+            for i in range(5):
+                os.mkdir(os.path.join(dir, "d%d" % i))
+            for i in range(30):
+                open(os.path.join(dir, "f%02d.mp3" % (29 - i)), "w").close()
+                
+            fs = FileSystemLibrary([dir], ["audio"], False, False, cache_size=1)
+            root = fs.get_level([])[0]
+            
+            FileSystemLibrary.HEAD_MIN = 100
+            assert fs.get_level_head(root, 10) is None
+            
+            FileSystemLibrary.HEAD_MIN = 10
+            nested, ids, names, num, raw = fs.get_level_head(root, 10)
+            assert num == 35
+            assert nested == ["d0", "d1", "d2", "d3", "d4"]
+            assert names == ["f00", "f01", "f02", "f03", "f04"]
+            
+            # listings in between (e.g. by the file index) do not interfere
+            fs.list_dir(os.path.join(dir, "d0"), cache=False)
+            
+            nested, ids, names = fs.get_level(root, raw)
+            assert len(nested) == 5 and len(names) == 30
+            assert fs.get_level_head(root, 10) is None # cached now
+            
+        finally:
+            FileSystemLibrary.HEAD_MIN = head_min
+            shutil.rmtree(dir)
+        
+    def test_readable(self):
+        
+        dir = tempfile.mkdtemp()
+        
+        try:
+            for name in ("a.mp3", "b.mp3"):
+                open(os.path.join(dir, name), "w").close()
+            
+            fs = FileSystemLibrary([dir], ["audio"], True, False)
+            root = fs.get_level([])[0]
+            
+            nested, ids, names = fs.get_level(root)
+            assert names == ["a.mp3", "b.mp3"]
+            
+            os.remove(ids[1])
+            assert fs.readable(ids) == ids[0:1]
+            
+        finally:
+            shutil.rmtree(dir)
+        
 if __name__ == "__main__":
     
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,194 @@
+# -*- coding: UTF-8 -*-
+
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+
+import inspect
+import random
+import struct
+import time
+import unittest
+
+import remuco
+import remuco.log
+from remuco import data
+from remuco import serial
+
+ROUNDS = 300 # fuzzed messages per serializable
+MAX_SIZE = 10240 # maximum size of fuzzed messages
+MAX_TIME = 0.1 # maximum time in seconds to unpack a fuzzed message
+
+class _Mirror(serial.Serializable):
+    """Serializable with arbitrary format and data."""
+    
+    def __init__(self, fmt, data=None):
+        self.__fmt = fmt
+        self.data = data
+        
+    def get_fmt(self):
+        return self.__fmt
+    
+    def get_data(self):
+        return self.data
+    
+    def set_data(self, data):
+        self.data = data
+
+def _samples():
+    """One instance of each serializable from module data."""
+    
+    ia = remuco.ItemAction("ia", multiple=True)
+    
+    return [data.PlayerInfo("fuzz", 0, 5, [ia], ["Artist"]),
+            data.PlayerState(), data.Progress(), data.ProgressAnchor(),
+            data.Item("id", {"title": "fuzz"}, None, 0, "JPEG"),
+            data.ItemList(1, [], [], [], [], 0, 0, 0, None, None),
+            data.ClientInfo(), data.Control(), data.Action(), data.Tagging(),
+            data.Request()]
+    
+def _garbage(rnd, num):
+    """Random bytes."""
+    
+    if num == 0:
+        return ""
+    
+    return ("%0*x" % (num * 2, rnd.getrandbits(num * 8))).decode("hex")
+    
+def _random_data(rnd, fmt):
+    """Random but valid data for a format."""
+    
+    def string():
+        return _garbage(rnd, rnd.randint(0, 20))
+    
+    def array(fn):
+        return [fn() for i in range(rnd.randint(0, 50))]
+    
+    gen = {serial.TYPE_Y: lambda: rnd.randint(-128, 127),
+           serial.TYPE_B: lambda: rnd.random() < 0.5,
+           serial.TYPE_N: lambda: rnd.randint(-32768, 32767),
+           serial.TYPE_I: lambda: rnd.randint(-2**31, 2**31 - 1),
+           serial.TYPE_L: lambda: rnd.randint(-2**63, 2**63 - 1),
+           serial.TYPE_S: string}
+    
+    for type, element in ((serial.TYPE_AY, serial.TYPE_Y),
+                          (serial.TYPE_AB, serial.TYPE_B),
+                          (serial.TYPE_AN, serial.TYPE_N),
+                          (serial.TYPE_AI, serial.TYPE_I),
+                          (serial.TYPE_AL, serial.TYPE_L),
+                          (serial.TYPE_AS, serial.TYPE_S)):
+        gen[type] = lambda fn=gen[element]: array(fn)
+        
+    return [gen[type]() for type in fmt]
+
+def _mutate(rnd, bytes):
+    """Corrupt serialized data like a broken or malicious client might."""
+    
+    bytes = list(bytes)
+    
+    mutation = rnd.randint(0, 4)
+    
+    if mutation == 0 and len(bytes) > 4: # huge or negative array length
+        off = rnd.randrange(len(bytes) - 4)
+        num = rnd.choice((0x7fffffff, -1, -0x80000000, rnd.randint(0, 5000)))
+        bytes[off:off + 4] = list(struct.pack("!i", num))
+    elif mutation == 1: # random byte flips
+        for i in range(rnd.randint(1, 5)):
+            bytes[rnd.randrange(len(bytes))] = _garbage(rnd, 1)
+    elif mutation == 2: # truncated
+        del bytes[rnd.randrange(len(bytes)):]
+    elif mutation == 3: # garbage appended
+        bytes.extend(_garbage(rnd, rnd.randint(1, 1000)))
+    else: # garbage only, but with a valid first type
+        bytes[1:] = _garbage(rnd, rnd.randint(0, MAX_SIZE - 1))
+    
+    return "".join(bytes[:MAX_SIZE])
+
+def _size(value):
+    """Number of elements in unpacked data."""
+    
+    if isinstance(value, (list, tuple)):
+        return sum([_size(v) for v in value])
+    if isinstance(value, basestring):
+        return max(1, len(value))
+    return 1
+
+class FuzzTest(unittest.TestCase):
+    
+    def setUp(self):
+        
+        remuco.log.set_level(remuco.log.ERROR) # expect lots of warnings
+        
+    def tearDown(self):
+        
+        remuco.log.set_level(remuco.log.WARNING)
+        
+    def test_samples(self):
+        
+        # make sure new serializables get fuzzed too
+        
+        classes = [c for n, c in inspect.getmembers(data, inspect.isclass)
+                   if issubclass(c, serial.Serializable)]
+        
+        self.assertEqual(set(classes), set([s.__class__ for s in _samples()]))
+        
+    def test_array_length(self):
+        
+        for type in (serial.TYPE_AY, serial.TYPE_AB, serial.TYPE_AN,
+                     serial.TYPE_AI, serial.TYPE_AL, serial.TYPE_AS):
+            
+            bytes = "%s%s%s" % (chr(type), struct.pack("!i", 0x7fffffff),
+                                "\x00" * MAX_SIZE)
+            
+            t0 = time.time()
+            self.assertTrue(serial.unpack(_Mirror((type,)), bytes) is None)
+            self.assertTrue(time.time() - t0 < MAX_TIME)
+            
+    def test_unpack(self):
+        
+        rnd = random.Random(0)
+        
+        for sample in _samples():
+            
+            fmt = sample.get_fmt()
+            
+            # unpack into the real class if it receives data
+            if "set_data" in sample.__class__.__dict__:
+                target = sample.__class__
+            else:
+                target = lambda: _Mirror(fmt)
+                
+            for i in range(ROUNDS):
+                
+                bytes = serial.pack(_Mirror(fmt, _random_data(rnd, fmt)))
+                bytes = _mutate(rnd, bytes)
+                
+                t0 = time.time()
+                result = serial.unpack(target(), bytes)
+                t = time.time() - t0
+                
+                self.assertTrue(t < MAX_TIME, "%s: unpack took %.3f s" %
+                                (sample.__class__.__name__, t))
+                
+                if isinstance(result, _Mirror):
+                    self.assertTrue(_size(result.data) <= len(bytes))
+                    
+if __name__ == '__main__':
+    
+    unittest.main()
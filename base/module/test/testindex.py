@@ -0,0 +1,116 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import gobject
+
+from remuco.files import FileSystemLibrary
+from remuco.index import FileIndex
+
+
+class IndexTest(unittest.TestCase):
+
+
+    def setUp(self):
+        
+        self.__ml = gobject.MainLoop()
+        self.__dir = tempfile.mkdtemp()
+        
+        self.__touch("Blondie", "Best Of", "01 Atomic.mp3")
+        self.__touch("Blondie", "Best Of", "02 Call Me.ogg")
+        self.__touch("Blondie", "Best Of", "cover.jpg")
+        self.__touch("Various", "Atomic Kitten.mp3")
+        
+        music = os.path.join(self.__dir, "Music")
+        self.__fs = FileSystemLibrary([music], ["audio"], False, False)
+        self.__index = FileIndex(self.__fs, os.path.join(self.__dir, "index"))
+
+    def tearDown(self):
+        
+        self.__index.stop()
+        shutil.rmtree(self.__dir)
+        
+    def __touch(self, *elems):
+        
+        dir = os.path.join(self.__dir, "Music", *elems[:-1])
+        if not os.path.isdir(dir):
+            os.makedirs(dir)
+        open(os.path.join(dir, elems[-1]), "w").close()
+        
+    def __crawl(self):
+        
+        self.__index.stop()
+        self.__index.start()
+        gobject.timeout_add(1000, self.__ml.quit)
+        self.__ml.run()
+        
+    def test_index(self):
+        
+        self.__crawl()
+        
+        ids, names = self.__index.search(["atomic"])
+        assert names == ["01 Atomic", "Atomic Kitten"]
+        
+        ids, names = self.__index.search(["blondie", "call"])
+        assert names == ["02 Call Me"]
+        assert ids == [os.path.join(self.__dir, "Music", "Blondie", "Best Of",
+                                    "02 Call Me.ogg")]
+        
+        ids, names = self.__index.search(["atom"], prefix=True)
+        assert names == ["Atomic Kitten"]
+        
+        ids, names = self.__index.search(["cover"])
+        assert names == []
+        
+        ids, names = self.__index.search(["100%"])
+        assert names == []
+        
+        shutil.rmtree(os.path.join(self.__dir, "Music", "Various"))
+        self.__touch("Blondie", "Best Of", "03 Atomic (Remix).mp3")
+        self.__crawl()
+        
+        ids, names = self.__index.search(["atomic"])
+        assert names == ["01 Atomic", "03 Atomic (Remix)"]
+        
+    def test_symlink_loop(self):
+        
+        music = os.path.join(self.__dir, "Music")
+        os.symlink(music, os.path.join(music, "Blondie", "Loop"))
+        os.symlink(os.path.join(music, "Blondie"),
+                   os.path.join(music, "Various", "Blondie"))
+        
+        self.__crawl()
+        
+        # each dir gets indexed once, either by its real or by a linked path
+        ids, names = self.__index.search(["atomic"])
+        names.sort()
+        assert names == ["01 Atomic", "Atomic Kitten"]
+        
+if __name__ == "__main__":
+    
+    unittest.main()
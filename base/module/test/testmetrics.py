@@ -0,0 +1,83 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from remuco import message
+from remuco import metrics
+
+
+class MetricsTest(unittest.TestCase):
+
+
+    def setUp(self):
+        
+        metrics.reset()
+        
+    def test_record(self):
+        
+        metrics.count("msg-in", message.name(message.CTRL_NEXT))
+        metrics.count("msg-in", message.name(message.CTRL_NEXT))
+        metrics.count("bytes-in", "client", 100)
+        metrics.gauge("send-buffer", "client", 10)
+        metrics.gauge("send-buffer", "client", 5)
+        metrics.timing("poll", "test", 0.002)
+        metrics.timing("poll", "test", 0.004)
+        
+        snap = metrics.snapshot()
+        
+        assert snap["counters"]["msg-in"] == {"CTRL_NEXT": 2}
+        assert snap["counters"]["bytes-in"] == {"client": 100}
+        assert snap["gauges"]["send-buffer"]["client"] == {"now": 5, "max": 10}
+        timing = snap["timings"]["poll"]["test"]
+        assert timing["count"] == 2
+        assert abs(timing["avg"] - 3) < 1e-6
+        assert abs(timing["max"] - 4) < 1e-6
+        
+        metrics.reset()
+        assert metrics.snapshot()["counters"] == {}
+        
+    def test_dump(self):
+        
+        dir = tempfile.mkdtemp()
+        try:
+            file = os.path.join(dir, "test.metrics")
+            metrics.count("msg-out", message.name(message.SYNC_ITEM))
+            metrics.dump(file)
+            assert "SYNC_ITEM" in open(file).read()
+            assert os.listdir(dir) == ["test.metrics"]
+        finally:
+            shutil.rmtree(dir)
+        
+    def test_names(self):
+        
+        assert message.name(message.REQ_FILES) == "REQ_FILES"
+        assert message.name(12345) == "12345"
+        
+if __name__ == '__main__':
+    
+    unittest.main()
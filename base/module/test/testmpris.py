@@ -0,0 +1,185 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+import unittest
+
+import gobject
+
+import remuco.log
+from remuco import mpris
+
+
+class _TrackList(object):
+    """MPRIS tracklist object which replies asynchronously."""
+    
+    def __init__(self, length):
+        
+        self.tracks = [{"location": "file:///%d.ogg" % i, "title": str(i)}
+                       for i in range(length)]
+        self.calls = 0
+        self.max_calls = 0
+        self.in_flight = 0
+        
+    def __reply(self, handler, value):
+        
+        self.in_flight -= 1
+        handler(value)
+        
+    def __call(self, value, reply_handler=None, error_handler=None):
+        
+        self.calls += 1
+        self.in_flight += 1
+        self.max_calls = max(self.max_calls, self.in_flight)
+        if value is None:
+            gobject.idle_add(self.__reply, error_handler, Exception("failed"))
+        else:
+            gobject.idle_add(self.__reply, reply_handler, value)
+        
+    def GetLength(self, **handlers):
+        
+        self.__call(len(self.tracks), **handlers)
+        
+    def GetMetadata(self, index, **handlers):
+        
+        self.__call(self.tracks[index], **handlers)
+        
+    def GetCurrentTrack(self, reply_handler=None, error_handler=None):
+        
+        gobject.idle_add(reply_handler, 0)
+        
+class _Reply(object):
+    
+    def __init__(self):
+        
+        self.ids = []
+        self.names = []
+        self.item_actions = []
+        self.sent = False
+        
+    def send(self):
+        
+        self.sent = True
+        
+class MPRISTest(unittest.TestCase):
+
+
+    def setUp(self):
+        
+        self.__ml = gobject.MainLoop()
+        self.__pa = mpris.MPRISAdapter("TestMPRIS")
+        self.__pa.config.log_level = remuco.log.WARNING
+        self.__pa._notify_caps(mpris.CAN_HAS_TRACKLIST)
+        self.__tl = _TrackList(100)
+        self.__pa._mp_t = self.__tl
+        
+    def __request(self):
+        
+        reply = _Reply()
+        self.__pa.request_playlist(reply)
+        gobject.idle_add(self.__quit, reply)
+        self.__ml.run()
+        return reply
+    
+    def __quit(self, reply):
+        
+        if reply.sent:
+            self.__ml.quit()
+            return False
+        return True
+        
+    def test_tracklist(self):
+        
+        tl = self.__tl
+        
+        reply = self.__request()
+        self.assertEqual(len(reply.ids), 100)
+        self.assertEqual(tl.calls, 101)
+        self.assertTrue(tl.max_calls <= mpris.TRACKLIST_CALLS)
+        
+        # cached
+        reply = self.__request()
+        self.assertEqual(len(reply.ids), 100)
+        self.assertEqual(tl.calls, 101)
+        
+        # appended tracks
+        tl.tracks.append({"location": "file:///new.ogg"})
+        self.__pa._notify_tracklist_change(101)
+        reply = self.__request()
+        self.assertEqual(reply.ids[-1], "file:///new.ogg")
+        self.assertEqual(tl.calls, 102)
+        
+        # removed tracks
+        del tl.tracks[0]
+        self.__pa._notify_tracklist_change(100)
+        reply = self.__request()
+        self.assertEqual(reply.ids[0], "file:///1.ogg")
+        self.assertEqual(len(reply.ids), 100)
+        
+    def test_tracklist_error(self):
+        
+        tl = self.__tl
+        track, tl.tracks[5] = tl.tracks[5], None
+        
+        reply = self.__request()
+        self.assertEqual(len(reply.ids), 100)
+        self.assertEqual(reply.ids[5], "None")
+        self.assertEqual(tl.calls, 101)
+        
+        # failed track gets requested again
+        tl.tracks[5] = track
+        reply = self.__request()
+        self.assertEqual(reply.ids[5], "file:///5.ogg")
+        self.assertEqual(tl.calls, 102)
+        
+        # cached now
+        reply = self.__request()
+        self.assertEqual(tl.calls, 102)
+        
+    def test_stop(self):
+        
+        tl = self.__tl
+        
+        reply = _Reply()
+        self.__pa.request_playlist(reply)
+        
+        def stop():
+            if tl.calls > 1: # track requests in flight
+                self.__pa.stop()
+                gobject.idle_add(drained)
+                return False
+            return True
+            
+        def drained():
+            if tl.in_flight == 0:
+                self.__ml.quit()
+                return False
+            return True
+        
+        gobject.idle_add(stop)
+        self.__ml.run()
+        
+        self.assertFalse(reply.sent)
+        self.assertEqual(self.__pa._MPRISAdapter__tl_calls, 0)
+        
+if __name__ == '__main__':
+    
+    unittest.main()
@@ -0,0 +1,182 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+import time
+import unittest
+
+import gobject
+
+import remuco
+import remuco.log
+from remuco import mpris2
+
+
+def _meta(i):
+    
+    return {"mpris:trackid": "/org/example/track/%d" % i,
+            "mpris:length": 300000000,
+            "xesam:url": "file:///music/%d.ogg" % i,
+            "xesam:title": "Title %d" % i,
+            "xesam:artist": ["Artist"]}
+
+class _TrackList(object):
+    """MPRIS 2 tracklist object which replies asynchronously."""
+    
+    def __init__(self, length):
+        
+        self.metas = dict([(_meta(i)["mpris:trackid"], _meta(i))
+                           for i in range(length)])
+        self.calls = 0
+        
+    def GetTracksMetadata(self, ids, reply_handler=None, error_handler=None):
+        
+        self.calls += 1
+        gobject.idle_add(reply_handler, [self.metas[id] for id in ids])
+        
+class _Properties(object):
+    """MPRIS 2 properties object which replies asynchronously."""
+    
+    def __init__(self, tracks):
+        
+        self.tracks = tracks
+        
+    def Get(self, iface, property, reply_handler=None, error_handler=None):
+        
+        gobject.idle_add(reply_handler, list(self.tracks))
+        
+class _Reply(object):
+    
+    def __init__(self):
+        
+        self.ids = []
+        self.names = []
+        self.item_actions = []
+        self.sent = False
+        
+    def send(self):
+        
+        self.sent = True
+        
+class MPRIS2Test(unittest.TestCase):
+
+
+    def setUp(self):
+        
+        self.__ml = gobject.MainLoop()
+        self.__pa = mpris2.MPRIS2Adapter("TestMPRIS2")
+        self.__pa.config.log_level = remuco.log.WARNING
+        self.__pa._MPRIS2Adapter__has_tracklist = True
+        self.__tl = _TrackList(100)
+        self.__pa._mp_t = self.__tl
+        
+    def __request(self):
+        
+        reply = _Reply()
+        self.__pa.request_playlist(reply)
+        gobject.idle_add(self.__quit, reply)
+        self.__ml.run()
+        return reply
+    
+    def __quit(self, reply):
+        
+        if reply.sent:
+            self.__ml.quit()
+            return False
+        return True
+        
+    def test_tracklist(self):
+        
+        pa, tl = self.__pa, self.__tl
+        
+        ids = sorted(tl.metas.keys())
+        pa._notify_properties(mpris2.IFACE_TRACKLIST, {"Tracks": ids}, [])
+        
+        reply = self.__request()
+        self.assertEqual(reply.ids, ids)
+        self.assertEqual(reply.names[0], "Artist - Title 0")
+        self.assertEqual(tl.calls, 1)
+        
+        # cached
+        reply = self.__request()
+        self.assertEqual(tl.calls, 1)
+        
+        # meta data of added tracks comes with the signal
+        meta = _meta(100)
+        pa._notify_track_added(meta, ids[-1])
+        pa._notify_track_removed(ids[0])
+        reply = self.__request()
+        self.assertEqual(reply.ids, ids[1:] + [meta["mpris:trackid"]])
+        self.assertEqual(tl.calls, 1)
+        
+    def test_tracklist_invalidated(self):
+        
+        pa, tl = self.__pa, self.__tl
+        
+        ids = sorted(tl.metas.keys())
+        props = _Properties(ids)
+        pa._mp_props = props
+        
+        pa._notify_properties(mpris2.IFACE_TRACKLIST, {}, ["Tracks"])
+        reply = self.__request()
+        self.assertEqual(reply.ids, ids)
+        self.assertEqual(tl.calls, 1)
+        
+        # meta data of tracks still listed is kept
+        props.tracks = ids[10:] + [ids[0]]
+        pa._notify_properties(mpris2.IFACE_TRACKLIST, {}, ["Tracks"])
+        reply = self.__request()
+        self.assertEqual(reply.ids, props.tracks)
+        self.assertEqual(reply.names[-1], "Artist - Title 0")
+        self.assertEqual(tl.calls, 1)
+        
+    def test_progress(self):
+        
+        pa = self.__pa
+        progress = pa._MPRIS2Adapter__progress
+        
+        pa._notify_properties(mpris2.IFACE_PLAYER,
+                              {"PlaybackStatus": mpris2.STATUS_PLAYING,
+                               "Metadata": _meta(0)}, [])
+        pa._notify_seeked(10000000)
+        
+        time.sleep(0.2)
+        self.assertTrue(10150000 < progress() < 10500000)
+        
+        pa._notify_properties(mpris2.IFACE_PLAYER,
+                              {"PlaybackStatus": mpris2.STATUS_PAUSED}, [])
+        frozen = progress()
+        time.sleep(0.1)
+        self.assertEqual(progress(), frozen)
+        
+    def test_poll(self):
+        
+        pa = self.__pa
+        
+        pa.poll() # no signals connected yet
+        
+        pa._MPRIS2Adapter__dbus_signal_handler = (None,)
+        self.assertRaises(NotImplementedError, pa.poll)
+        pa._MPRIS2Adapter__dbus_signal_handler = ()
+        
+if __name__ == '__main__':
+    
+    unittest.main()
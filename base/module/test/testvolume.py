@@ -0,0 +1,138 @@
+# =============================================================================
+#
+#    Remuco - A remote control system for media players.
+#    Copyright (C) 2006-2010 by the Remuco team, see AUTHORS.
+#
+#    This file is part of Remuco.
+#
+#    Remuco is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Remuco is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Remuco.  If not, see <http://www.gnu.org/licenses/>.
+#
+# =============================================================================
+
+
+
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import gobject
+
+from remuco import volume
+
+# fake amixer whose session dies after each command
+_AMIXER = """#!/bin/sh
+if [ "$1" = "-s" ]; then
+    read cmd
+    echo "  Mono: Playback 57 [89%] [on]"
+    exit 0
+fi
+exec sleep 60
+"""
+
+
+class _Config(object):
+    
+    def __init__(self, get_cmd, backend="auto"):
+        
+        self.master_volume_backend = backend
+        self.master_volume_get_cmd = get_cmd
+        self.master_volume_up_cmd = "true"
+        self.master_volume_down_cmd = "true"
+        self.master_volume_mute_cmd = "true"
+        
+    def is_default(self, key):
+        
+        return key != "master-volume-get-cmd"
+    
+class VolumeTest(unittest.TestCase):
+
+
+    def setUp(self):
+        
+        self.__volumes = []
+        
+    def __mixer(self, get_cmd, backend="auto"):
+        
+        return volume.get_mixer(_Config(get_cmd, backend), self.__volumes.append)
+        
+    def test_shell(self):
+        
+        mixer = self.__mixer("echo 42")
+        assert isinstance(mixer, volume.ShellMixer)
+        assert not mixer.push
+        
+        mixer.poll()
+        assert self.__volumes == [42]
+        
+        mixer = self.__mixer("echo 142", backend="shell")
+        mixer.poll()
+        mixer = self.__mixer("echo foo", backend="shell")
+        mixer.poll()
+        assert self.__volumes == [42]
+        
+    def test_amixer_output(self):
+        
+        rx = volume.AmixerMixer._RX_VOLUME
+        
+        assert rx.match("  Mono: Playback 57 [89%] [-6.00dB] [on]").group(1) == "89"
+        assert rx.match("  Front Left: Playback 0 [0%] [off]").group(1) == "0"
+        assert rx.match("  Front Right: Playback 9 [14%] [on]") is None
+        assert rx.match("  Limits: Playback 0 - 64") is None
+        
+    def test_amixer_restart(self):
+        
+        dir = tempfile.mkdtemp()
+        amixer = os.path.join(dir, "amixer")
+        fp = open(amixer, "w")
+        fp.write(_AMIXER)
+        fp.close()
+        os.chmod(amixer, 0755)
+        
+        path = os.environ["PATH"]
+        os.environ["PATH"] = "%s%s%s" % (dir, os.pathsep, path)
+        delay = volume.AmixerMixer._RESTART_DELAY_MIN
+        volume.AmixerMixer._RESTART_DELAY_MIN = 10
+        
+        ml = gobject.MainLoop()
+        mixer = volume.AmixerMixer(self.__volumes.append)
+        
+        def check():
+            if len(self.__volumes) >= 3 or not check.tries:
+                ml.quit()
+                return False
+            check.tries -= 1
+            return True
+        check.tries = 100
+        
+        try:
+            mixer.start()
+            gobject.timeout_add(50, check)
+            ml.run()
+        finally:
+            mixer.stop()
+            volume.AmixerMixer._RESTART_DELAY_MIN = delay
+            os.environ["PATH"] = path
+            shutil.rmtree(dir)
+        
+        # each volume comes from a restarted session
+        self.assertEqual(self.__volumes[:3], [89, 89, 89])
+        
+        # delay grows although the session reported volumes in between
+        self.assertTrue(mixer._AmixerMixer__restart_delay >= 40)
+        
+if __name__ == '__main__':
+    
+    unittest.main()
@@ -82,6 +82,7 @@ public final class ClientInfo implements ISerializable {
 		if (extra != null) {
 
 			extra.put("version", VERSION);
+			extra.put("progress-anchor", "1"); // see Progress.setAnchor()
 			
 			atoms[3].as = new String[extra.size()];
 			atoms[4].as = new String[extra.size()];
@@ -31,12 +31,36 @@ public class Progress implements ISerializable {
 
 	private final SerialAtom[] atoms;
 
+	/** Progress in milli seconds at {@link #anchorTime}. */
+	private long anchorProgress = 0;
+
+	private long anchorTime = 0;
+
+	/** Playback rate in per mille, 0 if progress is not extrapolated. */
+	private int rate = 0;
+
 	public Progress() {
 		atoms = SerialAtom.build(ATOMS_FMT);
 	}
 
+	/**
+	 * Get the current progress in seconds. If the progress is based on an
+	 * anchor (see {@link #setAnchor(ProgressAnchor)}), it gets extrapolated.
+	 */
 	public int getProgress() {
-		return atoms[0].i;
+
+		if (rate == 0) {
+			return atoms[0].i;
+		}
+
+		final long elapsed = System.currentTimeMillis() - anchorTime;
+		final int progress = (int) ((anchorProgress + elapsed * rate / 1000) / 1000);
+
+		if (atoms[1].i > 0 && progress > atoms[1].i) {
+			return atoms[1].i;
+		}
+
+		return progress;
 	}
 
 	public SerialAtom[] getAtoms() {
@@ -47,7 +71,24 @@ public class Progress implements ISerializable {
 		return atoms[1].i;
 	}
 
+	/** Check if the progress advances on its own (based on an anchor). */
+	public boolean isAdvancing() {
+		return rate != 0;
+	}
+
 	public void notifyAtomsUpdated() {
+		rate = 0;
+	}
+
+	/** Set the progress to an anchor just received from the server. */
+	public void setAnchor(ProgressAnchor anchor) {
+
+		anchorTime = System.currentTimeMillis();
+		anchorProgress = anchor.getProgress();
+		rate = anchor.getRate();
+
+		atoms[0].i = anchor.getProgress() / 1000;
+		atoms[1].i = anchor.getLength();
 	}
 
 	public String getLengthFormatted() {
@@ -55,7 +96,7 @@ public class Progress implements ISerializable {
 	}
 
 	public String getProgressFormatted() {
-		return Tools.formatTime(atoms[0].i);
+		return Tools.formatTime(getProgress());
 	}
 
 }
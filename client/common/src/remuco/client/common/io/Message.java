@@ -44,6 +44,7 @@ public final class Message {
 	public static final int SYNC_STATE = SYNC;
 	public static final int SYNC_PROGRESS = SYNC + 1;
 	public static final int SYNC_ITEM = SYNC + 2;
+	public static final int SYNC_PROGRESS_ANCHOR = SYNC + 3;
 
 	private static final int CTRL = 300;
 
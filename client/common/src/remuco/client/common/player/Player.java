@@ -20,12 +20,16 @@
  */
 package remuco.client.common.player;
 
+import java.util.TimerTask;
+
+import remuco.client.common.MainLoop;
 import remuco.client.common.data.ActionParam;
 import remuco.client.common.data.ControlParam;
 import remuco.client.common.data.Item;
 import remuco.client.common.data.ItemList;
 import remuco.client.common.data.PlayerInfo;
 import remuco.client.common.data.Progress;
+import remuco.client.common.data.ProgressAnchor;
 import remuco.client.common.data.RequestParam;
 import remuco.client.common.data.State;
 import remuco.client.common.data.Tagging;
@@ -43,6 +47,24 @@ import remuco.client.common.util.Log;
  */
 public final class Player {
 
+	/** Timer task to notify progress changes while progress advances. */
+	private class ProgressTicker extends TimerTask {
+
+		public void run() {
+
+			if (conn.isClosed() || !progress.isAdvancing()) {
+				cancel();
+				progressTicker = null;
+				return;
+			}
+
+			if (progressListener != null) {
+				progressListener.notifyProgressChanged();
+			}
+		}
+
+	}
+
 	/** Do not alter outside {@link Player}! */
 	public final PlayerInfo info;
 
@@ -61,6 +83,10 @@ public final class Player {
 
 	private IProgressListener progressListener = null;
 
+	private final ProgressAnchor progressAnchor = new ProgressAnchor();
+
+	private ProgressTicker progressTicker = null;
+
 	private IRequester reqCaller;
 
 	/** Used to detect if incoming request replies are still up to date. */
@@ -244,6 +270,26 @@ public final class Player {
 
 			break;
 
+		case Message.SYNC_PROGRESS_ANCHOR:
+
+			Serial.in(progressAnchor, m.data);
+
+			progress.setAnchor(progressAnchor);
+
+			if (progress.isAdvancing() && progressTicker == null) {
+				progressTicker = new ProgressTicker();
+				MainLoop.schedule(progressTicker, 1000, 1000);
+			} else if (!progress.isAdvancing() && progressTicker != null) {
+				progressTicker.cancel();
+				progressTicker = null;
+			}
+
+			if (progressListener != null) {
+				progressListener.notifyProgressChanged();
+			}
+
+			break;
+
 		case Message.REQ_ITEM:
 
 			// maybe used later